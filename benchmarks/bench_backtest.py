@@ -0,0 +1,77 @@
+"""Compare backtest throughput of the scalar replay loop against the vectorized batch mode.
+
+Usage::
+
+    python benchmarks/bench_backtest.py --alerts 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.vectorized import BUY, SELL, AlertColumns
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.services.validation_engine import MarketContext
+
+
+def synthetic_columns(count: int, seed: int = 0) -> AlertColumns:
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(20.0, 40000.0, count)
+    return AlertColumns(
+        symbol=rng.choice(np.array(["ETH", "BTC-USD", "SOL"]), count),
+        price=price,
+        rsi=rng.uniform(0.0, 100.0, count),
+        macd=rng.uniform(-0.01, 0.01, count),
+        ema20=price * rng.uniform(0.97, 1.03, count),
+        atr=price * rng.uniform(0.001, 0.03, count),
+        signal=rng.choice(np.array([BUY, SELL], dtype=np.int8), count),
+    )
+
+
+def to_payloads(columns: AlertColumns) -> list[AlertPayload]:
+    return [
+        AlertPayload(
+            symbol=str(columns.symbol[i]),
+            price=float(columns.price[i]),
+            signal="buy" if columns.signal[i] == BUY else "sell",
+            timeframe="5m",
+            indicators=IndicatorPayload(
+                RSI=float(columns.rsi[i]),
+                MACD=float(columns.macd[i]),
+                EMA20=float(columns.ema20[i]),
+                ATR=float(columns.atr[i]),
+            ),
+        )
+        for i in range(len(columns))
+    ]
+
+
+def _rate(label: str, count: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{label:<24} {elapsed:8.3f}s {rate:14,.0f} alerts/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.alerts)
+    payloads = to_payloads(columns)
+    backtester = Backtester(MarketContext(ema_fast=1500.0, ema_slow=1400.0, vwap=1600.0, atr_baseline=150.0))
+
+    scalar = _rate("scalar run", args.alerts, lambda: backtester.run(payloads))
+    _rate("batch from payloads", args.alerts, lambda: backtester.run_batch(payloads))
+    batch = _rate("batch from columns", args.alerts, lambda: backtester.run_batch(columns))
+    print(f"speedup (columns vs scalar): {batch / scalar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
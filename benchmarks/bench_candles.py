@@ -0,0 +1,71 @@
+"""Throughput of tick and 1m-bar aggregation into several timeframes with incremental indicators.
+
+Usage::
+
+    python benchmarks/bench_candles.py --ticks 1000000 --timeframes 1m,5m,15m,1h,4h,1d
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from trading_agent.services.candles import CandleAggregator
+from trading_agent.services.market_feed import MarketEvent, feed
+
+SYMBOLS = ("ETH", "BTC-USD", "SOL")
+
+
+def _ticks(count: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000 + np.cumsum(rng.exponential(0.5, count))  # about two trades a second
+    prices = 1700.0 * np.exp(np.cumsum(rng.normal(0, 2e-4, count)))
+    volumes = rng.exponential(1.0, count)
+    symbols = rng.integers(0, len(SYMBOLS), count)
+    return [
+        MarketEvent(SYMBOLS[s], t, p, p, p, p, v, 0.0)
+        for s, t, p, v in zip(symbols.tolist(), timestamps.tolist(), prices.tolist(), volumes.tolist())
+    ]
+
+
+def _bars(ticks: list) -> list:
+    aggregator = CandleAggregator(["1m"], capacity=len(ticks))
+    feed(aggregator, ticks)
+    aggregator.flush()
+    bars = []
+    for symbol in aggregator.symbols():
+        series = aggregator.series(symbol, "1m")
+        columns = [series.column(name).tolist() for name in ("timestamp", "open", "high", "low", "close", "volume")]
+        bars.extend(MarketEvent(symbol, t, o, h, l, c, v, 60.0) for t, o, h, l, c, v in zip(*columns))
+    bars.sort(key=lambda bar: bar.timestamp)
+    return bars
+
+
+def _rate(label: str, events: list, timeframes: list) -> None:
+    best = float("inf")
+    for _ in range(3):
+        aggregator = CandleAggregator(timeframes)
+        start = time.perf_counter()
+        feed(aggregator, events)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<32} {len(events) / best:14,.0f} events/s  ({best / len(events) * 1e6:.2f} us/event)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=1_000_000)
+    parser.add_argument("--timeframes", default="1m,5m,15m,1h,4h,1d")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    timeframes = args.timeframes.split(",")
+    ticks = _ticks(args.ticks, args.seed)
+    bars = _bars(ticks)
+    _rate("ticks, 1m only", ticks, timeframes[:1])
+    _rate(f"ticks, {len(timeframes)} timeframes", ticks, timeframes)
+    _rate(f"1m bars, {len(timeframes)} timeframes", bars, timeframes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-alert validation latency of the rule-based scorer against the XGBoost confidence model.
+
+The model is timed one alert per call, in webhook-sized micro-batches, and over a whole
+history in one vectorized prediction. Needs the `ml` extra.
+
+Usage::
+
+    python benchmarks/bench_confidence.py --alerts 20000 --rounds 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from bench_backtest import synthetic_columns
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.vectorized import BUY
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+from trading_agent.services.confidence_model import ConfidenceModel, column_features
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+CONTEXT = MarketContext(ema_fast=1450.0, ema_slow=1400.0, vwap=1600.0, atr_baseline=150.0)
+
+
+def _alerts(columns) -> list:
+    return [
+        ParsedAlert(
+            str(columns.symbol[i]),
+            float(columns.price[i]),
+            "buy" if columns.signal[i] == BUY else "sell",
+            "5m",
+            ParsedIndicators(float(columns.rsi[i]), float(columns.macd[i]), float(columns.ema20[i]), float(columns.atr[i])),
+        )
+        for i in range(len(columns))
+    ]
+
+
+def _per_alert(label: str, alerts: list, run, batch: int, baseline: float = 0.0) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for offset in range(0, len(alerts), batch):
+            run(alerts[offset : offset + batch])
+        best = min(best, time.perf_counter() - start)
+    micros = best / len(alerts) * 1e6
+    relative = f"  ({micros / baseline:6.1f}x rules)" if baseline else ""
+    print(f"{label:<36} {micros:9.2f} us/alert{relative}")
+    return micros
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=20_000)
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=4)
+    args = parser.parse_args()
+
+    training = synthetic_columns(50_000, seed=1)
+    labels = (training.rsi < 50) == (training.signal == BUY)
+    model = ConfidenceModel.train(column_features(training, CONTEXT), labels, args.rounds, args.max_depth)
+
+    alerts = _alerts(synthetic_columns(args.alerts))
+    contexts = [CONTEXT] * 1_000
+    rules = ValidationEngine(CONTEXT)
+    scored = ValidationEngine(CONTEXT, model=model)
+
+    baseline = _per_alert("rules, one alert per call", alerts, lambda batch: rules.evaluate(batch[0]), 1)
+    _per_alert("model, one alert per call", alerts, lambda batch: scored.evaluate(batch[0]), 1, baseline)
+    for size in (8, 32, 100):
+        run = lambda batch: scored.evaluate_many(batch, contexts[: len(batch)])  # noqa: E731
+        _per_alert(f"model, micro-batches of {size}", alerts, run, size, baseline)
+
+    history = synthetic_columns(args.history, seed=2)
+    for label, backtester in (("rules", Backtester(CONTEXT)), ("model", Backtester(CONTEXT, confidence_model=model))):
+        start = time.perf_counter()
+        backtester.run_batch(history)
+        elapsed = time.perf_counter() - start
+        print(f"{label} vectorized backtest, {args.history:,} alerts {elapsed:8.3f}s ({elapsed / args.history * 1e9:6.0f} ns/alert)")
+
+
+if __name__ == "__main__":
+    main()
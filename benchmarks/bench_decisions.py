@@ -0,0 +1,77 @@
+"""Decision throughput with and without the DecisionCache on a replay whose inputs recur.
+
+Prices sit on a tick grid and ATR on a coarse grid, as in a replay of one symbol across a
+ranging market, so the same (price, ATR, signal) comes back often.
+
+Usage::
+
+    python benchmarks/bench_decisions.py --alerts 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.config.settings import Settings
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+from trading_agent.services.decision_engine import DecisionCache, DecisionEngine, RiskState
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+CONTEXT = MarketContext(ema_fast=1710.0, ema_slow=1700.0, vwap=1705.0, atr_baseline=15.0)
+
+
+def recurring_alerts(count: int, seed: int = 0) -> list[ParsedAlert]:
+    rng = random.Random(seed)
+    return [
+        ParsedAlert(
+            symbol="ETH",
+            price=1650.0 + 0.5 * rng.randrange(200),
+            signal=rng.choice(["buy", "sell"]),
+            timeframe="5m",
+            indicators=ParsedIndicators(
+                RSI=rng.uniform(0.0, 100.0), MACD=rng.uniform(-0.01, 0.01), EMA20=1705.0, ATR=8.0 + rng.randrange(8)
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+def _decide_all(engine: DecisionEngine, alerts, validations) -> float:
+    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+    start = time.perf_counter()
+    for alert, validation in zip(alerts, validations):
+        engine.decide(alert, validation, risk_state)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=200_000)
+    args = parser.parse_args()
+
+    alerts = recurring_alerts(args.alerts)
+    validation_engine = ValidationEngine(CONTEXT)
+    # Every alert must reach sizing for the comparison to measure it
+    validations = [validation_engine.evaluate(alert)._replace(valid=True, confidence=80) for alert in alerts]
+    settings = Settings()
+
+    plain = _decide_all(DecisionEngine(settings), alerts, validations)
+    cache = DecisionCache(max_entries=8192)
+    cached = _decide_all(DecisionEngine(settings, cache=cache), alerts, validations)
+    print(f"decide, uncached    {plain / len(alerts) * 1e6:8.3f} us/alert")
+    print(f"decide, cached      {cached / len(alerts) * 1e6:8.3f} us/alert   {cache.stats()}")
+    print(f"speedup: {plain / cached:.2f}x")
+
+    for label, backtester in (
+        ("replay, uncached", Backtester(CONTEXT, settings)),
+        ("replay, cached", Backtester(CONTEXT, settings, decision_cache=DecisionCache(max_entries=8192))),
+    ):
+        start = time.perf_counter()
+        backtester.run(alerts, keep_trades=False)
+        print(f"{label:<19} {(time.perf_counter() - start) / len(alerts) * 1e6:8.3f} us/alert")
+
+
+if __name__ == "__main__":
+    main()
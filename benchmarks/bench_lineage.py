@@ -0,0 +1,135 @@
+"""Time lineage and per-symbol audit queries on a database seeded with millions of rows.
+
+Usage::
+
+    python benchmarks/bench_lineage.py --alerts 1000000
+    python benchmarks/bench_lineage.py --alerts 1000000 --drop-indexes   # baseline without the new indexes
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'lineage.db'}")
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from trading_agent.db.database import Base, get_engine, session_scope  # noqa: E402
+from trading_agent.models.entities import Alert, Decision, Order, SignalAction, ValidationResult  # noqa: E402
+from trading_agent.services.lineage import get_alert_lineage, list_decisions  # noqa: E402
+
+SYMBOLS = ("ETH", "BTC-USD", "SOL")
+NEW_INDEXES = (
+    "ix_alerts_symbol_created_at",
+    "ix_alerts_created_at",
+    "ix_validation_results_alert_id",
+    "ix_decisions_alert_id",
+    "ix_decisions_symbol_created_at",
+    "ix_orders_decision_id",
+)
+
+
+def seed(count: int, chunk: int = 50_000) -> datetime:
+    start = datetime(2023, 1, 1)
+    step = timedelta(seconds=max(1, int(3 * 365 * 86400 / count)))
+    engine = get_engine()
+    for offset in range(0, count, chunk):
+        size = min(chunk, count - offset)
+        ids = range(offset + 1, offset + size + 1)
+        stamps = [start + step * (i - 1) for i in ids]
+        symbols = [SYMBOLS[i % len(SYMBOLS)] for i in ids]
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Alert),
+                [
+                    {"id": i, "symbol": s, "price": 100.0, "signal": "buy", "timeframe": "5m",
+                     "indicators": {"RSI": 25.0, "MACD": 0.1, "EMA20": 99.0, "ATR": 1.0}, "created_at": t}
+                    for i, s, t in zip(ids, symbols, stamps)
+                ],
+            )
+            connection.execute(
+                insert(ValidationResult),
+                [{"id": i, "alert_id": i, "valid": True, "confidence": 70, "reasons": [], "created_at": t} for i, t in zip(ids, stamps)],
+            )
+            connection.execute(
+                insert(Decision),
+                [
+                    {"id": i, "alert_id": i, "action": SignalAction.ENTER_LONG, "symbol": s, "order_type": "market",
+                     "size": 1.0, "confidence": 70, "created_at": t}
+                    for i, s, t in zip(ids, symbols, stamps)
+                ],
+            )
+            connection.execute(
+                insert(Order),
+                [{"id": i, "decision_id": i, "status": "filled", "filled_size": 1.0, "created_at": t} for i, t in zip(ids, stamps)],
+            )
+    return stamps[-1]
+
+
+def naive_lineage(session, alert_id: int) -> None:
+    alert = session.get(Alert, alert_id)
+    session.scalars(select(ValidationResult).where(ValidationResult.alert_id == alert.id)).all()
+    for decision in session.scalars(select(Decision).where(Decision.alert_id == alert.id)).all():
+        session.scalars(select(Order).where(Order.decision_id == decision.id)).all()
+
+
+def _time(label: str, fn, runs: int) -> None:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<32} median={statistics.median(samples):9.3f}ms max={max(samples):9.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--drop-indexes", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=get_engine())
+    started = time.perf_counter()
+    last = seed(args.alerts)
+    print(f"seeded {args.alerts:,} alerts (x4 tables) in {time.perf_counter() - started:.1f}s")
+    if args.drop_indexes:
+        with get_engine().begin() as connection:
+            for name in NEW_INDEXES:
+                connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    rng = random.Random(0)
+    day_start = datetime.combine(last.date(), datetime.min.time())
+
+    def lineage_joined():
+        with session_scope() as session:
+            get_alert_lineage(session, rng.randint(1, args.alerts))
+
+    def lineage_naive():
+        with session_scope() as session:
+            naive_lineage(session, rng.randint(1, args.alerts))
+
+    def symbol_day():
+        with session_scope() as session:
+            list_decisions(session, "BTC-USD", start=day_start, end=day_start + timedelta(days=1))
+
+    _time("lineage (joined query)", lineage_joined, args.runs)
+    _time("lineage (N+1 lookups)", lineage_naive, args.runs)
+    _time("BTC-USD decisions for one day", symbol_day, max(5, args.runs // 5))
+
+    with get_engine().connect() as connection:
+        plan = connection.execute(
+            text("EXPLAIN QUERY PLAN SELECT * FROM decisions WHERE symbol = 'BTC-USD' AND created_at >= :start"),
+            {"start": day_start},
+        ).fetchall()
+    print("plan:", "; ".join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    main()
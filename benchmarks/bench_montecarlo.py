@@ -0,0 +1,43 @@
+"""Measure Monte Carlo resampling throughput and how it scales with the number of worker processes.
+
+Usage::
+
+    python benchmarks/bench_montecarlo.py --trades 100000 --resamples 10000 --method block
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from trading_agent.backtesting.robustness import BOOTSTRAP, METHODS, monte_carlo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--resamples", type=int, default=10_000)
+    parser.add_argument("--method", choices=METHODS, default=BOOTSTRAP)
+    args = parser.parse_args()
+
+    pnl = np.random.default_rng(0).normal(2.0, 50.0, args.trades)
+
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        result = monte_carlo(pnl, resamples=args.resamples, method=args.method, equity=100_000.0, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        paths = args.trades * args.resamples / elapsed
+        print(
+            f"workers={workers:<3} {elapsed:8.3f}s speedup={baseline / elapsed:5.2f}x "
+            f"{paths / 1e6:8.1f}M trade-steps/s  risk_of_ruin={result.risk_of_ruin:.4f}"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
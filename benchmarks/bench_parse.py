@@ -0,0 +1,71 @@
+"""Per-alert overhead of the webhook hot path with pydantic alert models versus alert tuples.
+
+"before" parses the body with ``TypeAdapter(AlertPayload)``, runs validation and decision on
+the model and serializes indicators with ``model_dump()``; "after" is the current path:
+``decode_alert`` into a ``ParsedAlert`` tuple and plain attribute reads for persistence.
+
+Usage::
+
+    python benchmarks/bench_parse.py --alerts 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from trading_agent.config.settings import Settings
+from trading_agent.schemas.alert import AlertPayload, decode_alert
+from trading_agent.services.decision_engine import DecisionEngine, RiskState
+from trading_agent.services.persistence import _indicator_values
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+EXAMPLE = Path(__file__).resolve().parents[1] / "examples" / "webhook_buy.json"
+
+
+def _time(label: str, fn, count: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn()
+        best = min(best, (time.perf_counter() - start) / count * 1e6)
+    print(f"{label:<28} {best:8.2f} us/alert")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    body = EXAMPLE.read_bytes()
+    adapter = TypeAdapter(AlertPayload)
+    validation_engine = ValidationEngine(MarketContext(ema_fast=1710.0, ema_slow=1700.0, vwap=1705.0, atr_baseline=15.0))
+    decision_engine = DecisionEngine(Settings())
+    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+
+    def before() -> None:
+        alert = adapter.validate_json(body)
+        decision_engine.decide(alert, validation_engine.evaluate(alert), risk_state)
+        alert.indicators.model_dump()
+
+    def after() -> None:
+        alert = decode_alert(body)
+        decision_engine.decide(alert, validation_engine.evaluate(alert), risk_state)
+        _indicator_values(alert.indicators)
+
+    print("parse only")
+    parse_before = _time("  AlertPayload", lambda: adapter.validate_json(body), args.alerts)
+    parse_after = _time("  decode_alert", lambda: decode_alert(body), args.alerts)
+    print("parse + validate + decide + indicator serialization")
+    full_before = _time("  before", before, args.alerts)
+    full_after = _time("  after", after, args.alerts)
+    print(f"speedup: parse {parse_before / parse_after:.2f}x, hot path {full_before / full_after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare per-webhook write latency of the four-commit path against the single-transaction path.
+
+Usage::
+
+    python benchmarks/bench_persistence.py --alerts 500
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+
+from trading_agent.db.database import Base, get_engine  # noqa: E402
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload  # noqa: E402
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema  # noqa: E402
+from trading_agent.services.persistence import (  # noqa: E402
+    persist_alert,
+    persist_decision,
+    persist_order,
+    persist_pipeline,
+    persist_validation,
+)
+import trading_agent.models.entities  # noqa: E402,F401
+
+
+def _sample():
+    alert = AlertPayload(
+        symbol="ETH",
+        price=1725.5,
+        signal="buy",
+        timeframe="5m",
+        indicators=IndicatorPayload(RSI=28.4, MACD=0.002, EMA20=1701.3, ATR=18.2),
+    )
+    validation = ValidationResultSchema(valid=True, confidence=70, reasons=["RSI oversold"])
+    decision = TradeDecision(
+        action=Action.ENTER_LONG, symbol="ETH", order_type="market", size=0.27, stop_loss=1689.1, take_profit=1798.3, confidence=70
+    )
+    execution = ExecutionResult(success=True, order_id="paper-ETH-1", status="filled", executed_size=0.27)
+    return alert, validation, decision, execution
+
+
+def _four_commits(alert, validation, decision, execution) -> None:
+    alert_id = persist_alert(alert)
+    persist_validation(alert_id, validation)
+    decision_id = persist_decision(alert_id, decision)
+    persist_order(decision_id, execution)
+
+
+def _measure(fn, n: int) -> list[float]:
+    sample = _sample()
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(*sample)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<20} p50={statistics.median(ordered):7.3f}ms p99={p99:7.3f}ms mean={statistics.fmean(ordered):7.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=get_engine())
+    _report("four commits", _measure(_four_commits, args.alerts))
+    _report("single transaction", _measure(persist_pipeline, args.alerts))
+
+
+if __name__ == "__main__":
+    main()
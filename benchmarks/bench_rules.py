@@ -0,0 +1,63 @@
+"""Cost of rule-table validation per alert: default table, table with scoped A/B rules, and the array path.
+
+Usage::
+
+    python benchmarks/bench_rules.py --alerts 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from trading_agent.backtesting.vectorized import AlertColumns, evaluate_batch
+from trading_agent.schemas.alert import decode_alert
+from trading_agent.services.rules import DEFAULT_RULES, Outcome, Rule, RuleTable
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+EXAMPLE = Path(__file__).resolve().parents[1] / "examples" / "webhook_buy.json"
+
+
+def _time(label: str, fn, count: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn()
+        best = min(best, (time.perf_counter() - start) / count * 1e6)
+    print(f"{label:<28} {best:8.3f} us/alert")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    alert = decode_alert(EXAMPLE.read_bytes())
+    context = MarketContext(ema_fast=1710.0, ema_slow=1700.0, vwap=1705.0, atr_baseline=15.0)
+    candidate = Rule(
+        "rsi_candidate",
+        (Outcome("RSI deeply oversold", 30, lambda a, c: (a.rsi < 20) & a.buy), Outcome("RSI neutral")),
+        symbols=frozenset({alert.symbol}),
+    )
+    scoped = RuleTable(DEFAULT_RULES + (candidate,))
+
+    default_engine = ValidationEngine(context)
+    scoped_engine = ValidationEngine(context, rules=scoped)
+    verdict = default_engine.evaluate(alert)
+
+    print("live path")
+    _time("  default table", lambda: default_engine.evaluate(alert), args.alerts)
+    _time("  with scoped A/B rule", lambda: scoped_engine.evaluate(alert), args.alerts)
+    _time("  expand reasons", lambda: verdict.reasons, args.alerts)
+
+    columns = AlertColumns.from_payloads([alert] * args.alerts)
+    start = time.perf_counter()
+    evaluate_batch(columns, context)
+    print(f"array path                   {(time.perf_counter() - start) / args.alerts * 1e6:8.3f} us/alert")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure how parameter-sweep wall time scales with the number of worker processes.
+
+Usage::
+
+    python benchmarks/bench_sweep.py --alerts 1000000 --candidates 64
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from bench_backtest import synthetic_columns
+
+from trading_agent.backtesting.sweep import SweepParams, random_sample, run_sweep
+from trading_agent.services.validation_engine import MarketContext
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--candidates", type=int, default=64)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.alerts)
+    base = SweepParams(max_risk_per_trade=0.01, max_symbol_exposure=0.2, ema_slow=1400.0, vwap=1600.0, atr_baseline=150.0)
+    space = {
+        "max_risk_per_trade": [0.0025, 0.005, 0.01, 0.02],
+        "max_symbol_exposure": [0.1, 0.2, 0.3],
+        "confidence_cutoff": [40, 50, 60],
+        "validity_threshold": [30, 40, 50],
+    }
+    candidates = random_sample(base, space, args.candidates)
+
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        run_sweep(columns, candidates, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:8.3f}s speedup={baseline / elapsed:5.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
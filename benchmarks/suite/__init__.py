@@ -0,0 +1,20 @@
+"""Benchmark suite for cold start, the webhook pipeline, backtests and database writes.
+
+Every benchmark reports named metrics; a run is saved as JSON and can be compared against a
+stored baseline, flagging metrics that got worse by more than a tolerance, and against the
+absolute limits in ``budget.json``.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --tolerance 0.2
+    python -m benchmarks.suite --only webhook --concurrency 1,8,32 --requests 400
+"""
+import os
+import tempfile
+from pathlib import Path
+
+# Benchmarks write thousands of rows; keep them out of the development database
+_TMP = Path(tempfile.mkdtemp(prefix="bench-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'bench.db'}")
+os.environ.setdefault("AUDIT_LOG_PATH", str(_TMP / "audit.log"))
@@ -0,0 +1,87 @@
+"""Run the benchmark suite, save the results and check them against the budget and optionally a baseline."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.suite import backtest, database, startup, webhook
+from benchmarks.suite.results import (
+    Metric,
+    check_budget,
+    compare,
+    format_budget,
+    format_comparison,
+    format_metrics,
+    load_budget,
+    load_run,
+    save_run,
+)
+
+BENCHMARKS = ("startup", "webhook", "backtest", "db")
+BUDGET = Path(__file__).with_name("budget.json")
+
+
+def _ints(raw: str) -> List[int]:
+    return [int(value) for value in raw.split(",") if value]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/latest.json"))
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="fraction a metric may worsen before it is flagged")
+    parser.add_argument("--budget", type=Path, default=BUDGET, help="JSON of absolute limits per metric")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=_ints, default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="webhook requests per concurrency level")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--alerts", type=int, default=50_000, help="alerts per backtest")
+    parser.add_argument("--writes", type=int, default=1000, help="webhooks persisted by the db benchmark")
+    args = parser.parse_args(argv)
+
+    selected = set(args.only.split(","))
+    unknown = selected - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    metrics: Dict[str, Metric] = {}
+    if "startup" in selected:
+        metrics.update(startup.run())
+    if "webhook" in selected:
+        metrics.update(webhook.run(args.concurrency, args.requests, args.batch_size, args.seed))
+    if "backtest" in selected:
+        metrics.update(backtest.run(args.alerts, args.seed))
+    if "db" in selected:
+        metrics.update(database.run(args.writes, seed=args.seed))
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "budget")}
+    save_run(args.output, metrics, config)
+    print(format_metrics(metrics))
+    print(f"\nSaved {len(metrics)} metrics to {args.output}")
+
+    failed = False
+    checks = check_budget(metrics, load_budget(args.budget))
+    if checks:
+        print()
+        print(format_budget(checks))
+        over = [item for item in checks if item.exceeded]
+        if over:
+            print(f"\n{len(over)} metric(s) over budget")
+            failed = True
+
+    if args.baseline is not None:
+        comparisons = compare(metrics, load_run(args.baseline), args.tolerance)
+        print()
+        print(format_comparison(comparisons))
+        regressions = [item for item in comparisons if item.regressed]
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Backtest throughput: the scalar replay loop and the vectorized batch path over generated alerts."""
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+from benchmarks.suite.generators import AlertGenerator
+from benchmarks.suite.results import Metric, rate_metric
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.vectorized import AlertColumns
+from trading_agent.services.market_context import MarketContextProvider
+from trading_agent.services.validation_engine import MarketContext
+
+
+def _best_rate(fn, count: int, repeat: int) -> Metric:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return rate_metric(count, best, "alerts/s")
+
+
+def run(alerts: int = 50_000, seed: int = 0, repeat: int = 3) -> Dict[str, Metric]:
+    """Best-of-``repeat`` throughput, since single backtest runs vary by tens of percent."""
+    generated = AlertGenerator(seed).alerts(alerts)
+    context = MarketContext(ema_fast=1730.0, ema_slow=1720.0, vwap=1725.0, atr_baseline=18.0)
+    columns = AlertColumns.from_payloads(generated)
+    return {
+        "backtest.replay.throughput": _best_rate(
+            lambda: Backtester(context).run(generated, keep_trades=False), alerts, repeat
+        ),
+        "backtest.replay_live_context.throughput": _best_rate(
+            lambda: Backtester(context_provider=MarketContextProvider()).run(generated, keep_trades=False), alerts, repeat
+        ),
+        "backtest.batch.throughput": _best_rate(lambda: Backtester(context).run_batch(columns), alerts, repeat),
+    }
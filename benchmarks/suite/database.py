@@ -0,0 +1,53 @@
+"""Database write rate: one transaction per webhook and bulk batches of webhooks."""
+from __future__ import annotations
+
+import time
+from typing import Dict, List
+
+from benchmarks.suite.generators import AlertGenerator
+from benchmarks.suite.results import Metric, latency_metrics, rate_metric
+from trading_agent.db.database import create_schema
+from trading_agent.schemas.pipeline import ExecutionResult
+from trading_agent.services.decision_engine import DecisionEngine, RiskState
+from trading_agent.services.persistence import persist_pipeline, persist_pipeline_batch
+from trading_agent.services.pipeline import PipelineOutcome
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+
+def _outcomes(count: int, seed: int) -> List[PipelineOutcome]:
+    validation_engine = ValidationEngine(MarketContext(ema_fast=1730.0, ema_slow=1720.0, vwap=1725.0, atr_baseline=18.0))
+    decision_engine = DecisionEngine()
+    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+    outcomes = []
+    for index, alert in enumerate(AlertGenerator(seed).alerts(count)):
+        validation = validation_engine.evaluate(alert)
+        decision = decision_engine.decide(alert, validation, risk_state)
+        execution = ExecutionResult(
+            success=True, order_id=f"paper-{index}", status="filled", executed_size=decision.size
+        )
+        outcomes.append(PipelineOutcome(alert=alert, validation=validation, decision=decision, execution=execution))
+    return outcomes
+
+
+def run(writes: int = 1000, batch_size: int = 100, seed: int = 0) -> Dict[str, Metric]:
+    create_schema()
+    outcomes = _outcomes(writes * 2, seed)
+    metrics: Dict[str, Metric] = {}
+
+    samples = []
+    start = time.perf_counter()
+    for outcome in outcomes[:writes]:
+        began = time.perf_counter()
+        persist_pipeline(outcome.alert, outcome.validation, outcome.decision, outcome.execution)
+        samples.append((time.perf_counter() - began) * 1000)
+    metrics["db.persist_pipeline.throughput"] = rate_metric(writes, time.perf_counter() - start, "webhooks/s")
+    metrics.update(latency_metrics("db.persist_pipeline", samples))
+
+    batched = outcomes[writes:]
+    start = time.perf_counter()
+    for offset in range(0, len(batched), batch_size):
+        persist_pipeline_batch(batched[offset : offset + batch_size])
+    metrics[f"db.persist_pipeline_batch.b{batch_size}.throughput"] = rate_metric(
+        len(batched), time.perf_counter() - start, "webhooks/s"
+    )
+    return metrics
@@ -0,0 +1,86 @@
+"""Reproducible synthetic alerts shaped like the payloads in ``examples/webhook_*.json``."""
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+
+EXAMPLES = Path(__file__).resolve().parents[2] / "examples"
+START = datetime(2024, 1, 1)
+
+
+def load_templates(directory: Path = EXAMPLES) -> List[dict]:
+    templates = [json.loads(path.read_text()) for path in sorted(directory.glob("webhook_*.json"))]
+    if not templates:
+        raise FileNotFoundError(f"No webhook_*.json examples in {directory}")
+    return templates
+
+
+class AlertGenerator:
+    """Random-walk alert stream seeded from example payloads.
+
+    Each template symbol gets its own walk starting at the example's price, with RSI drifting
+    within 0-100, EMA20 following price and ATR jittering around the example's value. The same
+    ``seed`` always yields the same alerts, and every alert is distinct so the webhook's
+    duplicate detection never short-circuits a benchmark.
+    """
+
+    def __init__(self, seed: int = 0, templates: Optional[Sequence[dict]] = None, interval: timedelta = timedelta(minutes=1)):
+        self.seed = seed
+        self.templates = list(templates) if templates is not None else load_templates()
+        self.interval = interval
+
+    def payloads(self, count: int) -> List[dict]:
+        rng = random.Random(self.seed)
+        state: Dict[str, dict] = {
+            template["symbol"]: {
+                "price": template["price"],
+                "rsi": template["indicators"]["RSI"],
+                "ema": template["indicators"]["EMA20"],
+            }
+            for template in self.templates
+        }
+        payloads = []
+        for index in range(count):
+            template = self.templates[index % len(self.templates)]
+            walk = state[template["symbol"]]
+            base_atr = template["indicators"]["ATR"]
+            walk["price"] = max(walk["price"] + rng.gauss(0.0, base_atr * 0.25), base_atr)
+            walk["rsi"] = min(max(walk["rsi"] + rng.gauss(0.0, 4.0), 1.0), 99.0)
+            walk["ema"] += (walk["price"] - walk["ema"]) * (2 / 21)
+            payloads.append(
+                {
+                    "symbol": template["symbol"],
+                    "price": round(walk["price"], 2),
+                    "signal": rng.choice(("buy", "sell")),
+                    "timeframe": template["timeframe"],
+                    "indicators": {
+                        "RSI": round(walk["rsi"], 2),
+                        "MACD": round(rng.gauss(0.0, 0.002), 5),
+                        "EMA20": round(walk["ema"], 2),
+                        "ATR": round(base_atr * rng.uniform(0.6, 1.6), 3),
+                    },
+                    "timestamp": (START + index * self.interval).isoformat(),
+                }
+            )
+        return payloads
+
+    def bodies(self, count: int) -> List[bytes]:
+        return [json.dumps(payload).encode() for payload in self.payloads(count)]
+
+    def alerts(self, count: int) -> List[ParsedAlert]:
+        return [
+            ParsedAlert(
+                payload["symbol"],
+                payload["price"],
+                payload["signal"],
+                payload["timeframe"],
+                ParsedIndicators(**payload["indicators"]),
+                datetime.fromisoformat(payload["timestamp"]),
+            )
+            for payload in self.payloads(count)
+        ]
@@ -0,0 +1,127 @@
+"""Benchmark metrics, their JSON form and comparison against a baseline run or a budget."""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+LOWER = "lower"
+HIGHER = "higher"
+
+
+@dataclass
+class Metric:
+    value: float
+    unit: str
+    better: str  # LOWER or HIGHER
+
+
+def latency_metrics(prefix: str, samples_ms: Sequence[float]) -> Dict[str, Metric]:
+    ordered = sorted(samples_ms)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return {
+        f"{prefix}.p50_ms": Metric(statistics.median(ordered), "ms", LOWER),
+        f"{prefix}.p99_ms": Metric(p99, "ms", LOWER),
+    }
+
+
+def rate_metric(count: int, seconds: float, unit: str) -> Metric:
+    return Metric(count / seconds if seconds > 0 else float("inf"), unit, HIGHER)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def save_run(path: Path, metrics: Dict[str, Metric], config: dict) -> dict:
+    run = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "metrics": {name: asdict(metric) for name, metric in sorted(metrics.items())},
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(run, indent=2) + "\n")
+    return run
+
+
+def load_run(path: Path) -> Dict[str, Metric]:
+    return {name: Metric(**fields) for name, fields in json.loads(Path(path).read_text())["metrics"].items()}
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    change: float  # fractional change in the "worse" direction; positive means slower
+    regressed: bool
+
+
+def compare(current: Dict[str, Metric], baseline: Dict[str, Metric], tolerance: float) -> List[Comparison]:
+    """Compare metrics present in both runs; a metric regresses when it is worse by more than ``tolerance``."""
+    comparisons = []
+    for name in sorted(current.keys() & baseline.keys()):
+        now, before = current[name], baseline[name]
+        if before.value == 0:
+            continue
+        change = (now.value - before.value) / before.value
+        if now.better == HIGHER:
+            change = -change
+        comparisons.append(Comparison(name, before.value, now.value, change, change > tolerance))
+    return comparisons
+
+
+def load_budget(path: Path) -> Dict[str, float]:
+    """Limits per metric name: a ceiling for lower-is-better metrics, a floor for the others."""
+    return {name: float(limit) for name, limit in json.loads(Path(path).read_text()).items()}
+
+
+@dataclass
+class BudgetCheck:
+    name: str
+    limit: float
+    current: float
+    exceeded: bool
+
+
+def check_budget(current: Dict[str, Metric], budget: Dict[str, float]) -> List[BudgetCheck]:
+    """Check the metrics that have a budget; unlike :func:`compare` this needs no earlier run."""
+    checks = []
+    for name in sorted(current.keys() & budget.keys()):
+        metric, limit = current[name], budget[name]
+        exceeded = metric.value > limit if metric.better == LOWER else metric.value < limit
+        checks.append(BudgetCheck(name, limit, metric.value, exceeded))
+    return checks
+
+
+def format_metrics(metrics: Dict[str, Metric]) -> str:
+    return "\n".join(f"{name:<40} {metric.value:14.3f} {metric.unit}" for name, metric in sorted(metrics.items()))
+
+
+def format_comparison(comparisons: Sequence[Comparison]) -> str:
+    lines = [f"{'metric':<40} {'baseline':>14} {'current':>14} {'worse by':>9}"]
+    for item in comparisons:
+        flag = "  REGRESSION" if item.regressed else ""
+        lines.append(f"{item.name:<40} {item.baseline:14.3f} {item.current:14.3f} {item.change:8.1%}{flag}")
+    return "\n".join(lines)
+
+
+def format_budget(checks: Sequence[BudgetCheck]) -> str:
+    lines = [f"{'metric':<40} {'budget':>14} {'current':>14}"]
+    for item in checks:
+        flag = "  OVER BUDGET" if item.exceeded else ""
+        lines.append(f"{item.name:<40} {item.limit:14.3f} {item.current:14.3f}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+"""Cold start: how long importing the app takes and how long a fresh server needs to answer.
+
+Both are measured in new interpreters, since in this process everything is imported already.
+Run as a module for the slowest imports behind the first number::
+
+    python -m benchmarks.suite.startup
+"""
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.suite.results import LOWER, Metric
+
+APP_MODULE = "trading_agent.api.main"
+
+
+def _importtime(module: str) -> List[Tuple[str, int, int]]:
+    """``(module, self_us, cumulative_us)`` for every import, from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_ms(module: str = APP_MODULE, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        cumulative = next(total for name, _, total in _importtime(module) if name == module)
+        best = min(best, cumulative / 1000)
+    return best
+
+
+def slowest_imports(module: str = APP_MODULE, top: int = 15) -> List[Tuple[str, float]]:
+    """Top-level packages pulled in by ``module``, by total milliseconds spent importing them."""
+    totals: Dict[str, float] = {}
+    for name, self_us, _ in _importtime(module):
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_us / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response_ms(repeat: int = 3, timeout: float = 30.0) -> float:
+    """Best time from spawning ``uvicorn`` to the first ``GET /health`` answer, schema already migrated."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{workdir / 'startup.db'}",
+        "AUDIT_LOG_PATH": str(workdir / "audit.log"),
+        "AUTO_CREATE_SCHEMA": "false",
+    }
+    subprocess.run([sys.executable, "-m", "trading_agent.migrate", "--log-level", "warning"], env=env, check=True)
+
+    best = float("inf")
+    for _ in range(repeat):
+        port = _free_port()
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{APP_MODULE}:app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            while True:
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode} before answering")
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"no response within {timeout:.0f}s")
+                time.sleep(0.005)
+            best = min(best, (time.perf_counter() - start) * 1000)
+        finally:
+            server.terminate()
+            server.wait()
+    return best
+
+
+def run(repeat: int = 3) -> Dict[str, Metric]:
+    """Best-of-``repeat`` import time of the app module and time to first response."""
+    return {
+        "startup.import_ms": Metric(import_ms(repeat=repeat), "ms", LOWER),
+        "startup.first_response_ms": Metric(first_response_ms(repeat=repeat), "ms", LOWER),
+    }
+
+
+if __name__ == "__main__":
+    for package, milliseconds in slowest_imports():
+        print(f"{package:<30} {milliseconds:9.1f} ms")
@@ -0,0 +1,73 @@
+"""In-process load test of ``POST /webhook`` and ``POST /webhook/batch`` over ASGI.
+
+Requests go through the full app (parsing, idempotency, micro-batching, pipeline and the
+SQLite write) without a socket, so the numbers isolate the application from the network.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Sequence
+
+import httpx
+
+from benchmarks.suite.generators import AlertGenerator
+from benchmarks.suite.results import Metric, latency_metrics, rate_metric
+from trading_agent.migrate import migrate
+
+HEADERS = {"Content-Type": "application/json"}
+
+
+async def _drive(client: httpx.AsyncClient, path: str, bodies: Sequence[bytes], concurrency: int) -> tuple[List[float], float]:
+    queue = iter(bodies)
+    samples: List[float] = []
+
+    async def worker() -> None:
+        for body in queue:
+            start = time.perf_counter()
+            response = await client.post(path, content=body, headers=HEADERS)
+            samples.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def _run(concurrency_levels: Sequence[int], requests: int, batch_size: int, seed: int) -> Dict[str, Metric]:
+    from trading_agent.api.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+    generator = AlertGenerator(seed)
+    payloads = generator.payloads(requests * (len(concurrency_levels) + 1) + batch_size * 20)
+    bodies = [json.dumps(payload).encode() for payload in payloads]
+    metrics: Dict[str, Metric] = {}
+
+    migrate()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            # Warm up imports, pools and caches outside the measured runs
+            offset = 20
+            await _drive(client, "/webhook", bodies[:offset], 1)
+            for concurrency in concurrency_levels:
+                chunk = bodies[offset : offset + requests]
+                offset += requests
+                samples, elapsed = await _drive(client, "/webhook", chunk, concurrency)
+                metrics.update(latency_metrics(f"webhook.c{concurrency}", samples))
+                metrics[f"webhook.c{concurrency}.throughput"] = rate_metric(len(chunk), elapsed, "req/s")
+
+            batches = [
+                json.dumps(payloads[start : start + batch_size]).encode()
+                for start in range(offset, offset + batch_size * 20, batch_size)
+            ]
+            samples, elapsed = await _drive(client, "/webhook/batch", batches, 1)
+            metrics.update(latency_metrics(f"webhook_batch.b{batch_size}", samples))
+            metrics[f"webhook_batch.b{batch_size}.throughput"] = rate_metric(batch_size * len(batches), elapsed, "alerts/s")
+    return metrics
+
+
+def run(concurrency_levels: Sequence[int] = (1, 4, 16, 64), requests: int = 500, batch_size: int = 50, seed: int = 0) -> Dict[str, Metric]:
+    """p50/p99 latency and throughput of single-alert webhooks at each concurrency, plus bulk posts."""
+    return asyncio.run(_run(concurrency_levels, requests, batch_size, seed))
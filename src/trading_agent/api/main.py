@@ -1,54 +1,421 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from trading_agent.db.database import Base, get_engine
-from trading_agent.schemas.alert import AlertPayload
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+
+from trading_agent.backtesting.sources import stream_stored_alerts
+from trading_agent.config.settings import get_settings
+from trading_agent.db.database import create_schema, session_scope
+from trading_agent.schemas.alert import AlertPayload, ParsedAlert, decode_alert, decode_alerts, encode_alerts
+from trading_agent.schemas.lineage import AlertLineage, DecisionRecord
 from trading_agent.schemas.pipeline import ExecutionResult
-from trading_agent.services.decision_engine import DecisionEngine, RiskState
+from trading_agent.schemas.reports import DailyPerformance, PerformanceTotals
+from trading_agent.services.audit_log import AuditWriter
+from trading_agent.services.batching import MicroBatcher
+from trading_agent.services.decision_engine import DecisionCache, DecisionEngine
 from trading_agent.services.execution_engine import ExecutionEngine
+from trading_agent.services.idempotency import (
+    ALERT_ID_HEADER,
+    IdempotencyCache,
+    find_executions_async,
+    idempotency_key,
+)
+from trading_agent.services.lineage import get_alert_lineage, list_decisions
+from trading_agent.services.market_context import MarketContextProvider
+from trading_agent.services.metrics import CONTENT_TYPE, DUPLICATE_ALERTS, REGISTRY, STAGE_LATENCY, merge_expositions
+from trading_agent.services.order_dispatch import OrderDispatcher, OrderStatusUpdate
 from trading_agent.services.persistence import (
-    persist_alert,
-    persist_decision,
-    persist_order,
-    persist_validation,
+    audit_record,
+    persist_alerts_async,
+    persist_pipeline_batch_async,
+    shutdown_persistence_executor,
+    update_order_status_async,
 )
-from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+from trading_agent.services.pipeline import TradingPipeline
+from trading_agent.services.risk_book import RiskBook
+from trading_agent.services.rollups import daily_rollups, symbol_totals
+from trading_agent.services.sharding import FORWARDED_HEADER, ShardRouter, WorkerUnavailable
+from trading_agent.services.validation_engine import ValidationEngine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Deterministic Trading Agent")
+_PARSE_LATENCY = STAGE_LATENCY.labels("parse")
+_WEBHOOK_LATENCY = STAGE_LATENCY.labels("webhook")
+_CACHED_DUPLICATES = DUPLICATE_ALERTS.labels("cache")
+_STORED_DUPLICATES = DUPLICATE_ALERTS.labels("database")
+
+KeyedAlert = Tuple[ParsedAlert, str]
+
+
+class PersistenceError(RuntimeError):
+    pass
+
+
+def _parse_body(body: bytes, decoder: Callable[[bytes], Any]) -> Any:
+    # Parsing is done here rather than by FastAPI so its cost shows up as its own stage, and
+    # into slotted alerts so no pydantic model is built until the response
+    start = time.perf_counter()
+    try:
+        return decoder(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False)) from exc
+    finally:
+        _PARSE_LATENCY.observe(time.perf_counter() - start)
+
+
+def _inline_refs(schema: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref is not None:
+            return _inline_refs(defs[ref.rsplit("/", 1)[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_refs(item, defs) for item in schema]
+    return schema
+
+
+def _json_body(model: Any, many: bool = False) -> Dict[str, Any]:
+    """``openapi_extra`` documenting a JSON body the route parses itself, with nested models inlined."""
+    schema = model.model_json_schema()
+    schema = _inline_refs(schema, schema.pop("$defs", {}))
+    if many:
+        schema = {"type": "array", "items": schema, "title": f"{schema['title']} batch"}
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+async def _build_pipeline(app: FastAPI) -> None:
+    settings = get_settings()
+    # Tables normally come from `python -m trading_agent.migrate`; this is a convenience for development
+    if settings.auto_create_schema:
+        create_schema()
+
+    # Audit rows left uncommitted by a crash go in first: the risk book is rebuilt from them
+    app.state.audit = audit = AuditWriter.from_settings(settings)
+    if audit is not None:
+        audit.recover()
+        await audit.start()
+
+    provider = MarketContextProvider()
+    since = datetime.utcnow() - timedelta(days=settings.context_seed_days)
+    seeded = provider.seed_from_alerts(stream_stored_alerts(start=since))
+    logger.info("Seeded market context from %d stored alerts", seeded)
 
-# Create tables at startup
-Base.metadata.create_all(bind=get_engine())
+    risk_book = RiskBook(account_equity=settings.account_equity)
+    with session_scope() as session:
+        risk_book.hydrate(session)
 
+    app.state.dispatcher = None
+    if not settings.paper_trading and settings.exchange_base_url:
+        app.state.dispatcher = OrderDispatcher.from_settings(settings, on_status=_on_order_status)
 
-@app.post("/webhook", response_model=ExecutionResult)
-async def handle_webhook(alert: AlertPayload) -> ExecutionResult:
+    app.state.candles = app.state.market_feed = None
+    if settings.market_data_feed:
+        # numpy and the aggregator are only loaded when there is a feed to aggregate
+        from trading_agent.services.candles import CandleAggregator
+        from trading_agent.services.market_feed import consume_socket, parse_address
+
+        app.state.candles = CandleAggregator(settings.candle_timeframes.split(","), capacity=settings.candle_capacity)
+        app.state.market_feed = asyncio.create_task(
+            consume_socket(app.state.candles, *parse_address(settings.market_data_feed)), name="market-data-feed"
+        )
+
+    model = None
+    if settings.confidence_model_path:
+        # Loaded once here; XGBoost is only imported when a model is configured
+        from trading_agent.services.confidence_model import ConfidenceModel
+
+        model = ConfidenceModel.load(settings.confidence_model_path)
+        logger.info("Scoring alert confidence with %s", settings.confidence_model_path)
+
+    # Engines are stateless across alerts, so one instance of each serves every request
+    app.state.pipeline = TradingPipeline(
+        validation_engine=ValidationEngine(indicators=app.state.candles, model=model),
+        decision_engine=DecisionEngine(cache=DecisionCache.from_settings(settings)),
+        execution_engine=ExecutionEngine(dispatcher=app.state.dispatcher),
+        context_provider=provider,
+        risk_book=risk_book,
+    )
+
+    app.state.router = ShardRouter.from_settings(settings)
+    app.state.idempotency = IdempotencyCache(settings.idempotency_cache_size, settings.idempotency_ttl_seconds)
+
+    app.state.batcher = None
+    if settings.webhook_batch_window_ms > 0:
+        app.state.batcher = MicroBatcher(
+            _process_alerts, window=settings.webhook_batch_window_ms / 1000, max_size=settings.webhook_batch_max_size
+        )
+        await app.state.batcher.start()
+
+
+async def _shutdown_pipeline(app: FastAPI) -> None:
+    if app.state.market_feed is not None:
+        app.state.market_feed.cancel()
+        await asyncio.gather(app.state.market_feed, return_exceptions=True)
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    if app.state.dispatcher is not None:
+        await app.state.dispatcher.close()
+    if app.state.audit is not None:
+        await app.state.audit.close()
+    if app.state.router is not None:
+        await app.state.router.aclose()
+    shutdown_persistence_executor()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Importing this module only defines routes; the engine, context and engines are built here
+    await _build_pipeline(app)
     try:
-        alert_id = persist_alert(alert)
+        yield
+    finally:
+        await _shutdown_pipeline(app)
+
+
+app = FastAPI(title="Deterministic Trading Agent", lifespan=lifespan)
+
+
+async def _on_order_status(status_update: OrderStatusUpdate) -> None:
+    # A cancelled, rejected or partial fill frees the exposure its order reserved
+    app.state.pipeline.risk_book.settle_order(
+        status_update.client_order_id, status_update.status, status_update.filled_size
+    )
+    # Statuses go through the audit writer so they are applied after their order row
+    audit: Optional[AuditWriter] = app.state.audit
+    await (audit.submit_status if audit is not None else update_order_status_async)(status_update)
+
+
+async def _process_alerts(items: List[KeyedAlert]) -> List[ExecutionResult]:
+    try:
+        # Duplicates of alerts stored before a restart or by another worker are answered from the database
+        results: Dict[str, ExecutionResult] = await find_executions_async({key for _, key in items})
+    except Exception as exc:
+        logger.exception("Failed to look up idempotency keys")
+        raise PersistenceError("Could not persist alert") from exc
+    stored = sum(1 for _, key in items if key in results)
+    if stored:
+        _STORED_DUPLICATES.inc(stored)
+
+    fresh: Dict[str, ParsedAlert] = {}
+    for alert, key in items:
+        if key not in results:
+            fresh.setdefault(key, alert)
+    pipeline: TradingPipeline = app.state.pipeline
+    outcomes = pipeline.process_batch(list(fresh.values()))
+    audit: Optional[AuditWriter] = app.state.audit
+    # Rows are bulk-inserted in one transaction off the event loop; with write-behind auditing
+    # only the alert rows are, and the rest is logged for the audit writer to commit after the response
+    try:
+        if audit is None:
+            await persist_pipeline_batch_async(outcomes, list(fresh))
+        else:
+            records: List[Dict[str, Any]] = []
+
+            def log_records(alert_ids: List[int]) -> None:
+                # Logged before the alerts commit: a crash can never leave an alert without its record
+                records.extend(
+                    audit_record(alert_id, outcome, idempotency_key=key)
+                    for alert_id, outcome, key in zip(alert_ids, outcomes, fresh)
+                )
+                audit.log(records)
+
+            await persist_alerts_async([outcome.alert for outcome in outcomes], list(fresh), before_commit=log_records)
+            await audit.submit(records, logged=True)
     except Exception as exc:
-        logger.exception("Failed to persist alert")
-        raise HTTPException(status_code=500, detail="Could not persist alert") from exc
+        pipeline.discard(outcomes)
+        logger.exception("Failed to persist %d alerts", len(outcomes))
+        raise PersistenceError("Could not persist alert") from exc
+    # Live orders leave only once their rows are committed or, with write-behind auditing, logged
+    # and queued. In that mode the order row may still be in the writer's queue when the
+    # exchange answers. The status then goes through the same queue behind it, and one that
+    # still finds no row is retried with later batches.
+    for status_update in pipeline.dispatch(outcomes):
+        await _on_order_status(status_update)
+    results.update(zip(fresh, (outcome.execution for outcome in outcomes)))
+    return [results[key] for _, key in items]
+
+
+async def _run_deduplicated(
+    items: List[KeyedAlert], run: Callable[[List[KeyedAlert]], Awaitable[List[ExecutionResult]]]
+) -> List[ExecutionResult]:
+    """Run only the alerts whose key is not already cached or in flight; duplicates share the result."""
+    cache: IdempotencyCache = app.state.idempotency
+    claims = [cache.claim(key) for _, key in items]
+    owned = [(item, future) for item, (future, owner) in zip(items, claims) if owner]
+    if len(owned) < len(items):
+        _CACHED_DUPLICATES.inc(len(items) - len(owned))
+    if owned:
+        try:
+            results = await run([item for item, _ in owned])
+        except BaseException as exc:
+            for (_, key), future in owned:
+                cache.fail(key, future, exc)
+            raise
+        for (_, future), result in zip(owned, results):
+            cache.complete(future, result)
+    return list(await asyncio.gather(*(asyncio.shield(future) for future, _ in claims)))
+
+
+async def _submit_to_batcher(items: List[KeyedAlert]) -> List[ExecutionResult]:
+    batcher = app.state.batcher
+    if batcher is None:
+        return await _process_alerts(items)
+    return list(await asyncio.gather(*(batcher.submit(item) for item in items)))
+
+
+def _router_for(request: Request) -> Optional[ShardRouter]:
+    # Forwarded requests were already routed by their receiving worker
+    return None if FORWARDED_HEADER in request.headers else request.app.state.router
+
+
+async def _forward(router: ShardRouter, worker: int, path: str, body: bytes, request: Request) -> Tuple[int, bytes]:
+    headers = {ALERT_ID_HEADER: request.headers[ALERT_ID_HEADER]} if ALERT_ID_HEADER in request.headers else {}
+    try:
+        return await router.forward(worker, path, body, headers)
+    except WorkerUnavailable as exc:
+        logger.warning("Worker %d is unreachable: %s", worker, exc.__cause__)
+        raise
+
+
+@app.post("/webhook", response_model=ExecutionResult, openapi_extra=_json_body(AlertPayload))
+async def handle_webhook(request: Request) -> ExecutionResult:
+    start = time.perf_counter()
+    body = await request.body()
+    alert = _parse_body(body, decode_alert)
+    router = _router_for(request)
+    if router is not None and not router.is_local(alert.symbol):
+        try:
+            status, content = await _forward(router, router.owner(alert.symbol), "/webhook", body, request)
+            return Response(content=content, status_code=status, media_type="application/json")
+        except WorkerUnavailable as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        finally:
+            _WEBHOOK_LATENCY.observe(time.perf_counter() - start)
+    key = idempotency_key(alert, request.headers.get(ALERT_ID_HEADER))
+    try:
+        return (await _run_deduplicated([(alert, key)], _submit_to_batcher))[0]
+    except PersistenceError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    finally:
+        _WEBHOOK_LATENCY.observe(time.perf_counter() - start)
+
+
+@app.post("/webhook/batch", response_model=List[ExecutionResult], openapi_extra=_json_body(AlertPayload, many=True))
+async def handle_webhook_batch(request: Request) -> List[ExecutionResult]:
+    alerts = _parse_body(await request.body(), decode_alerts)
+    router = _router_for(request)
+    groups = router.partition([alert.symbol for alert in alerts]) if router is not None else {}
+    local = groups.pop(router.worker_index, []) if router is not None else list(range(len(alerts)))
+
+    async def run_local() -> List[ExecutionResult]:
+        items = [(alerts[i], idempotency_key(alerts[i])) for i in local]
+        try:
+            return await _run_deduplicated(items, _process_alerts)
+        except PersistenceError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    if not groups:
+        return await run_local()
+
+    async def run_remote(worker: int, positions: List[int]) -> List[ExecutionResult]:
+        # A share that fails is answered per alert, keeping the results of the shares that
+        # committed; resending the failed alerts (or the whole batch) is safe, as alerts are deduplicated
+        try:
+            status, content = await _forward(
+                router, worker, "/webhook/batch", encode_alerts([alerts[i] for i in positions]), request
+            )
+        except WorkerUnavailable as exc:
+            error = str(exc)
+        else:
+            if status == 200:
+                return [ExecutionResult.model_validate(result) for result in json.loads(content)]
+            error = f"Worker {worker} answered {status}: {content.decode(errors='replace')}"
+        failed = ExecutionResult(success=False, order_id=None, status="failed", executed_size=0.0, error=error)
+        return [failed] * len(positions)
+
+    # Each owner gets its share as one forwarded batch; all shares run concurrently
+    local_results, *remote = await asyncio.gather(
+        run_local(), *(run_remote(worker, positions) for worker, positions in groups.items())
+    )
+    results: List[Optional[ExecutionResult]] = [None] * len(alerts)
+    for positions, shard in zip([local, *groups.values()], [local_results, *remote]):
+        for i, result in zip(positions, shard):
+            results[i] = result
+    return results
+
+
+@app.get("/alerts/{alert_id}/lineage", response_model=AlertLineage)
+def alert_lineage(alert_id: int) -> AlertLineage:
+    with session_scope() as session:
+        alert = get_alert_lineage(session, alert_id)
+        if alert is None:
+            raise HTTPException(status_code=404, detail="Alert not found")
+        return AlertLineage.model_validate(alert)
+
+
+@app.get("/decisions", response_model=List[DecisionRecord])
+def decisions(
+    symbol: str, start: Optional[datetime] = None, end: Optional[datetime] = None, limit: int = 1000
+) -> List[DecisionRecord]:
+    with session_scope() as session:
+        return [DecisionRecord.model_validate(d) for d in list_decisions(session, symbol, start, end, limit)]
+
+
+@app.get("/reports/daily", response_model=List[DailyPerformance])
+def daily_report(
+    symbol: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    timeframe: Optional[str] = None,
+    limit: int = 1000,
+) -> List[DailyPerformance]:
+    """Per-day performance from the rollup table; ``start`` and ``end`` are inclusive UTC days."""
+    with session_scope() as session:
+        return [
+            DailyPerformance.model_validate(row)
+            for row in daily_rollups(session, symbol, start, end, timeframe, limit)
+        ]
+
 
-    # For demo purposes, context values are placeholders; in production they'd come from market data feeds
-    context = MarketContext(ema_fast=alert.indicators.EMA20, ema_slow=alert.indicators.EMA20 * 0.99, vwap=alert.price * 0.995, atr_baseline=alert.indicators.ATR)
-    validator = ValidationEngine(context)
-    validation = validator.evaluate(alert)
-    persist_validation(alert_id, validation)
+@app.get("/reports/symbols", response_model=List[PerformanceTotals])
+def symbol_report(
+    start: Optional[date] = None, end: Optional[date] = None, timeframe: Optional[str] = None
+) -> List[PerformanceTotals]:
+    with session_scope() as session:
+        return [PerformanceTotals.model_validate(row) for row in symbol_totals(session, start, end, timeframe)]
 
-    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
-    decision_engine = DecisionEngine()
-    decision = decision_engine.decide(alert, validation, risk_state)
-    decision_id = persist_decision(alert_id, decision)
 
-    execution_engine = ExecutionEngine()
-    execution = execution_engine.execute(decision)
-    persist_order(decision_id, execution)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request) -> PlainTextResponse:
+    """This process's metrics; with several workers, every reachable worker's, labelled by ``worker``."""
+    if request.app.state.router is None:
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+    local = REGISTRY.render({"worker": str(request.app.state.router.worker_index)})
+    router = _router_for(request)
+    if router is None:  # a peer collecting this worker's share
+        return PlainTextResponse(local, media_type=CONTENT_TYPE)
 
-    return execution
+    peers = [worker for worker in range(router.worker_count) if worker != router.worker_index]
+    responses = await asyncio.gather(*(router.fetch(worker, "/metrics") for worker in peers), return_exceptions=True)
+    texts = [local]
+    for worker, response in zip(peers, responses):
+        # A missing worker leaves a gap in its own series rather than failing the whole scrape
+        if isinstance(response, BaseException) or response[0] != 200:
+            logger.warning("Metrics of worker %d are unavailable: %s", worker, response)
+            continue
+        texts.append(response[1].decode())
+    return PlainTextResponse(merge_expositions(texts), media_type=CONTENT_TYPE)
 
 
 @app.get("/health")
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from trading_agent.schemas.pipeline import Action, TradeDecision
+from trading_agent.services.market_context import Candle, read_candle_file
+
+EXIT_STOP = "stop_loss"
+EXIT_TARGET = "take_profit"
+EXIT_TIMEOUT = "timeout"
+EXIT_END_OF_DATA = "end_of_data"
+
+
+def epoch_seconds(moment: datetime) -> int:
+    """Seconds since the epoch, treating naive datetimes as UTC like the rest of the project."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+@dataclass
+class CandleSeries:
+    """OHLC bars for one symbol as parallel arrays sorted by bar open time (epoch seconds)."""
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Candle]) -> "CandleSeries":
+        rows = sorted((epoch_seconds(c.timestamp), c.open, c.high, c.low, c.close) for c in candles)
+        if not rows:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(np.empty(0, dtype=np.int64), empty, empty, empty, empty)
+        timestamp, open_, high, low, close = zip(*rows)
+        return cls(
+            timestamp=np.asarray(timestamp, dtype=np.int64),
+            open=np.asarray(open_, dtype=np.float64),
+            high=np.asarray(high, dtype=np.float64),
+            low=np.asarray(low, dtype=np.float64),
+            close=np.asarray(close, dtype=np.float64),
+        )
+
+    def first_bar_at_or_after(self, moment: int) -> int:
+        """Offset of the first bar opening at or after ``moment``, by binary search."""
+        return int(np.searchsorted(self.timestamp, moment, side="left"))
+
+    def bar_end(self, index: int) -> int:
+        """When bar ``index`` closes: the next bar's open, or for the last bar its open plus the spacing before it.
+
+        A gap in the data makes this late, never early, so nothing at the bar's close is seen too soon.
+        """
+        if index + 1 < len(self.timestamp):
+            return int(self.timestamp[index + 1])
+        if index > 0:
+            return int(2 * self.timestamp[index] - self.timestamp[index - 1])
+        return int(self.timestamp[index])
+
+
+class CandleBook:
+    """Candle series keyed by symbol, loaded from one CSV with a ``symbol`` column or one file per symbol."""
+
+    def __init__(self, series: Optional[Dict[str, CandleSeries]] = None):
+        self.series: Dict[str, CandleSeries] = dict(series or {})
+
+    def __getitem__(self, symbol: str) -> CandleSeries:
+        return self.series[symbol]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.series
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "CandleBook":
+        """Read ``symbol,timestamp,open,high,low,close[,volume]`` rows (ISO-8601 timestamps)."""
+        grouped: Dict[str, list] = {}
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                grouped.setdefault(row["symbol"], []).append(
+                    Candle(
+                        timestamp=datetime.fromisoformat(row["timestamp"]),
+                        open=float(row["open"]),
+                        high=float(row["high"]),
+                        low=float(row["low"]),
+                        close=float(row["close"]),
+                        volume=float(row.get("volume") or 0.0),
+                    )
+                )
+        return cls({symbol: CandleSeries.from_candles(candles) for symbol, candles in grouped.items()})
+
+    @classmethod
+    def from_files(cls, paths: Dict[str, Path]) -> "CandleBook":
+        """Load one :func:`read_candle_file` CSV per symbol."""
+        return cls({symbol: CandleSeries.from_candles(read_candle_file(path)) for symbol, path in paths.items()})
+
+
+@dataclass(frozen=True)
+class TradeFill:
+    symbol: str
+    direction: int  # +1 long, -1 short
+    size: float
+    entry_time: int
+    entry_price: float
+    exit_time: int  # close of the exit bar
+    exit_price: float
+    exit_reason: str
+    fees: float
+    pnl: float
+
+
+class FillSimulator:
+    """Resolves entries against the candles that follow them.
+
+    Bars are scanned forward from the first bar at or after the entry in growing chunks, so a
+    trade that exits quickly touches only a few bars. When a single bar spans both the stop and
+    the target, the stop is assumed to have been hit first. A bar that gaps through a level
+    fills at its open. Slippage is applied to the entry and to stop and timeout exits;
+    take-profit exits are limit fills. Fees are charged on both sides' notional.
+    """
+
+    def __init__(
+        self,
+        candles: CandleBook,
+        slippage_bps: float = 0.0,
+        fee_bps: float = 0.0,
+        max_holding_bars: Optional[int] = None,
+        initial_chunk: int = 64,
+    ):
+        self.candles = candles
+        self.slippage = slippage_bps / 10_000
+        self.fee_rate = fee_bps / 10_000
+        self.max_holding_bars = max_holding_bars
+        self.initial_chunk = initial_chunk
+
+    def fill(self, decision: TradeDecision, entry_time: datetime, entry_price: float) -> TradeFill:
+        if decision.action == Action.IGNORE:
+            raise ValueError("Ignored decisions have nothing to fill")
+        direction = 1 if decision.action == Action.ENTER_LONG else -1
+        return self.resolve(
+            decision.symbol,
+            direction,
+            decision.size,
+            epoch_seconds(entry_time),
+            entry_price,
+            decision.stop_loss,
+            decision.take_profit,
+        )
+
+    def resolve(
+        self,
+        symbol: str,
+        direction: int,
+        size: float,
+        entry_time: int,
+        entry_price: float,
+        stop: float,
+        target: float,
+    ) -> TradeFill:
+        series = self.candles[symbol]
+        entry_fill = entry_price * (1 + direction * self.slippage)
+        start = series.first_bar_at_or_after(entry_time)
+        end = len(series) if self.max_holding_bars is None else min(len(series), start + self.max_holding_bars)
+
+        exit_index, exit_price, reason = None, None, None
+        position, chunk = start, self.initial_chunk
+        while position < end:
+            stop_at = min(position + chunk, end)
+            low = series.low[position:stop_at]
+            high = series.high[position:stop_at]
+            if direction > 0:
+                stop_hit, target_hit = low <= stop, high >= target
+            else:
+                stop_hit, target_hit = high >= stop, low <= target
+            hits = stop_hit | target_hit
+            if hits.any():
+                offset = int(np.argmax(hits))
+                exit_index = position + offset
+                bar_open = series.open[exit_index]
+                if stop_hit[offset]:
+                    gapped = bar_open < stop if direction > 0 else bar_open > stop
+                    level = bar_open if gapped else stop
+                    exit_price, reason = level * (1 - direction * self.slippage), EXIT_STOP
+                else:
+                    gapped = bar_open > target if direction > 0 else bar_open < target
+                    exit_price, reason = (bar_open if gapped else target), EXIT_TARGET
+                break
+            position, chunk = stop_at, chunk * 2
+
+        if exit_index is None:
+            if end > start:
+                exit_index = end - 1
+                exit_price = series.close[exit_index] * (1 - direction * self.slippage)
+                reason = EXIT_TIMEOUT if end < len(series) else EXIT_END_OF_DATA
+            else:
+                exit_index, exit_price, reason = None, entry_fill, EXIT_END_OF_DATA
+
+        # Where in the bar a level was touched is unknown, so the exit is only known at its close
+        exit_time = series.bar_end(exit_index) if exit_index is not None else entry_time
+        fees = self.fee_rate * size * (entry_fill + exit_price)
+        pnl = direction * (exit_price - entry_fill) * size - fees
+        return TradeFill(
+            symbol=symbol,
+            direction=direction,
+            size=size,
+            entry_time=entry_time,
+            entry_price=entry_fill,
+            exit_time=exit_time,
+            exit_price=float(exit_price),
+            exit_reason=reason,
+            fees=float(fees),
+            pnl=float(pnl),
+        )
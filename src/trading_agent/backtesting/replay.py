@@ -1,46 +1,206 @@
 from __future__ import annotations
 
+import heapq
+from contextlib import ExitStack
 from dataclasses import dataclass
-from typing import Iterable, List
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Union
 
+from trading_agent.backtesting.fills import FillSimulator, TradeFill, epoch_seconds
+from trading_agent.backtesting.vectorized import (
+    AlertColumns,
+    BatchBacktestResult,
+    decide_batch,
+    evaluate_batch,
+    summarize_batch,
+)
+from trading_agent.config.settings import Settings
 from trading_agent.schemas.alert import AlertPayload
-from trading_agent.schemas.pipeline import TradeDecision
-from trading_agent.services.decision_engine import DecisionEngine, RiskState
-from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+from trading_agent.schemas.pipeline import ExecutionResult, TradeDecision
+from trading_agent.services.decision_engine import DEFAULT_CONFIDENCE_CUTOFF, DecisionCache, DecisionEngine, RiskState
+from trading_agent.services.market_context import MarketContextProvider
+from trading_agent.services.risk_book import RiskBook
+from trading_agent.services.rules import Rule, RuleTable
+from trading_agent.services.validation_engine import DEFAULT_VALIDITY_THRESHOLD, MarketContext, ValidationEngine
+
+if TYPE_CHECKING:
+    from trading_agent.services.confidence_model import ConfidenceModel
 
 
 @dataclass
 class BacktestResult:
     net_pl: float
-    trades: List[TradeDecision]
+    trades: Optional[List[TradeDecision]]  # None when the run was asked not to keep decisions in memory
     win_rate: float
     expectancy: float
+    total_alerts: int = 0
+    trade_log: Optional[Path] = None
+    fills: Optional[List[TradeFill]] = None  # set when a FillSimulator resolved the trades
+    trade_pnl: Optional[List[float]] = None  # realized P&L of each entered trade, kept with the trades
 
 
 class Backtester:
-    def __init__(self, context: MarketContext):
+    def __init__(
+        self,
+        context: Optional[MarketContext] = None,
+        settings: Optional[Settings] = None,
+        validity_threshold: int = DEFAULT_VALIDITY_THRESHOLD,
+        confidence_cutoff: int = DEFAULT_CONFIDENCE_CUTOFF,
+        context_provider: Optional[MarketContextProvider] = None,
+        fill_simulator: Optional[FillSimulator] = None,
+        rules: Optional[Union[Sequence[Rule], RuleTable]] = None,
+        decision_cache: Optional[DecisionCache] = None,
+        confidence_model: Optional["ConfidenceModel"] = None,
+    ):
+        if context is None and context_provider is None:
+            raise ValueError("Backtester needs a MarketContext or a MarketContextProvider")
         self.context = context
-        self.validation_engine = ValidationEngine(context)
-        self.decision_engine = DecisionEngine()
+        self.context_provider = context_provider
+        self.fill_simulator = fill_simulator
+        self.validation_engine = ValidationEngine(
+            context, validity_threshold=validity_threshold, rules=rules, model=confidence_model
+        )
+        self.decision_engine = DecisionEngine(settings, confidence_cutoff=confidence_cutoff, cache=decision_cache)
+
+    def run(
+        self,
+        alerts: Iterable[AlertPayload],
+        keep_trades: bool = True,
+        trade_log: Optional[Path] = None,
+    ) -> BacktestResult:
+        """Replay ``alerts`` through validation and decision.
 
-    def run(self, alerts: Iterable[AlertPayload]) -> BacktestResult:
-        trades: List[TradeDecision] = []
+        With ``keep_trades=False`` decisions are not collected, so memory stays constant for any
+        number of alerts; pass ``trade_log`` to spill them to a JSON-lines file instead.
+
+        With a ``fill_simulator`` every entry is resolved against the candles that follow it and
+        its P&L is the simulated fill's. Positions stay open until their simulated exit, so the
+        symbol exposure and daily loss limits apply as they would live; alerts need timestamps.
+        """
+        if self.fill_simulator is not None:
+            return self._run_with_fills(alerts, keep_trades, trade_log)
+        trades: Optional[List[TradeDecision]] = [] if keep_trades else None
+        trade_pnl: Optional[List[float]] = [] if keep_trades else None
+        count = 0
         wins = 0
         total_return = 0.0
         risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
 
-        for alert in alerts:
-            validation = self.validation_engine.evaluate(alert)
-            decision = self.decision_engine.decide(alert, validation, risk_state)
-            trades.append(decision)
-            if decision.action != decision.action.IGNORE:
-                # simple deterministic P&L: assume target hit when confidence high
-                profit = decision.size * (decision.take_profit - decision.stop_loss) if decision.action == decision.action.ENTER_LONG else decision.size * (decision.stop_loss - decision.take_profit)
-                realized = profit * (validation.confidence / 100)
-                total_return += realized
-                if realized > 0:
+        with ExitStack() as stack:
+            log = stack.enter_context(open(trade_log, "w", encoding="utf-8")) if trade_log is not None else None
+            for alert in alerts:
+                # Same incremental context as the live webhook when a provider is configured
+                context = self.context_provider.observe(alert) if self.context_provider is not None else None
+                validation = self.validation_engine.evaluate(alert, context)
+                decision = self.decision_engine.decide(alert, validation, risk_state)
+                count += 1
+                if trades is not None:
+                    trades.append(decision)
+                if log is not None:
+                    log.write(decision.model_dump_json())
+                    log.write("\n")
+                if decision.action != decision.action.IGNORE:
+                    # simple deterministic P&L: assume target hit when confidence high
+                    profit = decision.size * (decision.take_profit - decision.stop_loss) if decision.action == decision.action.ENTER_LONG else decision.size * (decision.stop_loss - decision.take_profit)
+                    realized = profit * (validation.confidence / 100)
+                    total_return += realized
+                    if trade_pnl is not None:
+                        trade_pnl.append(realized)
+                    if realized > 0:
+                        wins += 1
+
+        win_rate = wins / count if count else 0.0
+        expectancy = total_return / count if count else 0.0
+        return BacktestResult(
+            net_pl=total_return,
+            trades=trades,
+            win_rate=win_rate,
+            expectancy=expectancy,
+            total_alerts=count,
+            trade_log=trade_log,
+            trade_pnl=trade_pnl,
+        )
+
+    def _run_with_fills(
+        self, alerts: Iterable[AlertPayload], keep_trades: bool, trade_log: Optional[Path]
+    ) -> BacktestResult:
+        trades: Optional[List[TradeDecision]] = [] if keep_trades else None
+        fills: Optional[List[TradeFill]] = [] if keep_trades else None
+        count = 0
+        wins = 0
+        total_return = 0.0
+        # The book's day follows simulated time so daily losses reset on alert/exit dates
+        clock: List[date] = [date.min]
+        book = RiskBook(self.decision_engine.settings.account_equity, today=lambda: clock[0])
+        open_fills: List[tuple] = []  # heap of (exit_time, sequence, fill)
+
+        with ExitStack() as stack:
+            log = stack.enter_context(open(trade_log, "w", encoding="utf-8")) if trade_log is not None else None
+            for alert in alerts:
+                if alert.timestamp is None:
+                    raise ValueError("Fill simulation needs alerts with timestamps")
+                now = epoch_seconds(alert.timestamp)
+                while open_fills and open_fills[0][0] <= now:
+                    _, _, closed = heapq.heappop(open_fills)
+                    clock[0] = _utc_date(closed.exit_time)
+                    book.close_position(closed.symbol, closed.size, closed.entry_price, closed.pnl)
+                clock[0] = _utc_date(now)
+
+                context = self.context_provider.observe(alert) if self.context_provider is not None else None
+                validation = self.validation_engine.evaluate(alert, context)
+                decision = self.decision_engine.decide(alert, validation, book.snapshot())
+                count += 1
+                if trades is not None:
+                    trades.append(decision)
+                if log is not None:
+                    log.write(decision.model_dump_json())
+                    log.write("\n")
+                if decision.action == decision.action.IGNORE:
+                    continue
+
+                fill = self.fill_simulator.fill(decision, alert.timestamp, alert.price)
+                book.apply_execution(
+                    decision,
+                    ExecutionResult(success=True, order_id=None, status="filled", executed_size=fill.size),
+                    fill.entry_price,
+                )
+                heapq.heappush(open_fills, (fill.exit_time, count, fill))
+                if fills is not None:
+                    fills.append(fill)
+                total_return += fill.pnl
+                if fill.pnl > 0:
                     wins += 1
 
-        win_rate = wins / len(trades) if trades else 0.0
-        expectancy = total_return / len(trades) if trades else 0.0
-        return BacktestResult(net_pl=total_return, trades=trades, win_rate=win_rate, expectancy=expectancy)
+        return BacktestResult(
+            net_pl=total_return,
+            trades=trades,
+            win_rate=wins / count if count else 0.0,
+            expectancy=total_return / count if count else 0.0,
+            total_alerts=count,
+            trade_log=trade_log,
+            fills=fills,
+            trade_pnl=[fill.pnl for fill in fills] if fills is not None else None,
+        )
+
+    def run_batch(self, alerts: Union[AlertColumns, Iterable[AlertPayload]]) -> BatchBacktestResult:
+        """Vectorized equivalent of :meth:`run` over columnar alerts; results match the scalar loop exactly."""
+        if self.context is None:
+            raise ValueError("run_batch needs a fixed MarketContext")
+        columns = alerts if isinstance(alerts, AlertColumns) else AlertColumns.from_payloads(alerts)
+        risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+        validation = evaluate_batch(
+            columns,
+            self.context,
+            self.validation_engine.validity_threshold,
+            self.validation_engine.rules,
+            model=self.validation_engine.model,
+        )
+        decisions = decide_batch(
+            columns, validation, risk_state, self.decision_engine.settings, self.decision_engine.confidence_cutoff
+        )
+        return summarize_batch(decisions)
+
+
+def _utc_date(moment: int) -> date:
+    return datetime.fromtimestamp(moment, tz=timezone.utc).date()
@@ -0,0 +1,448 @@
+"""Robustness checks for backtest results: Monte Carlo trade resampling and walk-forward analysis.
+
+Monte Carlo takes a backtest's per-trade P&L and replays many resampled sequences of it
+from the same starting equity, giving distributions of final P&L and maximum drawdown and
+the share of paths that hit the ruin level. The methods are ``shuffle`` (the same trades in
+random order, so only the path changes), ``bootstrap`` (trades drawn with replacement) and
+``block`` (circular runs of ``block_size`` consecutive trades drawn with replacement, which
+keeps losing streaks together). Resamples are built and scored as 2-D arrays in chunks of
+``chunk_size`` rows, and the chunks are spread over a process pool. Each chunk has its own
+seed spawned from ``seed``, so results depend on ``seed`` and ``chunk_size`` and never on
+the worker count.
+
+Walk-forward picks the best candidate parameters on each training window and backtests
+them on the window that follows it, so every reported figure is out of sample. The alert
+dataset is shared with the workers as memory-mapped columns, as in :mod:`.sweep`.
+
+Usage::
+
+    python -m trading_agent.backtesting.robustness montecarlo alerts.jsonl --resamples 10000 --method block
+    python -m trading_agent.backtesting.robustness walkforward alerts.jsonl --train 20000 --test 5000 \\
+        --grid confidence_cutoff=40,50,60
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from trading_agent.backtesting.replay import BacktestResult
+from trading_agent.backtesting.sweep import (
+    SweepParams,
+    SweepResult,
+    add_context_arguments,
+    backtest_params,
+    context_from_args,
+    evaluate_params,
+    grid,
+    load_alerts,
+    parse_grid,
+    random_sample,
+    table_lines,
+)
+from trading_agent.backtesting.vectorized import IGNORE_CODE, AlertColumns, BatchBacktestResult
+from trading_agent.config.settings import Settings, get_settings
+
+SHUFFLE, BOOTSTRAP, BLOCK = "shuffle", "bootstrap", "block"
+METHODS = (SHUFFLE, BOOTSTRAP, BLOCK)
+DEFAULT_RUIN_LEVEL = 0.5  # fraction of starting equity lost
+CHUNK_ELEMENTS = 2_000_000  # resamples x trades scored at once; about 16 MB per float64 array
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def trade_pnl(result: Union[BacktestResult, BatchBacktestResult, Sequence[float], np.ndarray]) -> np.ndarray:
+    """Per-trade P&L of a backtest result, or of a plain sequence, as a float64 array."""
+    if isinstance(result, (BacktestResult, BatchBacktestResult)):
+        if result.trade_pnl is None:
+            raise ValueError("Backtest result has no per-trade P&L; run it with keep_trades=True")
+        return np.asarray(result.trade_pnl, dtype=np.float64)
+    return np.asarray(result, dtype=np.float64)
+
+
+def resample_indices(rng: np.random.Generator, trades: int, rows: int, method: str, block_size: int = 20) -> np.ndarray:
+    """``rows`` resampled orderings of ``trades`` trades, as a (rows, trades) index array."""
+    dtype = np.int32 if trades < 2**31 - block_size else np.int64  # halves the memory traffic of the gather
+    if method == SHUFFLE:
+        indices = np.tile(np.arange(trades, dtype=dtype), (rows, 1))
+        return rng.permuted(indices, axis=1, out=indices)
+    if method == BOOTSTRAP:
+        return rng.integers(0, trades, size=(rows, trades), dtype=dtype)
+    if method == BLOCK:
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        blocks = -(-trades // block_size)
+        starts = rng.integers(0, trades, size=(rows, blocks, 1), dtype=dtype)
+        indices = (starts + np.arange(block_size, dtype=dtype)) % dtype(trades)
+        return indices.reshape(rows, blocks * block_size)[:, :trades]
+    raise ValueError(f"Unknown resampling method {method!r}; expected one of {', '.join(METHODS)}")
+
+
+def path_stats(pnl: np.ndarray, equity: float, ruin_level: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Final P&L, maximum drawdown (fraction of the running peak) and ruin flag of each row of ``pnl``."""
+    curve = np.cumsum(pnl, axis=1)
+    curve += equity
+    peak = np.maximum.accumulate(curve, axis=1)
+    np.maximum(peak, equity, out=peak)  # the starting equity is the first peak
+    np.divide(curve, peak, out=peak)
+    max_drawdown = 1.0 - peak.min(axis=1)
+    ruined = curve.min(axis=1) <= equity * (1.0 - ruin_level)
+    return curve[:, -1] - equity, max_drawdown, ruined
+
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    equity: float
+    ruin_level: float
+    observed_net_pl: float  # the backtest in its original trade order
+    observed_max_drawdown: float
+    net_pl: np.ndarray  # one element per resample
+    max_drawdown: np.ndarray
+    ruined: np.ndarray
+
+    @property
+    def resamples(self) -> int:
+        return len(self.net_pl)
+
+    @property
+    def risk_of_ruin(self) -> float:
+        """Share of resampled paths that lost ``ruin_level`` of the starting equity at some point."""
+        return float(self.ruined.mean()) if len(self.ruined) else 0.0
+
+    @property
+    def probability_of_loss(self) -> float:
+        return float((self.net_pl < 0).mean()) if len(self.net_pl) else 0.0
+
+    def percentiles(self, q: Sequence[float] = PERCENTILES) -> Dict[str, Dict[float, float]]:
+        return {
+            "net_pl": dict(zip(q, np.percentile(self.net_pl, q).tolist())),
+            "max_drawdown": dict(zip(q, np.percentile(self.max_drawdown, q).tolist())),
+        }
+
+
+_worker_pnl: Optional[np.ndarray] = None
+
+
+def _init_worker(pnl: np.ndarray) -> None:
+    global _worker_pnl
+    _worker_pnl = pnl
+
+
+def _run_chunk(
+    pnl: np.ndarray, seed: np.random.SeedSequence, rows: int, method: str, block_size: int, equity: float, ruin_level: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    indices = resample_indices(np.random.default_rng(seed), len(pnl), rows, method, block_size)
+    return path_stats(np.take(pnl, indices), equity, ruin_level)
+
+
+def _run_task(task: tuple) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    assert _worker_pnl is not None, "worker not initialised"
+    return _run_chunk(_worker_pnl, *task)
+
+
+def monte_carlo(
+    trades: Union[BacktestResult, BatchBacktestResult, Sequence[float], np.ndarray],
+    resamples: int = 10_000,
+    method: str = BOOTSTRAP,
+    block_size: int = 20,
+    equity: Optional[float] = None,
+    ruin_level: float = DEFAULT_RUIN_LEVEL,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> MonteCarloResult:
+    """Resample the trades of a backtest ``resamples`` times and score every path.
+
+    ``equity`` defaults to the configured account equity. ``chunk_size`` (resamples per task)
+    defaults to about :data:`CHUNK_ELEMENTS` trades per chunk.
+    """
+    pnl = trade_pnl(trades)
+    if not len(pnl) or resamples < 1:
+        raise ValueError("Monte Carlo analysis needs at least one trade and one resample")
+    if method not in METHODS:
+        raise ValueError(f"Unknown resampling method {method!r}; expected one of {', '.join(METHODS)}")
+    equity = get_settings().account_equity if equity is None else equity
+    chunk_size = chunk_size or max(1, CHUNK_ELEMENTS // len(pnl))
+    sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(child, rows, method, block_size, equity, ruin_level) for child, rows in zip(seeds, sizes)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        chunks = [_run_chunk(pnl, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pnl,)) as pool:
+            chunks = list(pool.map(_run_task, tasks))
+
+    observed = path_stats(pnl[np.newaxis, :], equity, ruin_level)
+    net_pl, max_drawdown, ruined = (np.concatenate(parts) for parts in zip(*chunks))
+    return MonteCarloResult(
+        method=method,
+        equity=equity,
+        ruin_level=ruin_level,
+        observed_net_pl=float(observed[0][0]),
+        observed_max_drawdown=float(observed[1][0]),
+        net_pl=net_pl,
+        max_drawdown=max_drawdown,
+        ruined=ruined,
+    )
+
+
+def format_monte_carlo(result: MonteCarloResult) -> str:
+    percentiles = result.percentiles()
+    header = ["", "observed", *(f"p{q:g}" for q in PERCENTILES)]
+    rows = [
+        ["net_pl", f"{result.observed_net_pl:.2f}", *(f"{value:.2f}" for value in percentiles["net_pl"].values())],
+        [
+            "max_drawdown",
+            f"{result.observed_max_drawdown:.2%}",
+            *(f"{value:.2%}" for value in percentiles["max_drawdown"].values()),
+        ],
+    ]
+    lines = table_lines(header, rows)
+    lines.append(
+        f"{result.resamples} {result.method} resamples; P(loss) {result.probability_of_loss:.2%}; "
+        f"risk of ruin ({result.ruin_level:.0%} of {result.equity:,.0f}) {result.risk_of_ruin:.2%}"
+    )
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class Window:
+    """Row ranges of one walk-forward step; the test rows follow the training rows."""
+
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+
+def rolling_windows(
+    count: int, train_size: int, test_size: int, step: Optional[int] = None, anchored: bool = False
+) -> List[Window]:
+    """Consecutive train/test windows over ``count`` rows, moving ``step`` rows (default ``test_size``) at a time.
+
+    Anchored windows keep training from row 0 and only extend the end.
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train_size and test_size must be positive")
+    step = step or test_size
+    windows = []
+    train_stop = train_size
+    while train_stop + test_size <= count:
+        train_start = 0 if anchored else train_stop - train_size
+        windows.append(Window(train_start, train_stop, train_stop, train_stop + test_size))
+        train_stop += step
+    return windows
+
+
+def time_windows(
+    timestamps: np.ndarray, train: timedelta, test: timedelta, step: Optional[timedelta] = None, anchored: bool = False
+) -> List[Window]:
+    """Walk-forward windows by calendar span over sorted ``timestamps`` (``datetime64``), one per alert row."""
+    timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+    if not len(timestamps):
+        return []
+    train, test = np.timedelta64(train), np.timedelta64(test)
+    step = np.timedelta64(step) if step is not None else test
+    windows = []
+    origin = timestamps[0]
+    boundary = origin + train
+    while boundary + test <= timestamps[-1] + np.timedelta64(1, "us"):
+        start, split, stop = np.searchsorted(timestamps, [origin if anchored else boundary - train, boundary, boundary + test])
+        if split > start and stop > split:
+            windows.append(Window(int(start), int(split), int(split), int(stop)))
+        boundary = boundary + step
+    return windows
+
+
+@dataclass
+class WalkForwardStep:
+    window: Window
+    train: SweepResult  # best candidate on the training rows
+    test: SweepResult  # the same parameters on the test rows
+    test_pnl: np.ndarray
+
+
+@dataclass
+class WalkForwardResult:
+    steps: List[WalkForwardStep]
+
+    @property
+    def net_pl(self) -> float:
+        """Out-of-sample P&L summed over every test window."""
+        return sum(step.test.net_pl for step in self.steps)
+
+    @property
+    def trade_pnl(self) -> np.ndarray:
+        """Out-of-sample trades of every test window, in order; feed these to :func:`monte_carlo`."""
+        return np.concatenate([step.test_pnl for step in self.steps]) if self.steps else np.empty(0)
+
+    @property
+    def efficiency(self) -> float:
+        """Out-of-sample expectancy per alert over in-sample expectancy per alert; near 1 means little overfitting."""
+        train_alerts = sum(step.window.train_stop - step.window.train_start for step in self.steps)
+        test_alerts = sum(step.window.test_stop - step.window.test_start for step in self.steps)
+        in_sample = sum(step.train.net_pl for step in self.steps) / train_alerts if train_alerts else 0.0
+        out_of_sample = self.net_pl / test_alerts if test_alerts else 0.0
+        return out_of_sample / in_sample if in_sample else 0.0
+
+
+def walk_forward_step(
+    columns: AlertColumns, settings: Settings, candidates: Sequence[SweepParams], window: Window, objective: str = "net_pl"
+) -> WalkForwardStep:
+    train_columns = columns.slice(window.train_start, window.train_stop)
+    scored = [evaluate_params(train_columns, settings, params) for params in candidates]
+    best = max(scored, key=lambda result: getattr(result, objective))
+    test = backtest_params(columns.slice(window.test_start, window.test_stop), settings, best.params)
+    return WalkForwardStep(
+        window=window,
+        train=best,
+        test=SweepResult(
+            params=best.params,
+            net_pl=test.net_pl,
+            win_rate=test.win_rate,
+            expectancy=test.expectancy,
+            trades=int((test.decisions.action != IGNORE_CODE).sum()),
+        ),
+        test_pnl=test.trade_pnl,
+    )
+
+
+_worker_columns: Optional[AlertColumns] = None
+_worker_settings: Optional[Settings] = None
+_worker_candidates: Sequence[SweepParams] = ()
+
+
+def _init_walk_worker(dataset_dir: str, settings: Settings, candidates: Sequence[SweepParams]) -> None:
+    global _worker_columns, _worker_settings, _worker_candidates
+    _worker_columns = AlertColumns.load(Path(dataset_dir))
+    _worker_settings = settings
+    _worker_candidates = candidates
+
+
+def _run_window(task: Tuple[Window, str]) -> WalkForwardStep:
+    assert _worker_columns is not None and _worker_settings is not None, "worker not initialised"
+    window, objective = task
+    return walk_forward_step(_worker_columns, _worker_settings, _worker_candidates, window, objective)
+
+
+def walk_forward(
+    columns: AlertColumns,
+    candidates: Iterable[SweepParams],
+    windows: Sequence[Window],
+    objective: str = "net_pl",
+    workers: Optional[int] = None,
+    settings: Optional[Settings] = None,
+) -> WalkForwardResult:
+    """Optimise ``candidates`` on each training window and backtest the winner on its test window.
+
+    ``objective`` is the :class:`SweepResult` field maximised in training. Windows run in a
+    process pool over the memory-mapped dataset.
+    """
+    candidates = list(candidates)
+    if not candidates:
+        raise ValueError("walk_forward needs at least one candidate")
+    if objective not in {field.name for field in fields(SweepResult)} - {"params"}:
+        raise ValueError(f"Unknown objective {objective!r}")
+    settings = settings or get_settings()
+    workers = min(workers or os.cpu_count() or 1, len(windows)) or 1
+    if workers == 1:
+        return WalkForwardResult([walk_forward_step(columns, settings, candidates, window, objective) for window in windows])
+
+    with tempfile.TemporaryDirectory(prefix="walk-forward-") as dataset_dir:
+        columns.save(Path(dataset_dir))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_walk_worker, initargs=(dataset_dir, settings, candidates)
+        ) as pool:
+            steps = list(pool.map(_run_window, [(window, objective) for window in windows]))
+    return WalkForwardResult(steps)
+
+
+def format_walk_forward(result: WalkForwardResult) -> str:
+    varied = [
+        field.name
+        for field in fields(SweepParams)
+        if len({getattr(step.train.params, field.name) for step in result.steps}) > 1
+    ]
+    header = ["train", "test", *varied, "train_pl", "test_pl", "test_trades"]
+    body = [
+        [
+            f"{step.window.train_start}:{step.window.train_stop}",
+            f"{step.window.test_start}:{step.window.test_stop}",
+            *(str(getattr(step.train.params, name)) for name in varied),
+            f"{step.train.net_pl:.2f}",
+            f"{step.test.net_pl:.2f}",
+            str(step.test.trades),
+        ]
+        for step in result.steps
+    ]
+    lines = table_lines(header, body)
+    lines.append(f"out-of-sample net P&L {result.net_pl:.2f}; walk-forward efficiency {result.efficiency:.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo and walk-forward robustness checks for backtests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("alerts", type=Path, help="JSON/JSONL file of webhook payloads or a saved AlertColumns directory")
+    common.add_argument("--workers", type=int)
+    common.add_argument("--seed", type=int, default=0)
+    add_context_arguments(common)
+
+    mc = commands.add_parser("montecarlo", parents=[common], help="resample the trades of one backtest")
+    mc.add_argument("--resamples", type=int, default=10_000)
+    mc.add_argument("--method", choices=METHODS, default=BOOTSTRAP)
+    mc.add_argument("--block-size", type=int, default=20)
+    mc.add_argument("--ruin-level", type=float, default=DEFAULT_RUIN_LEVEL)
+
+    wf = commands.add_parser("walkforward", parents=[common], help="optimise in sample, score out of sample")
+    wf.add_argument("--train", type=int, required=True, help="alerts per training window")
+    wf.add_argument("--test", type=int, required=True, help="alerts per test window")
+    wf.add_argument("--step", type=int, help="alerts to advance between windows (default --test)")
+    wf.add_argument("--anchored", action="store_true", help="keep every training window starting at the first alert")
+    wf.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2", help="parameter values to try")
+    wf.add_argument("--samples", type=int, help="draw this many random combinations instead of the full grid")
+    wf.add_argument("--objective", default="net_pl", choices=("net_pl", "win_rate", "expectancy"))
+    args = parser.parse_args(argv)
+
+    if args.command == "walkforward":
+        try:
+            space = parse_grid(args.grid)
+        except ValueError as exc:
+            parser.error(str(exc))
+    settings = get_settings()
+    base = SweepParams.from_base(settings, context_from_args(args))
+    columns = load_alerts(args.alerts)
+
+    if args.command == "montecarlo":
+        result = monte_carlo(
+            backtest_params(columns, settings, base),
+            resamples=args.resamples,
+            method=args.method,
+            block_size=args.block_size,
+            ruin_level=args.ruin_level,
+            seed=args.seed,
+            workers=args.workers,
+        )
+        print(format_monte_carlo(result))
+        return
+
+    candidates = random_sample(base, space, args.samples, args.seed) if args.samples else grid(base, space)
+    windows = rolling_windows(len(columns), args.train, args.test, args.step, args.anchored)
+    if not windows:
+        parser.error(f"{len(columns)} alerts are too few for a {args.train}+{args.test} window")
+    print(format_walk_forward(walk_forward(columns, candidates, windows, args.objective, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def stream_stored_alerts(
+    symbol: Optional[str] = None,
+    timeframe: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[AlertPayload]:
+    """Yield stored alerts in ``created_at`` order without loading the whole table.
+
+    Rows are fetched ``chunk_size`` at a time through a streaming cursor and selected as plain
+    columns, so no ORM objects accumulate in the session. ``start`` is inclusive, ``end`` exclusive.
+    """
+    query = select(
+        Alert.symbol, Alert.price, Alert.signal, Alert.timeframe, Alert.indicators, Alert.created_at
+    ).order_by(Alert.created_at, Alert.id)
+    if symbol is not None:
+        query = query.where(Alert.symbol == symbol)
+    if timeframe is not None:
+        query = query.where(Alert.timeframe == timeframe)
+    if start is not None:
+        query = query.where(Alert.created_at >= start)
+    if end is not None:
+        query = query.where(Alert.created_at < end)
+
+    with session_scope() as session:
+        rows = session.execute(query.execution_options(yield_per=chunk_size))
+        for row in rows:
+            yield AlertPayload(
+                symbol=row.symbol,
+                price=row.price,
+                signal=row.signal,
+                timeframe=row.timeframe,
+                indicators=IndicatorPayload(**row.indicators),
+                timestamp=row.created_at,
+            )
@@ -0,0 +1,385 @@
+"""Columnar on-disk store for backtest alerts and candles.
+
+Every partition is a directory of ``.npy`` files, one per column, under
+``<root>/<kind>/<symbol>/<timeframe>/<YYYY-MM-DD>/``. Rows in a partition are sorted by
+timestamp, so a date range maps to whole days plus a binary-searched slice of the first and
+last day. Loads are memory-mapped: only the pages of the requested days are ever read, and
+indicator JSON is decoded once at export instead of on every backtest.
+
+Usage::
+
+    python -m trading_agent.backtesting.store sync ./alert-store
+    python -m trading_agent.backtesting.store import-candles ./alert-store ETH 5m candles.csv
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+from sqlalchemy import select
+
+from trading_agent.backtesting.fills import CandleSeries
+from trading_agent.backtesting.vectorized import BUY, SELL, AlertColumns
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.services.market_context import Candle, read_candle_file
+
+ALERTS = "alerts"
+CANDLES = "candles"
+MANIFEST = "manifest.json"
+TIMESTAMP_DTYPE = "datetime64[us]"
+SYNC_OVERLAP = timedelta(minutes=5)  # longest expected lag between an alert's created_at and its commit
+
+_ALERT_COLUMNS = {
+    "id": np.int64,
+    "timestamp": TIMESTAMP_DTYPE,
+    "price": np.float64,
+    "rsi": np.float64,
+    "macd": np.float64,
+    "ema20": np.float64,
+    "atr": np.float64,
+    "signal": np.int8,
+}
+_CANDLE_COLUMNS = {
+    "timestamp": TIMESTAMP_DTYPE,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+
+@dataclass
+class StoredAlerts:
+    """Alerts read back from the store: :class:`AlertColumns` plus their IDs, timestamps and timeframe."""
+
+    columns: AlertColumns
+    alert_id: np.ndarray
+    timestamp: np.ndarray  # datetime64[us], naive UTC
+    timeframe: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.alert_id)
+
+    def payloads(self) -> Iterator[AlertPayload]:
+        """Rebuild webhook payloads, e.g. for :meth:`Backtester.run` with a fill simulator."""
+        c = self.columns
+        timestamps = self.timestamp.astype(datetime)
+        for i in range(len(self)):
+            yield AlertPayload(
+                symbol=str(c.symbol[i]),
+                price=float(c.price[i]),
+                signal="buy" if c.signal[i] == BUY else "sell",
+                timeframe=str(self.timeframe[i]),
+                indicators=IndicatorPayload(
+                    RSI=float(c.rsi[i]), MACD=float(c.macd[i]), EMA20=float(c.ema20[i]), ATR=float(c.atr[i])
+                ),
+                timestamp=timestamps[i],
+            )
+
+
+class ColumnarStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    # -- manifest -------------------------------------------------------------------------
+
+    def manifest(self) -> dict:
+        """Sync progress: see :func:`sync_alerts`; empty for a new store."""
+        path = self.root / MANIFEST
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def write_manifest(self, manifest: dict) -> None:
+        """Replace the manifest atomically."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{MANIFEST}.tmp"
+        staging.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(staging, self.root / MANIFEST)
+
+    # -- writing --------------------------------------------------------------------------
+
+    def append_alerts(self, rows: Iterable[Tuple]) -> int:
+        """Merge ``(id, symbol, timeframe, created_at, price, signal, indicators)`` rows into their partitions.
+
+        Rows already present (same alert ID) are replaced, so re-running an append is harmless.
+        """
+        grouped: Dict[Tuple[str, str, date], List[tuple]] = {}
+        count = 0
+        for alert_id, symbol, timeframe, created_at, price, signal, indicators in rows:
+            grouped.setdefault((symbol, timeframe, created_at.date()), []).append(
+                (
+                    alert_id,
+                    created_at,
+                    price,
+                    indicators["RSI"],
+                    indicators["MACD"],
+                    indicators["EMA20"],
+                    indicators["ATR"],
+                    BUY if signal == "buy" else SELL,
+                )
+            )
+            count += 1
+        for (symbol, timeframe, day), values in grouped.items():
+            incoming = _to_columns(values, _ALERT_COLUMNS)
+            self._merge(self._partition(ALERTS, symbol, timeframe, day), incoming, _ALERT_COLUMNS, key="id")
+        return count
+
+    def append_candles(self, symbol: str, timeframe: str, candles: Iterable[Candle]) -> int:
+        """Merge candles into daily partitions; a bar with an existing timestamp replaces the stored one."""
+        grouped: Dict[date, List[tuple]] = {}
+        count = 0
+        for candle in candles:
+            grouped.setdefault(candle.timestamp.date(), []).append(
+                (candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume)
+            )
+            count += 1
+        for day, values in grouped.items():
+            incoming = _to_columns(values, _CANDLE_COLUMNS)
+            self._merge(self._partition(CANDLES, symbol, timeframe, day), incoming, _CANDLE_COLUMNS, key="timestamp")
+        return count
+
+    def _merge(self, directory: Path, incoming: Dict[str, np.ndarray], schema: dict, key: str) -> None:
+        if directory.exists():
+            existing = _read_partition(directory, schema, mmap_mode=None)
+            merged = {name: np.concatenate([existing[name], incoming[name]]) for name in schema}
+        else:
+            merged = incoming
+        # Last write wins for duplicate keys, then rows are ordered by time (and ID for ties)
+        _, last = np.unique(merged[key][::-1], return_index=True)
+        keep = len(merged[key]) - 1 - last
+        merged = {name: column[keep] for name, column in merged.items()}
+        order = np.lexsort((merged[key], merged["timestamp"])) if key != "timestamp" else np.argsort(merged[key])
+        merged = {name: column[order] for name, column in merged.items()}
+
+        # Columns are written to a sibling directory that is swapped in, so readers never see
+        # a partition whose columns have different lengths
+        staging = directory.with_name(f".{directory.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name in schema:
+            np.save(staging / f"{name}.npy", merged[name])
+        retired = directory.with_name(f".{directory.name}.old")
+        if directory.exists():
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    # -- reading --------------------------------------------------------------------------
+
+    def symbols(self, kind: str = ALERTS) -> List[str]:
+        base = self.root / kind
+        return sorted(unquote(path.name) for path in base.iterdir()) if base.exists() else []
+
+    def iter_alert_partitions(
+        self,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        mmap_mode: Optional[str] = "r",
+    ) -> Iterator[StoredAlerts]:
+        """Yield one memory-mapped :class:`StoredAlerts` per day partition, trimmed to ``[start, end)``.
+
+        Nothing is copied: each column is a view into the mapped file.
+        """
+        for (part_symbol, part_timeframe), directory in self._partitions(ALERTS, symbol, timeframe, start, end):
+            columns = _trim(_read_partition(directory, _ALERT_COLUMNS, mmap_mode), start, end)
+            count = len(columns["id"])
+            if count == 0:
+                continue
+            yield StoredAlerts(
+                columns=AlertColumns(
+                    symbol=np.full(count, part_symbol),
+                    price=columns["price"],
+                    rsi=columns["rsi"],
+                    macd=columns["macd"],
+                    ema20=columns["ema20"],
+                    atr=columns["atr"],
+                    signal=columns["signal"],
+                ),
+                alert_id=columns["id"],
+                timestamp=columns["timestamp"],
+                timeframe=np.full(count, part_timeframe),
+            )
+
+    def load_alerts(
+        self,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> StoredAlerts:
+        """Concatenate the partitions covering ``[start, end)`` in timestamp order."""
+        parts = list(self.iter_alert_partitions(symbol, timeframe, start, end))
+        if not parts:
+            return StoredAlerts(
+                AlertColumns.empty(), np.empty(0, np.int64), np.empty(0, TIMESTAMP_DTYPE), np.empty(0, dtype=str)
+            )
+        timestamp = np.concatenate([part.timestamp for part in parts])
+        alert_id = np.concatenate([part.alert_id for part in parts])
+        # Partitions of different symbols interleave in time; keep the replay chronological
+        order = np.lexsort((alert_id, timestamp))
+        columns = AlertColumns(
+            **{
+                name: np.concatenate([getattr(part.columns, name) for part in parts])[order]
+                for name in AlertColumns.column_names()
+            }
+        )
+        timeframe_column = np.concatenate([part.timeframe for part in parts])[order]
+        return StoredAlerts(columns, alert_id[order], timestamp[order], timeframe_column)
+
+    def load_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> CandleSeries:
+        parts = [
+            _trim(_read_partition(directory, _CANDLE_COLUMNS, "r"), start, end)
+            for _, directory in self._partitions(CANDLES, symbol, timeframe, start, end)
+        ]
+        column = {
+            name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype)
+            for name, dtype in _CANDLE_COLUMNS.items()
+        }
+        return CandleSeries(
+            timestamp=column["timestamp"].astype("datetime64[s]").astype(np.int64),
+            open=column["open"],
+            high=column["high"],
+            low=column["low"],
+            close=column["close"],
+        )
+
+    def _partition(self, kind: str, symbol: str, timeframe: str, day: date) -> Path:
+        return self.root / kind / quote(symbol, safe="") / quote(timeframe, safe="") / day.isoformat()
+
+    def _partitions(
+        self,
+        kind: str,
+        symbol: Optional[str],
+        timeframe: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+    ) -> Iterator[Tuple[Tuple[str, str], Path]]:
+        base = self.root / kind
+        if not base.exists():
+            return
+        first_day = start.date().isoformat() if start is not None else None
+        # ``end`` is exclusive, so midnight does not pull in that day's partition
+        last_day = (end - timedelta(microseconds=1)).date().isoformat() if end is not None else None
+        symbol_dirs = [base / quote(symbol, safe="")] if symbol is not None else sorted(base.iterdir())
+        for symbol_dir in symbol_dirs:
+            if not symbol_dir.is_dir():
+                continue
+            if timeframe is not None:
+                timeframe_dirs = [symbol_dir / quote(timeframe, safe="")]
+            else:
+                timeframe_dirs = sorted(symbol_dir.iterdir())
+            for timeframe_dir in timeframe_dirs:
+                if not timeframe_dir.is_dir():
+                    continue
+                for day_dir in sorted(timeframe_dir.iterdir()):
+                    day = day_dir.name
+                    if day.startswith(".") or (first_day and day < first_day) or (last_day and day > last_day):
+                        continue
+                    yield (unquote(symbol_dir.name), unquote(timeframe_dir.name)), day_dir
+
+
+def _to_columns(values: List[tuple], schema: dict) -> Dict[str, np.ndarray]:
+    return {name: np.asarray(column, dtype=dtype) for (name, dtype), column in zip(schema.items(), zip(*values))}
+
+
+def _read_partition(directory: Path, schema: dict, mmap_mode: Optional[str]) -> Dict[str, np.ndarray]:
+    return {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in schema}
+
+
+def _trim(columns: Dict[str, np.ndarray], start: Optional[datetime], end: Optional[datetime]) -> Dict[str, np.ndarray]:
+    stamps = columns["timestamp"]
+    lo = int(np.searchsorted(stamps, np.datetime64(start, "us"), side="left")) if start is not None else 0
+    hi = int(np.searchsorted(stamps, np.datetime64(end, "us"), side="left")) if end is not None else len(stamps)
+    if lo == 0 and hi == len(stamps):
+        return columns
+    return {name: column[lo:hi] for name, column in columns.items()}
+
+
+def sync_alerts(store: ColumnarStore, chunk_size: int = 5000, overlap: timedelta = SYNC_OVERLAP) -> int:
+    """Append alerts stored since the last sync; returns how many were new.
+
+    Progress is tracked by ``created_at``, not by ID, because IDs can commit out of order. With
+    several workers inserting in their own transactions, an alert can commit after a sync has
+    already seen higher IDs. Each run therefore re-reads the ``overlap`` before the newest alert
+    synced so far and skips the IDs the manifest lists for that window. An alert whose
+    transaction commits up to ``overlap`` late is still picked up.
+
+    The manifest is advanced after each chunk, and appends replace rows by ID, so an
+    interrupted sync resumes where it stopped without duplicating anything.
+    """
+    manifest = store.manifest()
+    query = select(Alert.id, Alert.symbol, Alert.timeframe, Alert.created_at, Alert.price, Alert.signal, Alert.indicators)
+    synced_through: Optional[datetime] = None
+    recent: Dict[int, datetime] = {}
+    if "synced_through" in manifest:
+        synced_through = datetime.fromisoformat(manifest["synced_through"])
+        recent = {alert_id: datetime.fromisoformat(at) for alert_id, at in manifest["recent_alert_ids"]}
+        query = query.where(Alert.created_at >= synced_through - overlap)
+    else:
+        # A new store, or one last synced when progress was tracked by ID
+        query = query.where(Alert.id > manifest.get("last_alert_id", 0))
+    query = query.order_by(Alert.created_at, Alert.id).execution_options(yield_per=chunk_size)
+
+    total = 0
+    with session_scope() as session:
+        for chunk in session.execute(query).partitions():
+            total += store.append_alerts(row for row in chunk if row.id not in recent)
+            newest = chunk[-1].created_at
+            synced_through = newest if synced_through is None else max(synced_through, newest)
+            horizon = synced_through - overlap
+            recent.update((row.id, row.created_at) for row in chunk)
+            recent = {alert_id: at for alert_id, at in recent.items() if at >= horizon}
+            store.write_manifest(
+                {
+                    "synced_through": synced_through.isoformat(),
+                    "recent_alert_ids": [[alert_id, at.isoformat()] for alert_id, at in sorted(recent.items())],
+                }
+            )
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain the columnar backtest store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="append alerts stored since the last sync")
+    sync.add_argument("root", type=Path)
+    sync.add_argument("--chunk-size", type=int, default=5000)
+    sync.add_argument(
+        "--overlap-seconds", type=float, default=SYNC_OVERLAP.total_seconds(), help="window re-read for late commits"
+    )
+    candles = commands.add_parser("import-candles", help="import a timestamp,open,high,low,close,volume CSV")
+    candles.add_argument("root", type=Path)
+    candles.add_argument("symbol")
+    candles.add_argument("timeframe")
+    candles.add_argument("csv", type=Path)
+    args = parser.parse_args(argv)
+
+    store = ColumnarStore(args.root)
+    if args.command == "sync":
+        print(f"appended {sync_alerts(store, args.chunk_size, timedelta(seconds=args.overlap_seconds))} alerts")
+    else:
+        print(f"imported {store.append_candles(args.symbol, args.timeframe, read_candle_file(args.csv))} candles")
+
+
+if __name__ == "__main__":
+    main()
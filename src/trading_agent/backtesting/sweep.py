@@ -0,0 +1,227 @@
+"""Parameter-sweep backtests spread across a process pool.
+
+The alert dataset is written once as memory-mapped ``.npy`` columns; each worker maps it in
+its initializer, so tasks only carry the parameters being tried.
+
+Usage::
+
+    python -m trading_agent.backtesting.sweep alerts.jsonl \\
+        --grid max_risk_per_trade=0.005,0.01,0.02 --grid confidence_cutoff=40,50,60 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from trading_agent.backtesting.vectorized import (
+    IGNORE_CODE,
+    AlertColumns,
+    BatchBacktestResult,
+    decide_batch,
+    evaluate_batch,
+    summarize_batch,
+)
+from trading_agent.config.settings import Settings, get_settings
+from trading_agent.schemas.alert import AlertPayload
+from trading_agent.services.decision_engine import DEFAULT_CONFIDENCE_CUTOFF, RiskState
+from trading_agent.services.validation_engine import DEFAULT_VALIDITY_THRESHOLD, MarketContext
+
+SETTINGS_PARAMS = ("max_risk_per_trade", "max_symbol_exposure")
+
+
+@dataclass(frozen=True)
+class SweepParams:
+    max_risk_per_trade: float
+    max_symbol_exposure: float
+    confidence_cutoff: int = DEFAULT_CONFIDENCE_CUTOFF
+    validity_threshold: int = DEFAULT_VALIDITY_THRESHOLD
+    ema_fast: float = 0.0
+    ema_slow: float = 0.0
+    vwap: Optional[float] = None
+    atr_baseline: float = 0.0
+
+    @classmethod
+    def from_base(cls, settings: Settings, context: MarketContext) -> "SweepParams":
+        return cls(
+            max_risk_per_trade=settings.max_risk_per_trade,
+            max_symbol_exposure=settings.max_symbol_exposure,
+            ema_fast=context.ema_fast,
+            ema_slow=context.ema_slow,
+            vwap=context.vwap,
+            atr_baseline=context.atr_baseline,
+        )
+
+    def context(self) -> MarketContext:
+        return MarketContext(ema_fast=self.ema_fast, ema_slow=self.ema_slow, vwap=self.vwap, atr_baseline=self.atr_baseline)
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    params: SweepParams
+    net_pl: float
+    win_rate: float
+    expectancy: float
+    trades: int
+
+
+def grid(base: SweepParams, space: Mapping[str, Sequence]) -> List[SweepParams]:
+    """Every combination of the values in ``space``, with unlisted parameters taken from ``base``."""
+    names = list(space)
+    return [replace(base, **dict(zip(names, values))) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_sample(base: SweepParams, space: Mapping[str, Sequence], count: int, seed: int = 0) -> List[SweepParams]:
+    """``count`` parameter sets drawn uniformly from the values in ``space``."""
+    rng = random.Random(seed)
+    return [replace(base, **{name: rng.choice(list(values)) for name, values in space.items()}) for _ in range(count)]
+
+
+_worker_columns: Optional[AlertColumns] = None
+_worker_settings: Optional[Settings] = None
+
+
+def _init_worker(dataset_dir: str, settings: Settings) -> None:
+    global _worker_columns, _worker_settings
+    _worker_columns = AlertColumns.load(Path(dataset_dir))
+    _worker_settings = settings
+
+
+def backtest_params(columns: AlertColumns, settings: Settings, params: SweepParams) -> BatchBacktestResult:
+    run_settings = settings.model_copy(update={name: getattr(params, name) for name in SETTINGS_PARAMS})
+    validation = evaluate_batch(columns, params.context(), params.validity_threshold)
+    decisions = decide_batch(
+        columns, validation, RiskState(open_positions={}, daily_loss_fraction=0.0), run_settings, params.confidence_cutoff
+    )
+    return summarize_batch(decisions)
+
+
+def evaluate_params(columns: AlertColumns, settings: Settings, params: SweepParams) -> SweepResult:
+    result = backtest_params(columns, settings, params)
+    return SweepResult(
+        params=params,
+        net_pl=result.net_pl,
+        win_rate=result.win_rate,
+        expectancy=result.expectancy,
+        trades=int((result.decisions.action != IGNORE_CODE).sum()),
+    )
+
+
+def _run_task(params: SweepParams) -> SweepResult:
+    assert _worker_columns is not None and _worker_settings is not None, "worker not initialised"
+    return evaluate_params(_worker_columns, _worker_settings, params)
+
+
+def run_sweep(
+    columns: AlertColumns,
+    candidates: Iterable[SweepParams],
+    workers: Optional[int] = None,
+    settings: Optional[Settings] = None,
+) -> List[SweepResult]:
+    """Backtest every candidate in a process pool and return results ranked by net P&L."""
+    candidates = list(candidates)
+    settings = settings or get_settings()
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(candidates) // (workers * 4))
+
+    with tempfile.TemporaryDirectory(prefix="sweep-") as dataset_dir:
+        columns.save(Path(dataset_dir))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dataset_dir, settings)) as pool:
+            results = list(pool.map(_run_task, candidates, chunksize=chunksize))
+
+    return sorted(results, key=lambda result: result.net_pl, reverse=True)
+
+
+def format_table(results: Sequence[SweepResult], limit: Optional[int] = None) -> str:
+    rows = results[:limit] if limit else results
+    param_names = [field.name for field in fields(SweepParams)]
+    header = ["rank", *param_names, "net_pl", "win_rate", "expectancy", "trades"]
+    body = [
+        [str(rank), *(str(value) for value in asdict(result.params).values()),
+         f"{result.net_pl:.2f}", f"{result.win_rate:.3f}", f"{result.expectancy:.4f}", str(result.trades)]
+        for rank, result in enumerate(rows, start=1)
+    ]
+    return "\n".join(table_lines(header, body))
+
+
+def table_lines(header: Sequence[str], rows: Sequence[Sequence[str]]) -> List[str]:
+    """Right-aligned text columns, one line per row after the header."""
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    return ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in [header, *rows]]
+
+
+def load_alerts(path: Path) -> AlertColumns:
+    """Alerts from a JSON array or JSON-lines file of webhook payloads, or a saved :class:`AlertColumns` directory."""
+    if path.is_dir():
+        return AlertColumns.load(path)
+    text = path.read_text()
+    records = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    return AlertColumns.from_payloads(AlertPayload.model_validate(record) for record in records)
+
+
+def parse_values(raw: str) -> list:
+    values = []
+    for item in raw.split(","):
+        if item.lower() == "none":
+            values.append(None)
+        else:
+            number = float(item)
+            values.append(int(number) if number.is_integer() and "." not in item else number)
+    return values
+
+
+def parse_grid(entries: Iterable[str]) -> Dict[str, list]:
+    """``NAME=V1,V2`` entries as a search space; raises ValueError for names that are not sweep parameters."""
+    space = {}
+    for entry in entries:
+        name, _, raw = entry.partition("=")
+        if name not in {field.name for field in fields(SweepParams)}:
+            raise ValueError(f"unknown sweep parameter: {name}")
+        space[name] = parse_values(raw)
+    return space
+
+
+def add_context_arguments(parser: argparse.ArgumentParser) -> None:
+    """The fixed market context every candidate is validated against."""
+    parser.add_argument("--ema-fast", type=float, default=0.0)
+    parser.add_argument("--ema-slow", type=float, default=0.0)
+    parser.add_argument("--vwap", type=float)
+    parser.add_argument("--atr-baseline", type=float, default=0.0)
+
+
+def context_from_args(args: argparse.Namespace) -> MarketContext:
+    return MarketContext(ema_fast=args.ema_fast, ema_slow=args.ema_slow, vwap=args.vwap, atr_baseline=args.atr_baseline)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a parallel parameter sweep over stored alerts.")
+    parser.add_argument("alerts", type=Path, help="JSON/JSONL file of webhook payloads or a saved AlertColumns directory")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2", help="parameter values to sweep")
+    parser.add_argument("--samples", type=int, help="draw this many random combinations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    add_context_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        space = parse_grid(args.grid)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    base = SweepParams.from_base(get_settings(), context_from_args(args))
+    candidates = random_sample(base, space, args.samples, args.seed) if args.samples else grid(base, space)
+
+    results = run_sweep(load_alerts(args.alerts), candidates, workers=args.workers)
+    print(format_table(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trading_agent.config.settings import Settings
+from trading_agent.schemas.alert import AlertPayload
+from trading_agent.schemas.pipeline import Action, TradeDecision
+from trading_agent.services.decision_engine import (
+    DEFAULT_CONFIDENCE_CUTOFF,
+    REASON_DAILY_LOSS,
+    REASON_LOW_CONFIDENCE,
+    REASON_SYMBOL_EXPOSURE,
+    REASON_VALIDATION_FAILED,
+    RiskState,
+)
+from trading_agent.services.rules import RuleTable, compile_rules
+from trading_agent.services.validation_engine import DEFAULT_VALIDITY_THRESHOLD, MarketContext
+
+if TYPE_CHECKING:
+    from trading_agent.services.confidence_model import ConfidenceModel
+
+BUY = 1
+SELL = -1
+
+# Index into this tuple with DecisionColumns.action
+ACTION_CODES = (Action.IGNORE, Action.ENTER_LONG, Action.ENTER_SHORT)
+IGNORE_CODE, LONG_CODE, SHORT_CODE = 0, 1, 2
+
+# Index into this tuple with DecisionColumns.reason; 0 means the decision was not ignored
+REASON_CODES = (None, REASON_VALIDATION_FAILED, REASON_DAILY_LOSS, REASON_SYMBOL_EXPOSURE, REASON_LOW_CONFIDENCE)
+
+
+@dataclass
+class AlertColumns:
+    """Alerts laid out as parallel NumPy arrays, one element per alert.
+
+    When ``symbol_names`` is set, ``symbol`` holds integer codes into it instead of strings, so
+    a memory-mapped dataset never materializes a per-alert array of Python strings. Use
+    :meth:`symbol_mask` to filter and :meth:`symbols` to get the names back for reporting.
+    """
+
+    symbol: np.ndarray
+    price: np.ndarray
+    rsi: np.ndarray
+    macd: np.ndarray
+    ema20: np.ndarray
+    atr: np.ndarray
+    signal: np.ndarray  # BUY (+1) or SELL (-1)
+    symbol_names: Optional[np.ndarray] = field(default=None, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @classmethod
+    def column_names(cls) -> Tuple[str, ...]:
+        """The per-alert columns, i.e. every field except the ``symbol_names`` vocabulary."""
+        return tuple(column.name for column in fields(cls) if column.name != "symbol_names")
+
+    def symbol_mask(self, names: Sequence[str]) -> np.ndarray:
+        """Which alerts belong to one of ``names``, compared as codes when the symbols are encoded."""
+        if self.symbol_names is None:
+            return np.isin(self.symbol, list(names))
+        return np.isin(self.symbol, np.flatnonzero(np.isin(self.symbol_names, list(names))))
+
+    def symbols(self) -> np.ndarray:
+        """Symbol names, one per alert."""
+        return self.symbol if self.symbol_names is None else self.symbol_names[self.symbol]
+
+    @classmethod
+    def from_payloads(cls, alerts: Iterable[AlertPayload]) -> "AlertColumns":
+        rows = [
+            (
+                alert.symbol,
+                alert.price,
+                alert.indicators.RSI,
+                alert.indicators.MACD,
+                alert.indicators.EMA20,
+                alert.indicators.ATR,
+                BUY if alert.signal == "buy" else SELL,
+            )
+            for alert in alerts
+        ]
+        if not rows:
+            return cls.empty()
+        symbol, price, rsi, macd, ema20, atr, signal = zip(*rows)
+        return cls(
+            symbol=np.asarray(symbol, dtype=str),
+            price=np.asarray(price, dtype=np.float64),
+            rsi=np.asarray(rsi, dtype=np.float64),
+            macd=np.asarray(macd, dtype=np.float64),
+            ema20=np.asarray(ema20, dtype=np.float64),
+            atr=np.asarray(atr, dtype=np.float64),
+            signal=np.asarray(signal, dtype=np.int8),
+        )
+
+    def save(self, directory: Path) -> Path:
+        """Write one ``.npy`` file per column so other processes can memory-map the dataset."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.symbol_names is None:
+            symbols, codes = np.unique(self.symbol, return_inverse=True)
+        else:
+            symbols, codes = self.symbol_names, self.symbol
+        np.save(directory / "symbols.npy", symbols)
+        np.save(directory / "symbol_code.npy", codes.astype(np.int32))
+        for name in self.column_names():
+            if name != "symbol":
+                np.save(directory / f"{name}.npy", getattr(self, name))
+        return directory
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = "r") -> "AlertColumns":
+        """Load columns written by :meth:`save`, memory-mapped by default.
+
+        Symbols stay as mapped integer codes into the small ``symbol_names`` vocabulary.
+        """
+        directory = Path(directory)
+        numeric = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in cls.column_names() if name != "symbol"
+        }
+        return cls(
+            symbol=np.load(directory / "symbol_code.npy", mmap_mode=mmap_mode),
+            symbol_names=np.load(directory / "symbols.npy"),
+            **numeric,
+        )
+
+    def slice(self, start: int, stop: int) -> "AlertColumns":
+        """Rows ``start:stop`` as views of the same arrays."""
+        return AlertColumns(
+            **{name: getattr(self, name)[start:stop] for name in self.column_names()}, symbol_names=self.symbol_names
+        )
+
+    @classmethod
+    def empty(cls) -> "AlertColumns":
+        floats = np.empty(0, dtype=np.float64)
+        return cls(
+            symbol=np.empty(0, dtype=str),
+            price=floats,
+            rsi=floats,
+            macd=floats,
+            ema20=floats,
+            atr=floats,
+            signal=np.empty(0, dtype=np.int8),
+        )
+
+
+@dataclass
+class ValidationColumns:
+    valid: np.ndarray
+    confidence: np.ndarray
+    reason_mask: Optional[np.ndarray] = None  # bits index RuleTable.reason_names
+
+
+@dataclass
+class DecisionColumns:
+    symbol: np.ndarray
+    action: np.ndarray  # codes into ACTION_CODES
+    size: np.ndarray
+    stop_loss: np.ndarray  # NaN where the scalar path returns None
+    take_profit: np.ndarray
+    confidence: np.ndarray
+    reason: np.ndarray  # codes into REASON_CODES
+    symbol_names: Optional[np.ndarray] = None  # set when symbol holds codes, as in AlertColumns
+
+    def to_trades(self) -> List[TradeDecision]:
+        symbols = self.symbol if self.symbol_names is None else self.symbol_names[self.symbol]
+        return [
+            TradeDecision(
+                action=ACTION_CODES[action],
+                symbol=str(symbol),
+                order_type="market",
+                size=float(size),
+                stop_loss=None if np.isnan(stop) else float(stop),
+                take_profit=None if np.isnan(target) else float(target),
+                confidence=int(confidence),
+                reason=REASON_CODES[reason],
+            )
+            for symbol, action, size, stop, target, confidence, reason in zip(
+                symbols, self.action, self.size, self.stop_loss, self.take_profit, self.confidence, self.reason
+            )
+        ]
+
+
+@dataclass
+class BatchBacktestResult:
+    net_pl: float
+    decisions: DecisionColumns
+    win_rate: float
+    expectancy: float
+    trade_pnl: Optional[np.ndarray] = None  # realized P&L of each entered trade, in alert order
+
+
+def evaluate_batch(
+    alerts: AlertColumns,
+    context: MarketContext,
+    validity_threshold: int = DEFAULT_VALIDITY_THRESHOLD,
+    rules: Optional[RuleTable] = None,
+    timeframe: Optional[np.ndarray] = None,
+    model: Optional["ConfidenceModel"] = None,
+) -> ValidationColumns:
+    """Array form of :meth:`ValidationEngine.evaluate`; scores and reasons match the scalar rules exactly.
+
+    With a ``model`` the whole history is scored in one prediction, as the live engine would.
+    """
+    valid, confidence, reason_mask = compile_rules(rules).evaluate_batch(alerts, context, validity_threshold, timeframe)
+    if model is not None:
+        confidence = model.score_columns(alerts, context)
+        valid = confidence >= validity_threshold
+    return ValidationColumns(valid=valid, confidence=confidence, reason_mask=reason_mask)
+
+
+def _round4(values: np.ndarray) -> np.ndarray:
+    """Round to 4 decimals with the same result as the builtin ``round``.
+
+    ``np.round`` scales by 10**4 first, which can disagree with ``round`` on values that sit
+    next to a rounding boundary, so those few elements are re-rounded in Python.
+    """
+    rounded = np.round(values, 4)
+    scaled = values * 1e4
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_half):
+        rounded[index] = round(float(values[index]), 4)
+    return rounded
+
+
+def decide_batch(
+    alerts: AlertColumns,
+    validation: ValidationColumns,
+    risk_state: RiskState,
+    settings: Settings,
+    confidence_cutoff: int = DEFAULT_CONFIDENCE_CUTOFF,
+) -> DecisionColumns:
+    """Array form of :meth:`DecisionEngine.decide` for a fixed risk state."""
+    daily_loss_hit = risk_state.daily_loss_fraction >= settings.max_daily_loss
+    blocked_symbols = [
+        symbol for symbol, exposure in risk_state.open_positions.items() if exposure >= settings.max_symbol_exposure
+    ]
+    exposure_hit = alerts.symbol_mask(blocked_symbols) if blocked_symbols else np.zeros(len(alerts), dtype=bool)
+    # Same precedence as the early returns in DecisionEngine.decide
+    reason = np.select(
+        [~validation.valid, np.full(len(alerts), daily_loss_hit), exposure_hit, validation.confidence < confidence_cutoff],
+        [1, 2, 3, 4],
+        default=0,
+    ).astype(np.int8)
+    enter = reason == 0
+
+    direction = alerts.signal.astype(np.float64)
+    risk_multiple = 2.0
+    stop_loss = alerts.price - direction * (2 * alerts.atr)
+    take_profit = alerts.price + direction * (risk_multiple * 2 * alerts.atr)
+
+    risk_per_trade = settings.account_equity * settings.max_risk_per_trade
+    price_distance = np.abs(alerts.price - stop_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_size = risk_per_trade / price_distance
+        max_size = settings.account_equity * settings.max_symbol_exposure / alerts.price
+    size = np.where(price_distance == 0, 0.0, _round4(np.minimum(raw_size, max_size)))
+
+    action = np.where(alerts.signal == BUY, LONG_CODE, SHORT_CODE).astype(np.int8)
+    return DecisionColumns(
+        symbol=alerts.symbol,
+        action=np.where(enter, action, IGNORE_CODE).astype(np.int8),
+        size=np.where(enter, size, 0.0),
+        stop_loss=np.where(enter, stop_loss, np.nan),
+        take_profit=np.where(enter, take_profit, np.nan),
+        confidence=validation.confidence,
+        reason=reason,
+        symbol_names=alerts.symbol_names,
+    )
+
+
+def summarize_batch(decisions: DecisionColumns) -> BatchBacktestResult:
+    """Aggregate P&L with the same sequential summation order as :meth:`Backtester.run`."""
+    traded = decisions.action != IGNORE_CODE
+    spread = decisions.take_profit[traded] - decisions.stop_loss[traded]
+    long_trade = decisions.action[traded] == LONG_CODE
+    profit = np.where(long_trade, decisions.size[traded] * spread, decisions.size[traded] * -spread)
+    realized = profit * (decisions.confidence[traded] / 100)
+
+    total = len(decisions.action)
+    # cumsum adds left to right, so the total is bit-identical to the scalar loop
+    net_pl = float(np.cumsum(realized)[-1]) if len(realized) else 0.0
+    wins = int(np.count_nonzero(realized > 0))
+    return BatchBacktestResult(
+        net_pl=net_pl,
+        decisions=decisions,
+        win_rate=wins / total if total else 0.0,
+        expectancy=net_pl / total if total else 0.0,
+        trade_pnl=realized,
+    )
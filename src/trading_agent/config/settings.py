@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from pydantic import BaseSettings, Field
+from typing import Optional
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
     database_url: str = Field(default_factory=lambda: f"sqlite:///{Path('data').absolute() / 'trading_agent.db'}")
     environment: str = Field("development", description="Execution environment")
     paper_trading: bool = Field(True, description="Enable paper trading mode")
@@ -12,11 +18,55 @@ class Settings(BaseSettings):
     max_daily_loss: float = Field(0.05, description="Max fraction of equity that can be lost in a day")
     max_symbol_exposure: float = Field(0.2, description="Max fraction of equity exposed to a single symbol")
     account_equity: float = Field(10000.0, description="Paper account equity for sizing")
-
-    class Config:
-        env_file = ".env"
-        extra = "ignore"
+    persistence_workers: int = Field(4, description="Threads used to run blocking database writes off the event loop")
+    db_pool_size: int = Field(5, description="Connections kept open in the shared engine pool")
+    db_max_overflow: int = Field(10, description="Extra connections allowed beyond the pool size under load")
+    db_pool_pre_ping: bool = Field(True, description="Check pooled connections for liveness before use")
+    webhook_batch_window_ms: float = Field(2.0, description="How long /webhook waits to group concurrent alerts; 0 disables micro-batching")
+    webhook_batch_max_size: int = Field(100, description="Largest micro-batch of /webhook alerts processed together")
+    exchange_base_url: Optional[str] = Field(None, description="Base URL of the exchange order API used when paper trading is off")
+    exchange_timeout_seconds: float = Field(10.0, description="Timeout for a single exchange request")
+    order_concurrency: int = Field(4, description="Max exchange requests in flight at once")
+    order_rate_limit_per_second: float = Field(10.0, description="Max exchange requests started per second")
+    order_queue_size: int = Field(100, description="Max queued orders per symbol before new ones are rejected")
+    order_max_retries: int = Field(3, description="Retries for retryable exchange failures")
+    order_retry_backoff_seconds: float = Field(0.2, description="Initial retry delay, doubled on every attempt")
+    context_seed_days: float = Field(7.0, description="Days of stored alerts replayed into the market context at startup")
+    idempotency_cache_size: int = Field(10_000, description="Recent alert results kept in memory for duplicate webhooks")
+    idempotency_ttl_seconds: float = Field(3600.0, description="How long a duplicate webhook is answered from memory")
+    decision_cache_size: int = Field(0, description="Entry levels memoized by (price, ATR, signal); 0 disables the cache")
+    decision_price_quantum: Optional[float] = Field(None, description="Round prices to this step before the decision cache lookup")
+    decision_atr_quantum: Optional[float] = Field(None, description="Round ATR to this step before the decision cache lookup")
+    audit_write_behind: bool = Field(True, description="Commit validation, decision and order rows from a background writer instead of the webhook")
+    audit_log_path: Optional[str] = Field(
+        default_factory=lambda: str(Path("data").absolute() / "audit.log"),
+        description="Append-only log of audit records not yet committed, replayed at startup; empty keeps them in memory only",
+    )
+    audit_log_fsync: bool = Field(False, description="fsync the audit log on every write, to survive power loss as well as crashes")
+    audit_queue_size: int = Field(10_000, description="Audit records waiting for the writer before webhooks are made to wait")
+    audit_batch_max_size: int = Field(500, description="Most audit records committed in one transaction")
+    audit_flush_interval_ms: float = Field(50.0, description="How long the audit writer gathers records into one commit")
+    market_data_feed: Optional[str] = Field(
+        None, description="host:port of a JSON-lines tick or bar feed; alerts' indicators are cross-checked against candles built from it"
+    )
+    candle_timeframes: str = Field("1m,5m,15m,1h", description="Comma-separated timeframes aggregated from the market data feed")
+    candle_capacity: int = Field(10_000, description="Closed candles kept in memory per symbol and timeframe")
+    confidence_model_path: Optional[str] = Field(
+        None, description="XGBoost model file scoring alert confidence instead of the rule weights (needs the `ml` extra)"
+    )
+    auto_create_schema: bool = Field(False, description="Create missing tables at API startup instead of running `python -m trading_agent.migrate`")
+    worker_index: int = Field(0, description="This process's index among the serving workers")
+    worker_count: int = Field(1, description="Serving worker processes; symbols are sharded across them when above 1")
+    worker_socket_dir: str = Field("/tmp/trading-agent", description="Directory holding each worker's Unix socket for forwarded alerts")
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Return the process-wide settings, loading the environment and `.env` only on first use."""
     return Settings()
+
+
+def reload_settings() -> Settings:
+    """Drop the cached settings and load them again from the environment."""
+    get_settings.cache_clear()
+    return get_settings()
@@ -1,26 +1,97 @@
 from __future__ import annotations
 
+import threading
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from typing import Any, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from trading_agent.config.settings import get_settings
+from trading_agent.config.settings import Settings, get_settings
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_engine():
-    settings = get_settings()
-    return create_engine(settings.database_url, future=True)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_configured_engine(settings: Settings) -> Engine:
+    url = settings.database_url
+    kwargs: dict[str, Any] = {"future": True, "pool_pre_ping": settings.db_pool_pre_ping}
+    # In-memory SQLite uses a single-connection pool that does not accept sizing arguments
+    if not _is_memory_sqlite(url):
+        kwargs.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+
+    engine = create_engine(url, **kwargs)
+    if make_url(url).get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def get_engine() -> Engine:
+    """Return the shared engine, creating it from the current settings on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                # Bind the session factory before publishing the engine: readers that see
+                # _engine set skip the lock and may open a session straight away
+                engine = create_configured_engine(get_settings())
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def reset_engine() -> None:
+    """Dispose of the shared engine so the next :func:`get_engine` call rebuilds it from settings."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def create_schema(engine: Optional[Engine] = None) -> None:
+    """Create any missing tables; run once per deployment, not in every serving process."""
+    import trading_agent.models.entities  # noqa: F401 - register tables on Base.metadata
+
+    Base.metadata.create_all(bind=engine or get_engine())
 
 
-SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False, future=True)
+# Bound by get_engine() on first use, so importing this module opens nothing
+SessionLocal = sessionmaker(autoflush=False, autocommit=False, future=True)
 
 
 @contextmanager
 def session_scope():
+    if _engine is None:
+        get_engine()
     session = SessionLocal()
     try:
         yield session
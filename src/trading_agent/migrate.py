@@ -0,0 +1,175 @@
+"""Create the database schema, or bring an existing one up to the models.
+
+Serving processes never touch the schema, so run this once per deployment (and after
+upgrades) before starting the API. Missing tables are created. Existing tables get:
+
+- missing nullable columns (``ALTER TABLE ... ADD COLUMN``);
+- missing foreign keys: added in place where the database supports it, while SQLite tables
+  are rebuilt (copy into a new table, drop, rename) with foreign key checks suspended;
+- missing indexes and unique constraints, the latter as unique indexes.
+
+Nothing is dropped from the data. A unique index that existing duplicate rows violate, or a
+missing NOT NULL column, stops the migration with an error to resolve by hand.
+
+Usage::
+
+    python -m trading_agent.migrate
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import TYPE_CHECKING, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+def migrate() -> List[str]:
+    """Bring the configured database up to the models.
+
+    Returns what was created: table names, and ``table.column``, ``table.foreign_keys`` and
+    ``table.<index name>`` for changes to existing tables.
+    """
+    from sqlalchemy import inspect
+
+    from trading_agent.db.database import Base, create_schema, get_engine
+
+    engine = get_engine()
+    existing = set(inspect(engine).get_table_names())
+    create_schema(engine)
+    created = [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+    upgraded = [table for table in Base.metadata.sorted_tables if table.name in existing]
+    if not upgraded:
+        return created
+
+    with engine.connect() as connection:
+        sqlite = engine.dialect.name == "sqlite"
+        if sqlite:
+            # Must be switched outside a transaction; the rebuild drops tables others refer to
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+        try:
+            with connection.begin():
+                for table in upgraded:
+                    created.extend(_add_columns(connection, table))
+                    created.extend(_add_foreign_keys(connection, table, rebuild=sqlite))
+                    created.extend(_add_indexes(connection, table))
+                if sqlite:
+                    violations = connection.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+                    if violations:
+                        raise RuntimeError(f"Existing rows violate foreign keys: {violations[:10]}")
+        finally:
+            if sqlite:
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+                connection.commit()
+    return created
+
+
+def _add_columns(connection: Connection, table: Table) -> List[str]:
+    from sqlalchemy import inspect, text
+
+    quote = connection.dialect.identifier_preparer.quote
+    present = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name in present:
+            continue
+        if not column.nullable:
+            raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} to existing rows")
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+        added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _add_foreign_keys(connection: Connection, table: Table, rebuild: bool) -> List[str]:
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import AddConstraint
+
+    present = {
+        (tuple(fk["constrained_columns"]), fk["referred_table"]) for fk in inspect(connection).get_foreign_keys(table.name)
+    }
+    missing = [
+        constraint
+        for constraint in table.foreign_key_constraints
+        if (tuple(constraint.column_keys), constraint.referred_table.name) not in present
+    ]
+    if not missing:
+        return []
+    if rebuild:
+        _rebuild_sqlite_table(connection, table)
+    else:
+        for constraint in missing:
+            connection.execute(AddConstraint(constraint))
+    return [f"{table.name}.foreign_keys"]
+
+
+def _rebuild_sqlite_table(connection: Connection, table: Table) -> None:
+    """SQLite cannot add constraints to a table, so copy its rows into a fresh one."""
+    from sqlalchemy import MetaData, inspect
+    from sqlalchemy.schema import CreateTable
+
+    quote = connection.dialect.identifier_preparer.quote
+    # A copy of the whole schema, so the new table's foreign keys resolve
+    metadata = MetaData()
+    for other in table.metadata.sorted_tables:
+        other.to_metadata(metadata)
+    replacement = table.to_metadata(metadata, name=f"_migrate_{table.name}")
+    replacement.indexes.clear()  # the model's index names are still taken by the old table
+
+    columns = ", ".join(quote(column["name"]) for column in inspect(connection).get_columns(table.name))
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {quote(replacement.name)}")
+    connection.execute(CreateTable(replacement))
+    connection.exec_driver_sql(
+        f"INSERT INTO {quote(replacement.name)} ({columns}) SELECT {columns} FROM {quote(table.name)}"
+    )
+    connection.exec_driver_sql(f"DROP TABLE {quote(table.name)}")
+    connection.exec_driver_sql(f"ALTER TABLE {quote(replacement.name)} RENAME TO {quote(table.name)}")
+
+
+def _add_indexes(connection: Connection, table: Table) -> List[str]:
+    from sqlalchemy import Index, UniqueConstraint, inspect
+    from sqlalchemy.exc import IntegrityError
+
+    inspector = inspect(connection)
+    indexes = inspector.get_indexes(table.name)
+    names = {index["name"] for index in indexes}
+    unique: Set[Tuple[str, ...]] = {tuple(index["column_names"]) for index in indexes if index["unique"]}
+    unique |= {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table.name)}
+
+    wanted = [index for index in table.indexes if index.name not in names]
+    for constraint in table.constraints:
+        columns = tuple(column.name for column in constraint.columns)
+        if isinstance(constraint, UniqueConstraint) and columns not in unique:
+            wanted.append(Index(f"uq_{table.name}_{'_'.join(columns)}", *constraint.columns, unique=True))
+
+    added = []
+    for index in wanted:
+        try:
+            with connection.begin_nested():
+                index.create(connection, checkfirst=True)
+        except IntegrityError as exc:
+            raise RuntimeError(f"Cannot create unique index {index.name}: existing rows hold duplicates") from exc
+        added.append(f"{table.name}.{index.name}")
+    return added
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Create missing tables, columns, keys and indexes in DATABASE_URL.")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    created = migrate()
+    if created:
+        logger.info("Created: %s", ", ".join(created))
+    else:
+        logger.info("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Enum as SAEnum, Float, Integer, JSON, String
+from sqlalchemy import Boolean, Column, Date, DateTime, Enum as SAEnum, Float, ForeignKey, Index, Integer, JSON, String
+from sqlalchemy.orm import Mapped, relationship
 
 from trading_agent.db.database import Base
 
@@ -17,6 +18,10 @@ class SignalAction(str, Enum):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_symbol_created_at", "symbol", "created_at"),
+        Index("ix_alerts_created_at", "created_at"),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
     symbol: str = Column(String, nullable=False)
@@ -24,25 +29,33 @@ class Alert(Base):
     signal: str = Column(String, nullable=False)
     timeframe: str = Column(String, nullable=False)
     indicators: dict = Column(JSON, nullable=False)
+    # Fingerprint or caller-supplied alert ID; unique so a duplicate webhook can never be stored twice
+    idempotency_key: Optional[str] = Column(String, unique=True)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    validations: Mapped[List["ValidationResult"]] = relationship(back_populates="alert", order_by="ValidationResult.id")
+    decisions: Mapped[List["Decision"]] = relationship(back_populates="alert", order_by="Decision.id")
+
 
 class ValidationResult(Base):
     __tablename__ = "validation_results"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    alert_id: int = Column(Integer, nullable=False)
+    alert_id: int = Column(Integer, ForeignKey("alerts.id"), nullable=False, index=True)
     valid: bool = Column(Boolean, default=False)
     confidence: int = Column(Integer, default=0)
     reasons: list[str] = Column(JSON, default=list)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    alert: Mapped["Alert"] = relationship(back_populates="validations")
+
 
 class Decision(Base):
     __tablename__ = "decisions"
+    __table_args__ = (Index("ix_decisions_symbol_created_at", "symbol", "created_at"),)
 
     id: int = Column(Integer, primary_key=True, index=True)
-    alert_id: int = Column(Integer, nullable=False)
+    alert_id: int = Column(Integer, ForeignKey("alerts.id"), nullable=False, index=True)
     action: SignalAction = Column(SAEnum(SignalAction), nullable=False)
     symbol: str = Column(String, nullable=False)
     order_type: str = Column(String, nullable=False)
@@ -52,27 +65,66 @@ class Decision(Base):
     confidence: int = Column(Integer, default=0)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    alert: Mapped["Alert"] = relationship(back_populates="decisions")
+    orders: Mapped[List["Order"]] = relationship(back_populates="decision", order_by="Order.id")
+
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_status", "status"),)
 
     id: int = Column(Integer, primary_key=True, index=True)
-    decision_id: int = Column(Integer, nullable=False)
+    decision_id: int = Column(Integer, ForeignKey("decisions.id"), nullable=False, index=True)
+    client_order_id: Optional[str] = Column(String, unique=True)
     exchange_order_id: Optional[str] = Column(String)
     status: str = Column(String, default="pending")
     filled_size: float = Column(Float, default=0.0)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    decision: Mapped["Decision"] = relationship(back_populates="orders")
+
 
 class Position(Base):
     __tablename__ = "positions"
+    __table_args__ = (Index("ix_positions_open_symbol", "open", "symbol"),)
 
     id: int = Column(Integer, primary_key=True, index=True)
+    # The entry that opened it; NULL for positions opened before positions were linked to decisions
+    decision_id: Optional[int] = Column(Integer, ForeignKey("decisions.id"), index=True)
     symbol: str = Column(String, nullable=False)
-    size: float = Column(Float, nullable=False)
+    size: float = Column(Float, nullable=False)  # negative for short positions
     entry_price: float = Column(Float, nullable=False)
     stop_loss: Optional[float] = Column(Float)
     take_profit: Optional[float] = Column(Float)
     open: bool = Column(Boolean, default=True)
+    realized_pnl: Optional[float] = Column(Float)
     created_at: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
     closed_at: Optional[datetime] = Column(DateTime)
+
+
+class PerformanceRollup(Base):
+    """Totals for one symbol, UTC day and alert timeframe, kept current by :mod:`trading_agent.services.rollups`.
+
+    Decision and order figures count on the day the decision was made; realized P&L counts on
+    the day its position closed.
+    """
+
+    __tablename__ = "performance_rollups"
+    __table_args__ = (Index("ix_performance_rollups_day", "day"),)
+
+    symbol: str = Column(String, primary_key=True)
+    day: date = Column(Date, primary_key=True)
+    timeframe: str = Column(String, primary_key=True)
+    decisions: int = Column(Integer, nullable=False, default=0)
+    entries: int = Column(Integer, nullable=False, default=0)
+    long_entries: int = Column(Integer, nullable=False, default=0)
+    confidence_sum: int = Column(Integer, nullable=False, default=0)
+    orders: int = Column(Integer, nullable=False, default=0)
+    filled_orders: int = Column(Integer, nullable=False, default=0)
+    filled_size: float = Column(Float, nullable=False, default=0.0)
+    gross_notional: float = Column(Float, nullable=False, default=0.0)  # filled size x alert price
+    net_notional: float = Column(Float, nullable=False, default=0.0)  # the same, negative for shorts
+    closed_positions: int = Column(Integer, nullable=False, default=0)
+    winning_positions: int = Column(Integer, nullable=False, default=0)
+    realized_pnl: float = Column(Float, nullable=False, default=0.0)
+    updated_at: datetime = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
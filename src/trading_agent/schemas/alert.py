@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
-from typing import Dict
+from typing import Annotated, Dict, List, NamedTuple, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
+INDICATOR_NAMES = ("RSI", "MACD", "EMA20", "ATR")
+SYMBOL_PATTERN = "^(ETH|BTC-USD|SOL)$"
+SIGNAL_PATTERN = "^(buy|sell)$"
 
 
 class IndicatorPayload(BaseModel):
@@ -14,15 +20,17 @@ class IndicatorPayload(BaseModel):
 
 
 class AlertPayload(BaseModel):
-    symbol: str = Field(..., pattern="^(ETH|BTC-USD|SOL)$")
+    symbol: str = Field(..., pattern=SYMBOL_PATTERN)
     price: float
-    signal: str = Field(..., pattern="^(buy|sell)$")
+    signal: str = Field(..., pattern=SIGNAL_PATTERN)
     timeframe: str
     indicators: IndicatorPayload
     timestamp: datetime | None = Field(default=None, description="Optional timestamp from TradingView")
 
 
 class StoredAlert(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     symbol: str
@@ -31,5 +39,114 @@ class StoredAlert(BaseModel):
     timeframe: str
     indicators: Dict[str, float]
 
-    class Config:
-        orm_mode = True
+
+class ParsedIndicators(NamedTuple):
+    """Tuple form of :class:`IndicatorPayload` used on the webhook hot path."""
+
+    RSI: float
+    MACD: float
+    EMA20: float
+    ATR: float
+
+
+class ParsedAlert(NamedTuple):
+    """Tuple form of :class:`AlertPayload` with the same attribute names.
+
+    The engines only read attributes, so they accept either type. Building a tuple is cheaper
+    than building two models, and attribute reads on it are several times faster.
+    """
+
+    symbol: str
+    price: float
+    signal: str
+    timeframe: str
+    indicators: ParsedIndicators
+    timestamp: Optional[datetime] = None
+
+    @classmethod
+    def from_payload(cls, payload: AlertPayload) -> "ParsedAlert":
+        i = payload.indicators
+        return cls(
+            payload.symbol,
+            payload.price,
+            payload.signal,
+            payload.timeframe,
+            ParsedIndicators(i.RSI, i.MACD, i.EMA20, i.ATR),
+            payload.timestamp,
+        )
+
+    def to_payload(self) -> AlertPayload:
+        return AlertPayload(
+            symbol=self.symbol,
+            price=self.price,
+            signal=self.signal,
+            timeframe=self.timeframe,
+            indicators=IndicatorPayload(**self.indicators._asdict()),
+            timestamp=self.timestamp,
+        )
+
+
+AnyAlert = Union[AlertPayload, ParsedAlert]
+
+
+class _IndicatorFields(TypedDict):
+    RSI: float
+    MACD: float
+    EMA20: float
+    ATR: float
+
+
+class _AlertFields(TypedDict):
+    # Same field constraints as AlertPayload, so validation errors are unchanged
+    symbol: Annotated[str, Field(pattern=SYMBOL_PATTERN)]
+    price: float
+    signal: Annotated[str, Field(pattern=SIGNAL_PATTERN)]
+    timeframe: str
+    indicators: _IndicatorFields
+    timestamp: NotRequired[Optional[datetime]]
+
+
+# Validating into TypedDicts runs entirely in pydantic-core and yields plain dicts, which is
+# cheaper than instantiating the two models; the tuples are then built without re-checking
+_ALERT = TypeAdapter(_AlertFields)
+_ALERT_LIST = TypeAdapter(List[_AlertFields])
+_new_tuple = tuple.__new__
+
+
+def _to_parsed(fields: dict) -> ParsedAlert:
+    i = fields["indicators"]
+    indicators = _new_tuple(ParsedIndicators, (i["RSI"], i["MACD"], i["EMA20"], i["ATR"]))
+    return _new_tuple(
+        ParsedAlert,
+        (fields["symbol"], fields["price"], fields["signal"], fields["timeframe"], indicators, fields.get("timestamp")),
+    )
+
+
+def decode_alert(body: bytes) -> ParsedAlert:
+    """Validate one raw webhook body straight into a :class:`ParsedAlert`.
+
+    Raises the same :class:`pydantic.ValidationError` as ``AlertPayload.model_validate_json``.
+    """
+    return _to_parsed(_ALERT.validate_json(body))
+
+
+def decode_alerts(body: bytes) -> List[ParsedAlert]:
+    """Validate a JSON array of webhook bodies; see :func:`decode_alert`."""
+    return [_to_parsed(fields) for fields in _ALERT_LIST.validate_json(body)]
+
+
+def encode_alerts(alerts: List[ParsedAlert]) -> bytes:
+    """Serialize alerts back into a ``decode_alerts`` body, e.g. to hand them to another worker."""
+    return json.dumps(
+        [
+            {
+                "symbol": alert.symbol,
+                "price": alert.price,
+                "signal": alert.signal,
+                "timeframe": alert.timeframe,
+                "indicators": alert.indicators._asdict(),
+                "timestamp": alert.timestamp.isoformat() if alert.timestamp is not None else None,
+            }
+            for alert in alerts
+        ]
+    ).encode()
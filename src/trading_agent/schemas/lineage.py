@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from trading_agent.schemas.pipeline import Action
+
+
+class OrderRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    client_order_id: Optional[str]
+    exchange_order_id: Optional[str]
+    status: str
+    filled_size: float
+    created_at: datetime
+
+
+class DecisionRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    action: Action
+    symbol: str
+    order_type: str
+    size: float
+    stop_loss: Optional[float]
+    take_profit: Optional[float]
+    confidence: int
+    created_at: datetime
+    orders: List[OrderRecord]
+
+
+class ValidationRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    valid: bool
+    confidence: int
+    reasons: List[str]
+    created_at: datetime
+
+
+class AlertLineage(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    symbol: str
+    price: float
+    signal: str
+    timeframe: str
+    indicators: Dict[str, float]
+    created_at: datetime
+    validations: List[ValidationRecord]
+    decisions: List[DecisionRecord]
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ValidationResultSchema(BaseModel):
@@ -13,6 +13,40 @@ class ValidationResultSchema(BaseModel):
     reasons: List[str] = Field(default_factory=list)
 
 
+class ReasonNames(tuple):
+    """Reason strings indexed by bit; expansions are memoized, as only a few masks ever occur."""
+
+    def __new__(cls, names):
+        self = super().__new__(cls, names)
+        self._expanded = {}
+        return self
+
+    def expand(self, mask: int) -> List[str]:
+        names = self._expanded.get(mask)
+        if names is None:
+            names = self._expanded[mask] = tuple(name for index, name in enumerate(self) if mask >> index & 1)
+        return list(names)
+
+
+class ValidationVerdict(NamedTuple):
+    """What a compiled rule table returns: reasons stay a bitmask until ``reasons`` is read."""
+
+    valid: bool
+    confidence: int
+    reason_mask: int
+    reason_names: ReasonNames  # shared by every verdict from the same table
+
+    @property
+    def reasons(self) -> List[str]:
+        return self.reason_names.expand(self.reason_mask)
+
+    def to_schema(self) -> ValidationResultSchema:
+        return ValidationResultSchema(valid=self.valid, confidence=self.confidence, reasons=self.reasons)
+
+
+AnyValidation = Union[ValidationResultSchema, ValidationVerdict]
+
+
 class Action(str, Enum):
     ENTER_LONG = "ENTER_LONG"
     ENTER_SHORT = "ENTER_SHORT"
@@ -20,6 +54,9 @@ class Action(str, Enum):
 
 
 class TradeDecision(BaseModel):
+    # Frozen so a DecisionCache can hand the same instance to every alert it matches
+    model_config = ConfigDict(frozen=True)
+
     action: Action
     symbol: str
     order_type: str
@@ -27,11 +64,13 @@ class TradeDecision(BaseModel):
     stop_loss: Optional[float]
     take_profit: Optional[float]
     confidence: int
+    reason: Optional[str] = Field(default=None, description="Why the decision was ignored, if it was")
 
 
 class ExecutionResult(BaseModel):
     success: bool
     order_id: Optional[str]
+    client_order_id: Optional[str] = None
     status: str
     executed_size: float
     error: Optional[str] = None
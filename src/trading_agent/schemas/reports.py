@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, computed_field
+
+
+class PerformanceTotals(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    symbol: str
+    decisions: int
+    entries: int
+    long_entries: int
+    confidence_sum: int
+    orders: int
+    filled_orders: int
+    filled_size: float
+    gross_notional: float
+    net_notional: float
+    closed_positions: int
+    winning_positions: int
+    realized_pnl: float
+
+    @computed_field
+    @property
+    def average_confidence(self) -> Optional[float]:
+        return self.confidence_sum / self.decisions if self.decisions else None
+
+    @computed_field
+    @property
+    def win_rate(self) -> Optional[float]:
+        return self.winning_positions / self.closed_positions if self.closed_positions else None
+
+
+class DailyPerformance(PerformanceTotals):
+    day: date
+    timeframe: str
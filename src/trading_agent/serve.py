@@ -0,0 +1,100 @@
+"""Multi-process serving with symbols sharded across workers.
+
+The launcher creates the schema once, binds the public TCP socket and starts ``--workers``
+uvicorn processes that all accept on it. Each worker also listens on its own Unix socket;
+alerts that land on a worker that does not own their symbol are forwarded there (see
+:class:`trading_agent.services.sharding.ShardRouter`).
+
+Usage::
+
+    python -m trading_agent.serve --workers 4 --host 0.0.0.0 --port 8000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+APP = "trading_agent.api.main:app"
+
+
+def _bind_unix_socket(path: Path) -> socket.socket:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    sock.listen(2048)
+    return sock
+
+
+def _run_worker(index: int, count: int, socket_dir: str, listener: socket.socket, log_level: str) -> None:
+    # Settings are read on first import, so the worker's identity has to be in the environment first
+    os.environ.update(
+        WORKER_INDEX=str(index),
+        WORKER_COUNT=str(count),
+        WORKER_SOCKET_DIR=socket_dir,
+        AUTO_CREATE_SCHEMA="false",
+    )
+    from trading_agent.services.sharding import worker_socket_path
+
+    private = _bind_unix_socket(worker_socket_path(socket_dir, index))
+    config = uvicorn.Config(APP, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[listener, private])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the webhook API from several worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket-dir", help="directory for the workers' Unix sockets (default: WORKER_SOCKET_DIR)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    from trading_agent.config.settings import get_settings
+    from trading_agent.db.database import reset_engine
+    from trading_agent.migrate import migrate
+
+    socket_dir = args.socket_dir or get_settings().worker_socket_dir
+    migrate()
+    # Workers open their own connections; don't hand them pooled ones across fork/spawn
+    reset_engine()
+
+    listener = uvicorn.Config(APP, host=args.host, port=args.port).bind_socket()
+    context = multiprocessing.get_context("spawn")
+    workers: List[multiprocessing.Process] = [
+        context.Process(
+            target=_run_worker,
+            args=(index, args.workers, socket_dir, listener, args.log_level),
+            name=f"trading-agent-worker-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info("Started %d workers on %s:%d", args.workers, args.host, args.port)
+
+    def stop(signum, _frame) -> None:
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for worker in workers:
+        worker.join()
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, List, Optional, Sequence
+
+from sqlalchemy.exc import OperationalError
+
+from trading_agent.config.settings import Settings
+from trading_agent.services.metrics import AUDIT_DEAD_LETTERS
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.persistence import get_persistence_executor, order_status_record, write_audit_records
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def read_log(path: Path) -> List[dict[str, Any]]:
+    """Records in an audit log; a torn last line from a crash mid-write is ignored."""
+    records = []
+    with open(path, "rb") as log:
+        for line in log:
+            if not line.endswith(b"\n"):
+                logger.warning("Ignoring incomplete last record in %s", path)
+                break
+            records.append(json.loads(line))
+    return records
+
+
+class AuditWriter:
+    """Write-behind for the audit rows of a webhook: validation, decision, order and position.
+
+    :meth:`submit` appends records to a local log file (when ``log_path`` is set) and queues
+    them; a background task group-commits whatever accumulated within ``flush_interval``, up
+    to ``max_batch`` records per transaction. When ``max_pending`` records are waiting,
+    :meth:`submit` blocks, pushing back on the webhooks. Once every logged record is in the
+    database the log is truncated, so after a crash it holds at most the records that may not
+    have been committed; :meth:`recover` replays them idempotently at the next start.
+
+    Order status updates go through the same queue, so they always land after their order
+    row. One that arrives before its order was even submitted is retried with the following
+    batches for ``status_retry_seconds``.
+
+    Only ``OperationalError`` (lost connections, lock timeouts) is retried. Any other failure
+    means some record in the batch can never be written: the batch is split in halves until
+    the offending records are isolated, and those are appended to ``<log>.dead`` (and counted
+    in ``trading_agent_audit_dead_letters``) so the rest still commits.
+    """
+
+    def __init__(
+        self,
+        log_path: Optional[Path] = None,
+        max_pending: int = 10_000,
+        max_batch: int = 500,
+        flush_interval: float = 0.05,
+        fsync: bool = False,
+        status_retry_seconds: float = 5.0,
+    ):
+        self.log_path = Path(log_path) if log_path is not None else None
+        self.dead_letter_path = self.log_path.with_name(self.log_path.name + ".dead") if self.log_path is not None else None
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.status_retry_seconds = status_retry_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._log: Optional[BinaryIO] = None
+        self._log_lock = threading.Lock()  # the webhook logs from persistence threads
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._logged = 0  # records in the log file since it was last truncated
+        self._committed = 0  # of those, records taken off the queue and committed, dead-lettered or held
+        self._unmatched: List[tuple[float, dict[str, Any]]] = []
+        self.committed_total = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["AuditWriter"]:
+        if not settings.audit_write_behind:
+            return None
+        log_path = None
+        if settings.audit_log_path:
+            log_path = Path(settings.audit_log_path)
+            if settings.worker_count > 1:
+                # One log per worker: each replays only its own records
+                log_path = log_path.with_name(f"{log_path.name}.{settings.worker_index}")
+        return cls(
+            log_path,
+            max_pending=settings.audit_queue_size,
+            max_batch=settings.audit_batch_max_size,
+            flush_interval=settings.audit_flush_interval_ms / 1000,
+            fsync=settings.audit_log_fsync,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def recover(self) -> int:
+        """Commit records left in the log by a previous run; call before :meth:`start`."""
+        if self.log_path is None or not self.log_path.exists():
+            return 0
+        records = read_log(self.log_path)
+        for start in range(0, len(records), self.max_batch):
+            unmatched = write_audit_records(records[start : start + self.max_batch], skip_applied=True)
+            for record in unmatched:
+                logger.warning("No order row for client order id %s; status not replayed", record["client_order_id"])
+        self.log_path.write_bytes(b"")
+        if records:
+            logger.info("Replayed %d audit records from %s", len(records), self.log_path)
+        return len(records)
+
+    async def start(self) -> None:
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(self.log_path, "ab")
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    def log(self, records: Sequence[dict[str, Any]]) -> None:
+        """Append records to the log without queueing them; safe to call from any thread.
+
+        The webhook logs its records inside the alert transaction, so an alert row never
+        commits without them, and then passes them to :meth:`submit` with ``logged=True``.
+        """
+        if self._stopping:
+            raise RuntimeError("AuditWriter is closed")
+        if self._log is None or not records:
+            return
+        with self._log_lock:
+            self._log.write(b"".join(json.dumps(record).encode() + b"\n" for record in records))
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._logged += len(records)
+
+    async def submit(self, records: Sequence[dict[str, Any]], logged: bool = False) -> None:
+        if self._stopping:
+            raise RuntimeError("AuditWriter is closed")
+        # Logged before queueing, so a record can never be committed (and truncated away) unlogged
+        if not logged:
+            self.log(records)
+        for record in records:
+            await self._queue.put(record)
+
+    async def submit_status(self, status_update: OrderStatusUpdate) -> None:
+        await self.submit([order_status_record(status_update)])
+
+    async def close(self) -> None:
+        """Commit everything queued, then truncate the log unless a commit failed."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write_isolating(self, records: List[dict[str, Any]], skip_applied: bool) -> List[dict[str, Any]]:
+        """Commit ``records``, bisecting around any that fail for a reason other than the database being unavailable."""
+        try:
+            return write_audit_records(records, skip_applied=skip_applied)
+        except OperationalError:
+            raise
+        except Exception:
+            if len(records) == 1:
+                self._dead_letter(records[0])
+                return []
+            middle = len(records) // 2
+            # Halves commit separately and in order, so inserts still precede later status updates
+            return self._write_isolating(records[:middle], skip_applied) + self._write_isolating(
+                records[middle:], skip_applied
+            )
+
+    def _dead_letter(self, record: dict[str, Any]) -> None:
+        logger.exception("Dropping audit record that cannot be committed: %s", record)
+        AUDIT_DEAD_LETTERS.labels(record.get("kind", "unknown")).inc()
+        if self.dead_letter_path is not None:
+            with open(self.dead_letter_path, "ab") as dead:
+                dead.write(json.dumps(record).encode() + b"\n")
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                await self._commit([])
+                return
+            if self._queue.qsize() < self.max_batch - 1 and not self._stopping:
+                try:  # let the group grow, unless close() wants everything now
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [first]
+            stop = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                record = self._queue.get_nowait()
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+            if not await self._commit(batch) and self._stopping:
+                logger.error("Audit records left in %s for replay at the next start", self.log_path)
+                return
+            if stop:
+                await self._commit([])
+                return
+
+    async def _commit(self, batch: List[dict[str, Any]]) -> bool:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        retried = [record for _, record in self._unmatched]
+        records = batch + retried
+        if not records:
+            return True
+        delay = 0.1
+        skip_applied = False
+        while True:
+            try:
+                unmatched = await loop.run_in_executor(
+                    get_persistence_executor(), self._write_isolating, records, skip_applied
+                )
+                break
+            except OperationalError:
+                logger.exception("Failed to commit %d audit records; retrying", len(records))
+                if self._stopping:
+                    return False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                # Part of the batch may have committed before the failure
+                skip_applied = True
+
+        deadlines = {id(record): deadline for deadline, record in self._unmatched}
+        self._unmatched = []
+        for record in unmatched:
+            deadline = deadlines.get(id(record), now + self.status_retry_seconds)
+            if deadline > now and not self._stopping:
+                self._unmatched.append((deadline, record))
+            else:
+                logger.warning(
+                    "No order row for client order id %s; status %s not recorded",
+                    record["client_order_id"],
+                    record["status"],
+                )
+        self.committed_total += len(batch)
+        if self._log is not None:
+            with self._log_lock:
+                self._committed += len(batch)
+                # Held status updates exist only in memory besides the log, so it is kept until they resolve
+                if self._committed >= self._logged and not self._unmatched:
+                    # Everything logged so far is in the database or dead-lettered; start the log afresh
+                    self._log.truncate(0)
+                    self._logged = self._committed = 0
+        return True
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects items submitted concurrently and hands them to ``handler`` in batches.
+
+    A batch closes when ``max_size`` items are waiting or ``window`` seconds after its first
+    item arrived, whichever comes first. ``handler`` must return one result per item, in order;
+    each submitter receives its own result, or the handler's exception.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Awaitable[Sequence[R]]], window: float, max_size: int):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self._handler = handler
+        self._window = window
+        self._max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(), name="micro-batcher")
+
+    async def stop(self) -> None:
+        """Process everything already submitted, then stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, item: T) -> R:
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher is not running")
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[Tuple[T, asyncio.Future]] = [first]
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self._handler([item for item, _ in batch])
+        except Exception as exc:
+            logger.exception("Micro-batch of %d items failed", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
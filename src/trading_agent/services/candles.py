@@ -0,0 +1,322 @@
+"""Candles and indicators built from raw market data, for every configured timeframe at once.
+
+Ticks (or finer bars) are folded into the smallest timeframe; each bar it closes is folded
+into the next larger one, and so on up the chain, so a tick costs the same however many
+timeframes are configured. Indicators are updated once per closed bar from a few running
+sums, never from history:
+
+- ``EMA20`` and ``MACD`` (EMA 12 minus EMA 26 of the close) are exponential averages seeded
+  with the simple average of their first ``period`` values, like TradingView's ``ta.ema``;
+- ``RSI`` and ``ATR`` use Wilder's smoothing seeded the same way, like ``ta.rsi``/``ta.atr``.
+
+Closed bars and their indicator values go into preallocated arrays per (symbol, timeframe),
+which keep the last ``capacity`` bars. Periods without ticks produce no bar.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from trading_agent.backtesting.fills import CandleSeries
+from trading_agent.schemas.alert import ParsedIndicators
+from trading_agent.services.market_context import Candle
+
+DEFAULT_TIMEFRAMES = ("1m", "5m", "15m", "1h")
+
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86_400, "w": 604_800}
+_TIMEFRAME = re.compile(r"^\s*(\d*)\s*([smhdw]?)\s*$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def timeframe_seconds(timeframe: str) -> int:
+    """Length of a timeframe label in seconds: ``"15m"``, ``"1h"``, ``"4H"``, ``"1d"``, ``"D"``.
+
+    A bare number is minutes and a bare unit is one of it, as in TradingView's ``{{interval}}``
+    (``"5"``, ``"240"``, ``"D"``). Raises ValueError for anything else.
+    """
+    match = _TIMEFRAME.match(timeframe)
+    if match is None or not (match.group(1) or match.group(2)):
+        raise ValueError(f"Unrecognized timeframe {timeframe!r}")
+    count = int(match.group(1) or 1)
+    seconds = count * _UNIT_SECONDS[(match.group(2) or "m").lower()]
+    if seconds <= 0:
+        raise ValueError(f"Timeframe {timeframe!r} is empty")
+    return seconds
+
+
+class _Average:
+    """Exponential average seeded with the simple average of its first ``period`` samples."""
+
+    __slots__ = ("alpha", "period", "count", "value")
+
+    def __init__(self, period: int, alpha: float):
+        self.alpha = alpha
+        self.period = period
+        self.count = 0
+        self.value = 0.0
+
+    def push(self, sample: float) -> Optional[float]:
+        if self.count >= self.period:
+            self.value += self.alpha * (sample - self.value)
+            return self.value
+        self.count += 1
+        self.value += (sample - self.value) / self.count  # running mean while seeding
+        return self.value if self.count == self.period else None
+
+
+def ema(period: int) -> _Average:
+    return _Average(period, 2.0 / (period + 1))
+
+
+def rma(period: int) -> _Average:
+    """Wilder's moving average, as used by RSI and ATR."""
+    return _Average(period, 1.0 / period)
+
+
+class IndicatorState:
+    """Running RSI, MACD, EMA20 and ATR of one series, advanced once per closed bar."""
+
+    __slots__ = ("ema20", "ema_fast", "ema_slow", "gain", "loss", "atr", "prev_close", "latest")
+
+    def __init__(self, rsi_period: int = 14, atr_period: int = 14, macd_fast: int = 12, macd_slow: int = 26):
+        self.ema20 = ema(20)
+        self.ema_fast = ema(macd_fast)
+        self.ema_slow = ema(macd_slow)
+        self.gain = rma(rsi_period)
+        self.loss = rma(rsi_period)
+        self.atr = rma(atr_period)
+        self.prev_close: Optional[float] = None
+        self.latest: Optional[ParsedIndicators] = None  # None until every indicator is warmed up
+
+    def push(self, high: float, low: float, close: float) -> tuple:
+        """Advance by one bar; returns ``(rsi, macd, ema20, atr)`` with None for those still warming up."""
+        prev = self.prev_close
+        if prev is None:
+            true_range = high - low
+            rsi = None
+        else:
+            true_range = max(high - low, abs(high - prev), abs(low - prev))
+            change = close - prev
+            gain = self.gain.push(change if change > 0 else 0.0)
+            loss = self.loss.push(-change if change < 0 else 0.0)
+            if loss is None:
+                rsi = None
+            elif loss == 0:
+                rsi = 100.0
+            elif gain == 0:
+                rsi = 0.0
+            else:
+                rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        self.prev_close = close
+
+        ema20 = self.ema20.push(close)
+        fast = self.ema_fast.push(close)
+        slow = self.ema_slow.push(close)
+        macd = fast - slow if slow is not None else None
+        atr = self.atr.push(true_range)
+        if rsi is not None and macd is not None and ema20 is not None and atr is not None:
+            self.latest = ParsedIndicators(rsi, macd, ema20, atr)
+        return rsi, macd, ema20, atr
+
+
+class TimeframeSeries:
+    """Closed bars of one (symbol, timeframe) in preallocated ring arrays, plus the bar being formed.
+
+    Indicator columns are NaN for bars closed before the indicator warmed up.
+    """
+
+    COLUMNS = ("timestamp", "open", "high", "low", "close", "volume", "rsi", "macd", "ema20", "atr")
+
+    def __init__(self, timeframe: str, capacity: int = 10_000):
+        if capacity <= 0:
+            raise ValueError("TimeframeSeries capacity must be positive")
+        self.timeframe = timeframe
+        self.seconds = timeframe_seconds(timeframe)
+        self.capacity = capacity
+        self.closed = 0  # bars closed so far, including those overwritten
+        self.late = 0  # inputs dropped for belonging to an already closed bar
+        self.closed_until = 0  # end of the last closed bar; anything before it is late
+        self.state = IndicatorState()
+        # One row per bar, so closing a bar is a single assignment; epoch seconds are exact in float64
+        self._table = np.empty((capacity, len(self.COLUMNS)), dtype=np.float64)
+        self.bar_start: Optional[int] = None
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+
+    def __len__(self) -> int:
+        return min(self.closed, self.capacity)
+
+    @property
+    def indicators(self) -> Optional[ParsedIndicators]:
+        """Indicators as of the last closed bar, once all of them have warmed up."""
+        return self.state.latest
+
+    def column(self, name: str) -> np.ndarray:
+        """Stored values of one column, oldest first (``timestamp`` as int64 epoch seconds)."""
+        values = self._table[:, self.COLUMNS.index(name)]
+        if self.closed <= self.capacity:
+            values = values[: self.closed]
+        else:
+            split = self.closed % self.capacity
+            values = np.concatenate((values[split:], values[:split]))
+        return values.astype(np.int64) if name == "timestamp" else values
+
+    def to_candle_series(self) -> CandleSeries:
+        """The stored bars as a :class:`CandleSeries` for :class:`~trading_agent.backtesting.fills.FillSimulator`."""
+        return CandleSeries(
+            timestamp=self.column("timestamp"),
+            open=self.column("open").copy(),
+            high=self.column("high").copy(),
+            low=self.column("low").copy(),
+            close=self.column("close").copy(),
+        )
+
+    def close_bar(self) -> tuple:
+        """Store the forming bar with its indicators and return it as ``(start, open, high, low, close, volume)``."""
+        bar = (self.bar_start, self.open, self.high, self.low, self.close, self.volume)
+        # None (still warming up) becomes NaN in the float row
+        self._table[self.closed % self.capacity] = bar + self.state.push(self.high, self.low, self.close)
+        self.closed += 1
+        self.closed_until = self.bar_start + self.seconds
+        self.bar_start = None
+        return bar
+
+
+BarListener = Callable[[str, str, Candle], None]
+
+
+class CandleAggregator:
+    """Rolls ticks or bars of any number of symbols up into every timeframe in ``timeframes``.
+
+    Timeframes must each be a multiple of the smallest one, which is the only one fed directly.
+    Inputs must arrive in time order per symbol; anything older than the forming bar is counted
+    in :attr:`TimeframeSeries.late` and dropped. ``on_close`` listeners get every closed bar as
+    a :class:`Candle`, e.g. to store it or to update a
+    :class:`~trading_agent.services.market_context.MarketContextProvider`.
+    """
+
+    def __init__(
+        self,
+        timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+        capacity: int = 10_000,
+        on_close: Iterable[BarListener] = (),
+    ):
+        ordered = sorted(dict.fromkeys(timeframes), key=timeframe_seconds)
+        if not ordered:
+            raise ValueError("CandleAggregator needs at least one timeframe")
+        base = timeframe_seconds(ordered[0])
+        for timeframe in ordered[1:]:
+            if timeframe_seconds(timeframe) % base:
+                raise ValueError(f"Timeframe {timeframe!r} is not a multiple of the smallest one, {ordered[0]!r}")
+        self.timeframes = tuple(ordered)
+        self.capacity = capacity
+        self.listeners: List[BarListener] = list(on_close)
+        self._chains: Dict[str, List[TimeframeSeries]] = {}
+
+    def symbols(self) -> List[str]:
+        return sorted(self._chains)
+
+    def series(self, symbol: str, timeframe: str) -> TimeframeSeries:
+        """The series of a configured timeframe, given by any label of the same length (``"60"`` for ``"1h"``)."""
+        seconds = timeframe_seconds(timeframe)
+        for series in self._chains[symbol]:
+            if series.seconds == seconds:
+                return series
+        raise KeyError(f"Timeframe {timeframe!r} is not aggregated")
+
+    def indicators(self, symbol: str, timeframe: str) -> Optional[ParsedIndicators]:
+        """Indicators of the last closed bar, or None for an unknown series or one still warming up."""
+        chain = self._chains.get(symbol)
+        if chain is None:
+            return None
+        try:
+            seconds = timeframe_seconds(timeframe)
+        except ValueError:
+            return None
+        for series in chain:
+            if series.seconds == seconds:
+                return series.state.latest
+        return None
+
+    def update_tick(self, symbol: str, timestamp: float, price: float, volume: float = 0.0) -> None:
+        """Fold one trade at ``timestamp`` (epoch seconds) into the forming bars."""
+        chain = self._chains.get(symbol) or self._chain(symbol)
+        self._fold(symbol, chain, 0, timestamp, price, price, price, price, volume, None)
+
+    def update_bar(
+        self,
+        symbol: str,
+        timestamp: float,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0,
+        seconds: float = 60.0,
+    ) -> None:
+        """Fold one bar opening at ``timestamp`` and lasting ``seconds`` (at most the smallest timeframe).
+
+        A bar that ends the forming bar closes it right away instead of waiting for the next input.
+        """
+        chain = self._chains.get(symbol) or self._chain(symbol)
+        self._fold(symbol, chain, 0, timestamp, open, high, low, close, volume, timestamp + seconds)
+
+    def flush(self) -> None:
+        """Close every forming bar, e.g. at the end of a replay; later inputs for their periods are late."""
+        for symbol, chain in self._chains.items():
+            for level, series in enumerate(chain):
+                if series.bar_start is not None:
+                    self._close(symbol, chain, level)
+
+    def _chain(self, symbol: str) -> List[TimeframeSeries]:
+        chain = self._chains[symbol] = [TimeframeSeries(timeframe, self.capacity) for timeframe in self.timeframes]
+        return chain
+
+    def _fold(
+        self,
+        symbol: str,
+        chain: List[TimeframeSeries],
+        level: int,
+        start: float,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        end: Optional[float],
+    ) -> None:
+        series = chain[level]
+        bucket = int(start - start % series.seconds)
+        if bucket != series.bar_start:
+            if bucket < series.closed_until or (series.bar_start is not None and bucket < series.bar_start):
+                series.late += 1
+                return
+            if series.bar_start is not None:
+                self._close(symbol, chain, level)
+        if series.bar_start is None:
+            series.bar_start = bucket
+            series.open, series.high, series.low, series.close, series.volume = open, high, low, close, volume
+        else:
+            if high > series.high:
+                series.high = high
+            if low < series.low:
+                series.low = low
+            series.close = close
+            series.volume += volume
+        if end is not None and end >= bucket + series.seconds:
+            self._close(symbol, chain, level)
+
+    def _close(self, symbol: str, chain: List[TimeframeSeries], level: int) -> None:
+        series = chain[level]
+        start, open, high, low, close, volume = series.close_bar()
+        if self.listeners:
+            candle = Candle(
+                datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None), open, high, low, close, volume
+            )
+            for listener in self.listeners:
+                listener(symbol, series.timeframe, candle)
+        if level + 1 < len(chain):
+            self._fold(symbol, chain, level + 1, start, open, high, low, close, volume, start + series.seconds)
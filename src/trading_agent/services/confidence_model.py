@@ -0,0 +1,250 @@
+"""Gradient-boosted confidence scoring, an alternative to the rule table's summed weights.
+
+The model predicts whether the trade an alert's signal implies reaches its take-profit
+before its stop-loss; confidence is ``100 x P(win)``, so it drops into
+``ValidationResultSchema.confidence`` and the decision engine is unchanged. Features are the
+alert's indicators relative to its price, plus the market context it was validated against.
+
+Training labels come from the columnar store: each stored alert's trade, with the stop and
+target :class:`~trading_agent.services.decision_engine.DecisionEngine` places, is resolved
+against the candles that followed it. XGBoost is an optional extra (``poetry install -E ml``)
+and is only imported when a model is trained or loaded.
+
+Usage::
+
+    python -m trading_agent.services.confidence_model ./alert-store --out models/confidence.json --candle-timeframe 1m
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trading_agent.backtesting.fills import EXIT_END_OF_DATA, CandleBook, FillSimulator
+from trading_agent.backtesting.store import ColumnarStore, StoredAlerts
+from trading_agent.backtesting.vectorized import AlertColumns
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.services.market_context import MarketContextProvider
+from trading_agent.services.validation_engine import MarketContext
+
+FEATURE_NAMES = ("rsi", "macd_atr", "ema20_gap", "atr_price", "signal", "trend", "vwap_gap", "atr_ratio")
+STOP_ATR, TARGET_ATR = 2.0, 4.0  # the levels DecisionEngine places, in ATRs from the entry
+
+
+def feature_matrix(
+    price: Any, rsi: Any, macd: Any, ema20: Any, atr: Any, signal: Any,
+    ema_fast: Any, ema_slow: Any, vwap: Any, atr_baseline: Any,
+) -> np.ndarray:
+    """One float32 row of :data:`FEATURE_NAMES` per alert; arguments are arrays or scalars that broadcast.
+
+    Ratios with a zero denominator and an unknown (NaN) VWAP become NaN, which the trees treat
+    as missing.
+    """
+    inputs = (price, rsi, macd, ema20, atr, signal, ema_fast, ema_slow, vwap, atr_baseline)
+    price, rsi, macd, ema20, atr, signal, ema_fast, ema_slow, vwap, atr_baseline = (
+        np.asarray(value, dtype=np.float64) for value in inputs
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns = (
+            rsi,
+            macd / atr,
+            price / ema20 - 1,
+            atr / price,
+            signal,
+            ema_fast / ema_slow - 1,
+            price / vwap - 1,
+            atr / atr_baseline,
+        )
+        matrix = np.column_stack(np.broadcast_arrays(*columns))
+    matrix[~np.isfinite(matrix)] = np.nan
+    return matrix.astype(np.float32)
+
+
+def alert_features(alerts: Sequence[AnyAlert], contexts: Sequence[MarketContext]) -> np.ndarray:
+    rows = [
+        (
+            alert.price, alert.indicators.RSI, alert.indicators.MACD, alert.indicators.EMA20, alert.indicators.ATR,
+            1.0 if alert.signal == "buy" else -1.0,
+            context.ema_fast, context.ema_slow, np.nan if context.vwap is None else context.vwap, context.atr_baseline,
+        )
+        for alert, context in zip(alerts, contexts)
+    ]
+    return feature_matrix(*np.array(rows, dtype=np.float64).reshape(-1, 10).T)
+
+
+def column_features(columns: AlertColumns, context: MarketContext) -> np.ndarray:
+    return feature_matrix(
+        columns.price, columns.rsi, columns.macd, columns.ema20, columns.atr, columns.signal,
+        context.ema_fast, context.ema_slow, np.nan if context.vwap is None else context.vwap, context.atr_baseline,
+    )
+
+
+def _xgboost() -> Any:
+    try:
+        import xgboost
+    except ImportError as exc:
+        raise ImportError("The confidence model needs XGBoost; install the `ml` extra (poetry install -E ml)") from exc
+    return xgboost
+
+
+class ConfidenceModel:
+    """A trained booster scoring alerts for :class:`~trading_agent.services.validation_engine.ValidationEngine`.
+
+    Predictions use ``inplace_predict``, which skips building a ``DMatrix`` and keeps the
+    per-call overhead low for the small batches the webhook produces.
+    """
+
+    def __init__(self, booster: Any):
+        self.booster = booster
+
+    @classmethod
+    def train(
+        cls,
+        features: np.ndarray,
+        labels: np.ndarray,
+        rounds: int = 200,
+        max_depth: int = 4,
+        learning_rate: float = 0.1,
+        seed: int = 0,
+    ) -> "ConfidenceModel":
+        xgboost = _xgboost()
+        params = {
+            "objective": "binary:logistic",
+            "eval_metric": "logloss",
+            "tree_method": "hist",
+            "max_depth": max_depth,
+            "eta": learning_rate,
+            "seed": seed,
+        }
+        data = xgboost.DMatrix(features, label=labels, feature_names=list(FEATURE_NAMES))
+        return cls(xgboost.train(params, data, num_boost_round=rounds))
+
+    @classmethod
+    def load(cls, path: Path) -> "ConfidenceModel":
+        booster = _xgboost().Booster()
+        booster.load_model(str(path))
+        return cls(booster)
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.booster.save_model(str(path))
+        return path
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Probability that each alert's trade wins."""
+        return self.booster.inplace_predict(features)
+
+    def confidence(self, features: np.ndarray) -> np.ndarray:
+        return np.rint(self.predict(features) * 100).astype(np.int64)
+
+    def score(self, alerts: Sequence[AnyAlert], contexts: Sequence[MarketContext]) -> List[int]:
+        """Confidence of each alert against its own context, from one prediction over all of them."""
+        return self.confidence(alert_features(alerts, contexts)).tolist()
+
+    def score_columns(self, columns: AlertColumns, context: MarketContext) -> np.ndarray:
+        return self.confidence(column_features(columns, context))
+
+
+def outcome_labels(stored: StoredAlerts, simulator: FillSimulator) -> Tuple[np.ndarray, np.ndarray]:
+    """``(won, known)`` for the trade each stored alert's signal implies, resolved against later candles.
+
+    A trade is unknown when its symbol has no candles or neither level was reached before the
+    data ends.
+    """
+    c = stored.columns
+    entry_times = stored.timestamp.astype("datetime64[s]").astype(np.int64)
+    won = np.zeros(len(stored), dtype=bool)
+    known = np.zeros(len(stored), dtype=bool)
+    for i in range(len(stored)):
+        symbol = str(c.symbol[i])
+        if symbol not in simulator.candles:
+            continue
+        direction, price, atr = int(c.signal[i]), float(c.price[i]), float(c.atr[i])
+        stop, target = price - direction * STOP_ATR * atr, price + direction * TARGET_ATR * atr
+        fill = simulator.resolve(symbol, direction, 1.0, int(entry_times[i]), price, stop, target)
+        known[i] = fill.exit_reason != EXIT_END_OF_DATA
+        won[i] = fill.pnl > 0
+    return won, known
+
+
+def training_set(stored: StoredAlerts, simulator: FillSimulator) -> Tuple[np.ndarray, np.ndarray]:
+    """Features and win labels of the stored alerts whose outcome is known.
+
+    Contexts are rebuilt by replaying the alerts in order through a
+    :class:`MarketContextProvider`, as the live service does, so training and serving see the
+    same features.
+    """
+    provider = MarketContextProvider()
+    alerts = list(stored.payloads())
+    features = alert_features(alerts, [provider.observe(alert) for alert in alerts])
+    won, known = outcome_labels(stored, simulator)
+    return features[known], won[known].astype(np.float32)
+
+
+def roc_auc(labels: np.ndarray, scores: np.ndarray) -> float:
+    """Area under the ROC curve (Mann-Whitney, ties counted as half)."""
+    labels = np.asarray(labels, dtype=bool)
+    positives, negatives = int(labels.sum()), int((~labels).sum())
+    if not positives or not negatives:
+        return float("nan")
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    average_rank = np.cumsum(counts) - (counts - 1) / 2
+    ranks = average_rank[inverse]
+    return float((ranks[labels].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def holdout_report(model: ConfidenceModel, features: np.ndarray, labels: np.ndarray) -> Dict[str, float]:
+    probabilities = model.predict(features)
+    return {
+        "alerts": float(len(labels)),
+        "win_rate": float(labels.mean()) if len(labels) else float("nan"),
+        "accuracy": float(((probabilities >= 0.5) == labels.astype(bool)).mean()) if len(labels) else float("nan"),
+        "auc": roc_auc(labels, probabilities),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the confidence model on stored alerts and their outcomes.")
+    parser.add_argument("store", type=Path, help="columnar store holding the alerts and the candles after them")
+    parser.add_argument("--out", type=Path, required=True, help="model file to write (.json or .ubj)")
+    parser.add_argument("--symbol")
+    parser.add_argument("--timeframe", help="alert timeframe to train on")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--candle-timeframe", default="1m", help="candles used to resolve each trade")
+    parser.add_argument("--max-holding-bars", type=int)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--holdout", type=float, default=0.2, help="latest fraction of alerts kept out of training")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=4)
+    parser.add_argument("--learning-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    store = ColumnarStore(args.store)
+    stored = store.load_alerts(args.symbol, args.timeframe, args.start, args.end)
+    symbols = np.unique(stored.columns.symbol).tolist()
+    candles = CandleBook({symbol: store.load_candles(symbol, args.candle_timeframe) for symbol in symbols})
+    simulator = FillSimulator(candles, args.slippage_bps, args.fee_bps, args.max_holding_bars)
+    features, labels = training_set(stored, simulator)
+    if not len(labels):
+        parser.error("no stored alert has a resolved outcome; import the candles that follow them first")
+
+    split = int(len(labels) * (1 - args.holdout))  # alerts are chronological, so the holdout is the latest
+    model = ConfidenceModel.train(features[:split], labels[:split], args.rounds, args.max_depth, args.learning_rate)
+    print(f"trained on {split} of {len(stored)} alerts ({len(labels)} with a known outcome)")
+    if split < len(labels):
+        report = holdout_report(model, features[split:], labels[split:])
+        print(
+            f"holdout of {report['alerts']:.0f} alerts: win rate {report['win_rate']:.3f}, "
+            f"accuracy {report['accuracy']:.3f}, AUC {report['auc']:.3f}"
+        )
+    print(f"saved {model.save(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
-from trading_agent.config.settings import get_settings
-from trading_agent.schemas.alert import AlertPayload
-from trading_agent.schemas.pipeline import Action, TradeDecision, ValidationResultSchema
+from trading_agent.config.settings import Settings, get_settings
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.schemas.pipeline import Action, AnyValidation, TradeDecision
 
 
 @dataclass
@@ -14,48 +15,146 @@ class RiskState:
     daily_loss_fraction: float
 
 
-class DecisionEngine:
-    def __init__(self, settings=None):
-        self.settings = settings or get_settings()
+DEFAULT_CONFIDENCE_CUTOFF = 50
+
+REASON_VALIDATION_FAILED = "Validation failed"
+REASON_DAILY_LOSS = "Daily loss limit reached"
+REASON_SYMBOL_EXPOSURE = "Symbol exposure limit reached"
+REASON_LOW_CONFIDENCE = "Confidence too low"
+
+
+def _sizing_params(settings: Settings) -> Tuple[float, float, float]:
+    return settings.account_equity, settings.max_risk_per_trade, settings.max_symbol_exposure
+
+
+class DecisionCache:
+    """LRU memo of entry decisions keyed by (symbol, price, ATR, signal, confidence).
+
+    Replays over ranging markets see the same inputs over and over; a hit skips the stop, target and
+    size calculation and building the ``TradeDecision`` (frozen, so hits can share it).
+    Without quanta the key is exact and cached decisions equal computed ones. A quantum
+    rounds that input to a multiple of itself before both the lookup and the calculation, so
+    every alert in a bucket gets the bucket's levels: more hits for that much precision.
+    Entries are dropped whenever the sizing settings change.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        price_quantum: Optional[float] = None,
+        atr_quantum: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.price_quantum = price_quantum
+        self.atr_quantum = atr_quantum
+        self._entries: "OrderedDict[Tuple[str, float, float, str, int], TradeDecision]" = OrderedDict()
+        self._params: Optional[Tuple[float, float, float]] = None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["DecisionCache"]:
+        if settings.decision_cache_size <= 0:
+            return None
+        return cls(settings.decision_cache_size, settings.decision_price_quantum, settings.decision_atr_quantum)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        symbol: str,
+        price: float,
+        atr: float,
+        signal: str,
+        confidence: int,
+        settings: Settings,
+        compute: Callable[..., TradeDecision],
+    ) -> TradeDecision:
+        params = _sizing_params(settings)
+        if params != self._params:
+            self._entries.clear()
+            self._params = params
+        if self.price_quantum:
+            price = round(price / self.price_quantum) * self.price_quantum
+        if self.atr_quantum:
+            atr = round(atr / self.atr_quantum) * self.atr_quantum
+        key = (symbol, price, atr, signal, confidence)
+        decision = self._entries.get(key)
+        if decision is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decision
+        self.misses += 1
+        decision = compute(symbol, price, atr, signal, confidence, settings)
+        if self.max_entries > 0:
+            self._entries[key] = decision
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return decision
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
 
-    def decide(self, alert: AlertPayload, validation: ValidationResultSchema, risk_state: RiskState) -> TradeDecision:
+class DecisionEngine:
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        confidence_cutoff: int = DEFAULT_CONFIDENCE_CUTOFF,
+        cache: Optional[DecisionCache] = None,
+    ):
+        self._settings = settings
+        self.confidence_cutoff = confidence_cutoff
+        self.cache = cache
+
+    @property
+    def settings(self) -> Settings:
+        # Unpinned engines follow reload_settings() through the cached process-wide settings
+        return self._settings or get_settings()
+
+    def decide(self, alert: AnyAlert, validation: AnyValidation, risk_state: RiskState) -> TradeDecision:
         if not validation.valid:
-            return TradeDecision(
-                action=Action.IGNORE,
-                symbol=alert.symbol,
-                order_type="market",
-                size=0.0,
-                stop_loss=None,
-                take_profit=None,
-                confidence=validation.confidence,
-            )
-
-        if risk_state.daily_loss_fraction >= self.settings.max_daily_loss:
-            return self._ignored_decision(alert, validation, "Daily loss limit reached")
+            return self._ignored_decision(alert, validation, REASON_VALIDATION_FAILED)
+
+        settings = self.settings
+        if risk_state.daily_loss_fraction >= settings.max_daily_loss:
+            return self._ignored_decision(alert, validation, REASON_DAILY_LOSS)
 
         current_exposure = risk_state.open_positions.get(alert.symbol, 0.0)
-        if current_exposure >= self.settings.max_symbol_exposure:
-            return self._ignored_decision(alert, validation, "Symbol exposure limit reached")
+        if current_exposure >= settings.max_symbol_exposure:
+            return self._ignored_decision(alert, validation, REASON_SYMBOL_EXPOSURE)
 
-        if validation.confidence < 50:
-            return self._ignored_decision(alert, validation, "Confidence too low")
+        if validation.confidence < self.confidence_cutoff:
+            return self._ignored_decision(alert, validation, REASON_LOW_CONFIDENCE)
 
-        stop_loss = self._calculate_stop_loss(alert)
-        take_profit = self._calculate_take_profit(alert)
-        position_size = self._calculate_position_size(alert, stop_loss)
+        args = (alert.symbol, alert.price, alert.indicators.ATR, alert.signal, validation.confidence, settings)
+        if self.cache is None:
+            return self._entry_decision(*args)
+        return self.cache.get(*args, self._entry_decision)
 
-        action = Action.ENTER_LONG if alert.signal == "buy" else Action.ENTER_SHORT
+    def _entry_decision(
+        self, symbol: str, price: float, atr: float, signal: str, confidence: int, settings: Settings
+    ) -> TradeDecision:
+        stop_loss = self._calculate_stop_loss(price, atr, signal)
+        take_profit = self._calculate_take_profit(price, atr, signal)
+        position_size = self._calculate_position_size(price, stop_loss, settings)
+
+        action = Action.ENTER_LONG if signal == "buy" else Action.ENTER_SHORT
         return TradeDecision(
             action=action,
-            symbol=alert.symbol,
+            symbol=symbol,
             order_type="market",
             size=position_size,
             stop_loss=stop_loss,
             take_profit=take_profit,
-            confidence=validation.confidence,
+            confidence=confidence,
         )
 
-    def _ignored_decision(self, alert: AlertPayload, validation: ValidationResultSchema, _reason: str) -> TradeDecision:
+    def _ignored_decision(self, alert: AnyAlert, validation: AnyValidation, reason: str) -> TradeDecision:
         return TradeDecision(
             action=Action.IGNORE,
             symbol=alert.symbol,
@@ -64,27 +163,26 @@ class DecisionEngine:
             stop_loss=None,
             take_profit=None,
             confidence=validation.confidence,
+            reason=reason,
         )
 
-    def _calculate_stop_loss(self, alert: AlertPayload) -> float:
-        atr = alert.indicators.ATR
-        if alert.signal == "buy":
-            return alert.price - 2 * atr
-        return alert.price + 2 * atr
+    def _calculate_stop_loss(self, price: float, atr: float, signal: str) -> float:
+        if signal == "buy":
+            return price - 2 * atr
+        return price + 2 * atr
 
-    def _calculate_take_profit(self, alert: AlertPayload) -> float:
-        atr = alert.indicators.ATR
+    def _calculate_take_profit(self, price: float, atr: float, signal: str) -> float:
         risk_multiple = 2.0
-        if alert.signal == "buy":
-            return alert.price + risk_multiple * 2 * atr
-        return alert.price - risk_multiple * 2 * atr
+        if signal == "buy":
+            return price + risk_multiple * 2 * atr
+        return price - risk_multiple * 2 * atr
 
-    def _calculate_position_size(self, alert: AlertPayload, stop_loss: float) -> float:
-        risk_per_trade = self.settings.account_equity * self.settings.max_risk_per_trade
-        price_distance = abs(alert.price - stop_loss)
+    def _calculate_position_size(self, price: float, stop_loss: float, settings: Settings) -> float:
+        risk_per_trade = settings.account_equity * settings.max_risk_per_trade
+        price_distance = abs(price - stop_loss)
         if price_distance == 0:
             return 0.0
         raw_size = risk_per_trade / price_distance
-        max_size = self.settings.account_equity * self.settings.max_symbol_exposure / alert.price
+        max_size = settings.account_equity * settings.max_symbol_exposure / price
         capped_size = min(raw_size, max_size)
         return round(capped_size, 4)
@@ -4,11 +4,14 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-from trading_agent.config.settings import get_settings
+from trading_agent.config.settings import Settings, get_settings
 from trading_agent.schemas.pipeline import ExecutionResult, TradeDecision
+from trading_agent.services.order_dispatch import OrderDispatcher, OrderRequest, new_client_order_id
 
 logger = logging.getLogger(__name__)
 
+PENDING = "pending"
+
 
 @dataclass
 class ExecutionContext:
@@ -16,30 +19,50 @@ class ExecutionContext:
 
 
 class ExecutionEngine:
-    def __init__(self, context: Optional[ExecutionContext] = None):
-        settings = get_settings()
+    def __init__(
+        self,
+        context: Optional[ExecutionContext] = None,
+        settings: Optional[Settings] = None,
+        dispatcher: Optional[OrderDispatcher] = None,
+    ):
+        settings = settings or get_settings()
         self.context = context or ExecutionContext(paper_trading=settings.paper_trading)
+        self.dispatcher = dispatcher
 
     def execute(self, decision: TradeDecision) -> ExecutionResult:
+        """Fill a paper order, or assign a live order its client order ID; live orders are sent by :meth:`dispatch`."""
         if decision.action == decision.action.IGNORE:
             return ExecutionResult(success=True, order_id=None, status="ignored", executed_size=0.0)
 
         try:
             if self.context.paper_trading:
                 order_id = self._simulate_order(decision)
-                status = "filled"
-                executed_size = decision.size
-            else:
-                # Placeholder for live Coinbase Advanced API integration
-                order_id = "live-order"
-                status = "submitted"
-                executed_size = 0.0
-
-            return ExecutionResult(success=True, order_id=order_id, status=status, executed_size=executed_size)
-        except Exception as exc:  # pragma: no cover - defensive logging
+                return ExecutionResult(
+                    success=True, order_id=order_id, client_order_id=order_id, status="filled", executed_size=decision.size
+                )
+            if self.dispatcher is None:
+                raise RuntimeError("Live trading requires an order dispatcher; set EXCHANGE_BASE_URL")
+            # Nothing is sent yet: the order goes out once its rows are committed, so every order
+            # on the exchange has a row to receive its status
+            client_order_id = new_client_order_id(decision.symbol)
+            return ExecutionResult(
+                success=True, order_id=client_order_id, client_order_id=client_order_id, status=PENDING, executed_size=0.0
+            )
+        except Exception as exc:
             logger.exception("Execution failed: %s", exc)
             return ExecutionResult(success=False, order_id=None, status="failed", executed_size=0.0, error=str(exc))
 
+    def dispatch(self, decision: TradeDecision, execution: ExecutionResult) -> Optional[str]:
+        """Queue the live order of a pending execution; returns why it could not be queued, if it could not."""
+        if execution.status != PENDING or self.dispatcher is None:
+            return None
+        try:
+            # The final status reaches the dispatcher's status callback in the background
+            self.dispatcher.dispatch(OrderRequest.from_decision(decision, execution.client_order_id))
+        except Exception as exc:
+            logger.exception("Dispatch of order %s failed: %s", execution.client_order_id, exc)
+            return str(exc)
+        return None
+
     def _simulate_order(self, decision: TradeDecision) -> str:
-        pseudo_id = f"paper-{decision.symbol}-{abs(hash((decision.action, decision.size)))}"
-        return pseudo_id
+        return new_client_order_id(decision.symbol, prefix="paper")
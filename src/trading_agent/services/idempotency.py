@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Decision, Order
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.schemas.pipeline import ExecutionResult
+from trading_agent.services.execution_engine import PENDING
+from trading_agent.services.persistence import get_persistence_executor
+
+ALERT_ID_HEADER = "X-Alert-ID"
+
+
+def alert_fingerprint(alert: AnyAlert) -> str:
+    """Stable key for a webhook body: identical alerts (e.g. TradingView retries) share it."""
+    i = alert.indicators
+    timestamp = alert.timestamp.isoformat() if alert.timestamp is not None else ""
+    fields = (alert.symbol, alert.signal, alert.timeframe, alert.price, i.RSI, i.MACD, i.EMA20, i.ATR, timestamp)
+    canonical = "|".join(value if isinstance(value, str) else repr(value) for value in fields)
+    return "sha256:" + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def idempotency_key(alert: AnyAlert, explicit_id: Optional[str] = None) -> str:
+    """The caller's alert ID when one was sent, else the body fingerprint (namespaced apart)."""
+    return f"id:{explicit_id}" if explicit_id else alert_fingerprint(alert)
+
+
+class IdempotencyCache:
+    """Bounded map from idempotency key to the future of that alert's ``ExecutionResult``.
+
+    The first caller for a key :meth:`claim`s it and later resolves it with :meth:`complete`
+    or :meth:`fail`; everyone else awaits the same future, so a duplicate that arrives while
+    the original is still in flight also gets its result. Entries expire ``ttl`` seconds after
+    they were claimed and the least recently used entry is evicted beyond ``max_entries``.
+    A failed alert is forgotten so its retry runs again. Use from the event loop thread only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, asyncio.Future]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def claim(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """Return ``(future, owner)``; ``owner`` is True when the caller must run the alert."""
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], False
+            del self._entries[key]
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        if self.max_entries > 0:
+            self._entries[key] = (now + self.ttl, future)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return future, True
+
+    def complete(self, future: asyncio.Future, result: ExecutionResult) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    def fail(self, key: str, future: asyncio.Future, exc: BaseException) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is future:
+            del self._entries[key]
+        if future.done():
+            return
+        if isinstance(exc, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def find_executions(session: Session, keys: Iterable[str]) -> Dict[str, ExecutionResult]:
+    """Execution results of alerts already stored under any of ``keys``, from their order rows.
+
+    With write-behind auditing an alert row commits before its order row, and a record that is
+    dead-lettered never gets one; such an alert is answered as pending rather than stored again.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    rows = session.execute(
+        select(
+            Alert.idempotency_key,
+            Alert.created_at.label("alert_created_at"),
+            Order.exchange_order_id,
+            Order.client_order_id,
+            Order.status,
+            Order.filled_size,
+            Order.created_at,
+        )
+        .select_from(Alert)
+        .outerjoin(Decision, Decision.alert_id == Alert.id)
+        .outerjoin(Order, Order.decision_id == Decision.id)
+        .where(Alert.idempotency_key.in_(keys))
+        .order_by(Order.id.is_not(None), Order.id)
+    )
+    results = {}
+    for row in rows:
+        if row.status is None:
+            results[row.idempotency_key] = ExecutionResult(
+                success=True, order_id=None, status=PENDING, executed_size=0.0, timestamp=row.alert_created_at
+            )
+        else:
+            results[row.idempotency_key] = ExecutionResult(
+                success=row.status != "failed",
+                order_id=row.exchange_order_id,
+                client_order_id=row.client_order_id,
+                status=row.status,
+                executed_size=row.filled_size,
+                timestamp=row.created_at,
+            )
+    return results
+
+
+def _find_stored_executions(keys: Iterable[str]) -> Dict[str, ExecutionResult]:
+    with session_scope() as session:
+        return find_executions(session, keys)
+
+
+async def find_executions_async(keys: Iterable[str]) -> Dict[str, ExecutionResult]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_persistence_executor(), partial(_find_stored_executions, list(keys)))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from trading_agent.models.entities import Alert, Decision
+
+
+def get_alert_lineage(session: Session, alert_id: int) -> Optional[Alert]:
+    """Load one alert with its validations, decisions and orders in a single joined query."""
+    query = (
+        select(Alert)
+        .where(Alert.id == alert_id)
+        .options(
+            joinedload(Alert.validations),
+            joinedload(Alert.decisions).joinedload(Decision.orders),
+        )
+    )
+    return session.scalars(query).unique().one_or_none()
+
+
+def list_alert_lineage(
+    session: Session,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[Alert]:
+    """Alerts in a time window with full lineage.
+
+    ``selectinload`` fetches each level with one ``IN`` query, so the cost is four queries
+    (alerts, validations, decisions, orders) no matter how many alerts match. ``start`` is inclusive, ``end`` exclusive.
+    """
+    query = select(Alert).order_by(Alert.created_at, Alert.id).limit(limit)
+    if symbol is not None:
+        query = query.where(Alert.symbol == symbol)
+    if start is not None:
+        query = query.where(Alert.created_at >= start)
+    if end is not None:
+        query = query.where(Alert.created_at < end)
+    query = query.options(
+        selectinload(Alert.validations),
+        selectinload(Alert.decisions).selectinload(Decision.orders),
+    )
+    return list(session.scalars(query))
+
+
+def list_decisions(
+    session: Session,
+    symbol: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000,
+) -> List[Decision]:
+    """Decisions for one symbol in a time window, with their orders, served by the (symbol, created_at) index."""
+    query = select(Decision).where(Decision.symbol == symbol).order_by(Decision.created_at, Decision.id).limit(limit)
+    if start is not None:
+        query = query.where(Decision.created_at >= start)
+    if end is not None:
+        query = query.where(Decision.created_at < end)
+    return list(session.scalars(query.options(selectinload(Decision.orders))))
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.services.validation_engine import MarketContext
+
+
+@dataclass(frozen=True)
+class Candle:
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class RingBuffer:
+    """Fixed-size window of floats with an O(1) running sum."""
+
+    __slots__ = ("_values", "_index", "_count", "_total")
+
+    def __init__(self, size: int):
+        if size <= 0:
+            raise ValueError("RingBuffer size must be positive")
+        self._values = [0.0] * size
+        self._index = 0
+        self._count = 0
+        self._total = 0.0
+
+    def push(self, value: float) -> None:
+        size = len(self._values)
+        if self._count == size:
+            self._total -= self._values[self._index]
+        else:
+            self._count += 1
+        self._values[self._index] = value
+        self._total += value
+        self._index = (self._index + 1) % size
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count else 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class _SeriesState:
+    __slots__ = (
+        "ema_fast",
+        "ema_slow",
+        "atr",
+        "prev_close",
+        "price_volume",
+        "volume",
+        "atr_window",
+        "snapshot",
+    )
+
+    def __init__(self, vwap_window: int, atr_baseline_window: int):
+        self.ema_fast: Optional[float] = None
+        self.ema_slow: Optional[float] = None
+        self.atr: Optional[float] = None
+        self.prev_close: Optional[float] = None
+        self.price_volume = RingBuffer(vwap_window)
+        self.volume = RingBuffer(vwap_window)
+        self.atr_window = RingBuffer(atr_baseline_window)
+        self.snapshot: Optional[MarketContext] = None
+
+
+class MarketContextProvider:
+    """Rolling EMA, VWAP and ATR baselines per (symbol, timeframe), updated in O(1) per tick.
+
+    Every update refreshes a ready :class:`MarketContext` snapshot, so readers never recompute.
+    Ticks come either from alerts (price plus the alert's ATR) or from OHLCV candles, where ATR
+    is derived from the true range with Wilder smoothing.
+    """
+
+    def __init__(
+        self,
+        ema_fast_period: int = 12,
+        ema_slow_period: int = 26,
+        vwap_window: int = 96,
+        atr_period: int = 14,
+        atr_baseline_window: int = 50,
+    ):
+        self._fast_alpha = 2.0 / (ema_fast_period + 1)
+        self._slow_alpha = 2.0 / (ema_slow_period + 1)
+        self._atr_period = atr_period
+        self._vwap_window = vwap_window
+        self._atr_baseline_window = atr_baseline_window
+        self._series: Dict[Tuple[str, str], _SeriesState] = {}
+
+    def _state(self, symbol: str, timeframe: str) -> _SeriesState:
+        key = (symbol, timeframe)
+        state = self._series.get(key)
+        if state is None:
+            state = _SeriesState(self._vwap_window, self._atr_baseline_window)
+            self._series[key] = state
+        return state
+
+    def update_price(self, symbol: str, timeframe: str, price: float, atr: float, volume: float = 1.0) -> MarketContext:
+        state = self._state(symbol, timeframe)
+        self._update_emas(state, price)
+        state.price_volume.push(price * volume)
+        state.volume.push(volume)
+        state.atr = atr
+        state.atr_window.push(atr)
+        state.prev_close = price
+        return self._refresh(state)
+
+    def update_candle(self, symbol: str, timeframe: str, candle: Candle) -> MarketContext:
+        state = self._state(symbol, timeframe)
+        if state.prev_close is None:
+            true_range = candle.high - candle.low
+        else:
+            true_range = max(
+                candle.high - candle.low, abs(candle.high - state.prev_close), abs(candle.low - state.prev_close)
+            )
+        state.atr = true_range if state.atr is None else state.atr + (true_range - state.atr) / self._atr_period
+        state.atr_window.push(state.atr)
+
+        self._update_emas(state, candle.close)
+        typical = (candle.high + candle.low + candle.close) / 3
+        state.price_volume.push(typical * candle.volume)
+        state.volume.push(candle.volume)
+        state.prev_close = candle.close
+        return self._refresh(state)
+
+    def observe(self, alert: AnyAlert) -> MarketContext:
+        """Fold an alert into its series and return the resulting snapshot."""
+        return self.update_price(alert.symbol, alert.timeframe, alert.price, alert.indicators.ATR)
+
+    def snapshot(self, symbol: str, timeframe: str) -> Optional[MarketContext]:
+        state = self._series.get((symbol, timeframe))
+        return state.snapshot if state is not None else None
+
+    def seed_from_alerts(self, alerts: Iterable[AnyAlert]) -> int:
+        count = 0
+        for alert in alerts:
+            self.observe(alert)
+            count += 1
+        return count
+
+    def seed_from_candles(self, symbol: str, timeframe: str, candles: Iterable[Candle]) -> int:
+        count = 0
+        for candle in candles:
+            self.update_candle(symbol, timeframe, candle)
+            count += 1
+        return count
+
+    def _update_emas(self, state: _SeriesState, price: float) -> None:
+        if state.ema_fast is None:
+            state.ema_fast = price
+            state.ema_slow = price
+        else:
+            state.ema_fast += self._fast_alpha * (price - state.ema_fast)
+            state.ema_slow += self._slow_alpha * (price - state.ema_slow)
+
+    def _refresh(self, state: _SeriesState) -> MarketContext:
+        volume = state.volume.total
+        state.snapshot = MarketContext(
+            ema_fast=state.ema_fast,
+            ema_slow=state.ema_slow,
+            vwap=state.price_volume.total / volume if volume > 0 else None,
+            atr_baseline=state.atr_window.mean,
+        )
+        return state.snapshot
+
+
+def read_candle_file(path: Path) -> Iterator[Candle]:
+    """Read a CSV with ``timestamp,open,high,low,close,volume`` columns (ISO-8601 timestamps)."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            yield Candle(
+                timestamp=datetime.fromisoformat(row["timestamp"]),
+                open=float(row["open"]),
+                high=float(row["high"]),
+                low=float(row["low"]),
+                close=float(row["close"]),
+                volume=float(row["volume"]),
+            )
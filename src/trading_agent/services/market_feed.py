@@ -0,0 +1,172 @@
+"""Market data for :class:`~trading_agent.services.candles.CandleAggregator`: recorded files and socket streams.
+
+Every event is one ``symbol`` at a ``timestamp`` (ISO-8601, naive meaning UTC, or epoch
+seconds; numbers above 1e11 are taken as milliseconds) and is either a tick, with ``price``
+and an optional ``volume``, or a bar, with ``open``, ``high``, ``low``, ``close``, an optional
+``volume`` and its length in ``seconds`` (60 unless given). Files are CSV with those columns
+or newline-delimited JSON (``.jsonl``/``.ndjson``); sockets carry newline-delimited JSON.
+
+Usage::
+
+    python -m trading_agent.services.market_feed ticks.csv --timeframes 1m,5m,15m,1h --store ./alert-store
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from trading_agent.services.candles import DEFAULT_TIMEFRAMES, CandleAggregator
+from trading_agent.services.market_context import Candle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BAR_SECONDS = 60.0
+
+
+class MarketEvent(NamedTuple):
+    symbol: str
+    timestamp: float  # epoch seconds
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    seconds: float  # 0 for a tick
+
+
+def parse_timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace(".", "", 1).isdigit()):
+        seconds = float(value)
+        return seconds / 1000 if seconds > 1e11 else seconds
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_event(fields: Mapping[str, Any]) -> MarketEvent:
+    """Build an event from a CSV row or JSON object; raises KeyError/ValueError when malformed."""
+    timestamp = parse_timestamp(fields["timestamp"])
+    volume = float(fields.get("volume") or 0.0)
+    if fields.get("price") not in (None, ""):
+        price = float(fields["price"])
+        return MarketEvent(fields["symbol"], timestamp, price, price, price, price, volume, 0.0)
+    return MarketEvent(
+        fields["symbol"],
+        timestamp,
+        float(fields["open"]),
+        float(fields["high"]),
+        float(fields["low"]),
+        float(fields["close"]),
+        volume,
+        float(fields.get("seconds") or DEFAULT_BAR_SECONDS),
+    )
+
+
+def read_events(path: Path) -> Iterator[MarketEvent]:
+    """Events of a recorded CSV or JSON-lines file, in file order."""
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.suffix in (".jsonl", ".ndjson"):
+            for line in handle:
+                if line.strip():
+                    yield parse_event(json.loads(line))
+        else:
+            for row in csv.DictReader(handle):
+                yield parse_event(row)
+
+
+def feed(aggregator: CandleAggregator, events: Iterable[MarketEvent]) -> int:
+    """Fold ``events`` into ``aggregator``; returns how many there were."""
+    update_tick, update_bar = aggregator.update_tick, aggregator.update_bar
+    count = 0
+    for symbol, timestamp, open, high, low, close, volume, seconds in events:
+        if seconds:
+            update_bar(symbol, timestamp, open, high, low, close, volume, seconds)
+        else:
+            update_tick(symbol, timestamp, close, volume)
+        count += 1
+    return count
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Expected host:port, got {address!r}")
+    return host, int(port)
+
+
+async def consume_socket(
+    aggregator: CandleAggregator, host: str, port: int, reconnect_delay: float = 1.0, max_delay: float = 30.0
+) -> None:
+    """Feed JSON-lines events from ``host:port`` into ``aggregator`` until cancelled, reconnecting on errors.
+
+    Malformed lines are logged and skipped rather than ending the stream.
+    """
+    delay = reconnect_delay
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError as exc:
+            logger.warning("Market data feed %s:%d unreachable (%s); retrying in %.0fs", host, port, exc, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+            continue
+        logger.info("Connected to market data feed %s:%d", host, port)
+        delay = reconnect_delay
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    event = parse_event(json.loads(line))
+                except (KeyError, TypeError, ValueError) as exc:
+                    logger.warning("Skipping malformed market data line %r: %s", line[:200], exc)
+                    continue
+                feed(aggregator, (event,))
+            logger.warning("Market data feed %s:%d closed the connection", host, port)
+        except OSError as exc:
+            logger.warning("Market data feed %s:%d failed: %s", host, port, exc)
+        finally:
+            writer.close()
+        await asyncio.sleep(delay)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded ticks or bars into candles for every timeframe.")
+    parser.add_argument("path", type=Path, help="CSV or JSON-lines file of ticks or bars")
+    parser.add_argument("--timeframes", default=",".join(DEFAULT_TIMEFRAMES))
+    parser.add_argument("--store", type=Path, help="columnar store root to append the closed candles to")
+    args = parser.parse_args(argv)
+
+    closed: Dict[Tuple[str, str], List[Candle]] = {}
+
+    def keep(symbol: str, timeframe: str, candle: Candle) -> None:
+        closed.setdefault((symbol, timeframe), []).append(candle)
+
+    aggregator = CandleAggregator(args.timeframes.split(","), on_close=[keep] if args.store else ())
+    start = time.perf_counter()
+    count = feed(aggregator, read_events(args.path))
+    aggregator.flush()
+    elapsed = time.perf_counter() - start
+    bars = sum(aggregator.series(symbol, tf).closed for symbol in aggregator.symbols() for tf in aggregator.timeframes)
+    print(f"replayed {count} events into {bars} bars in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} events/s)")
+
+    if args.store:
+        from trading_agent.backtesting.store import ColumnarStore
+
+        store = ColumnarStore(args.store)
+        for (symbol, timeframe), candles in closed.items():
+            store.append_candles(symbol, timeframe, candles)
+        print(f"stored {sum(map(len, closed.values()))} candles under {args.store}")
+
+
+if __name__ == "__main__":
+    main()
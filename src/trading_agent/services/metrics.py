@@ -0,0 +1,228 @@
+"""In-process metrics with Prometheus text exposition.
+
+Children for each label combination are created once and cached, and histograms keep
+preallocated bucket counters, so recording a sample only bumps numbers under a lock.
+
+Each serving worker has its own registry. With several workers, every worker renders its
+samples with a ``worker`` label and :func:`merge_expositions` joins them into one scrape.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _const_labels(labels: Optional[Mapping[str, str]]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in (labels or {}).items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_upper", "_counts", "_sum", "_count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._upper = buckets
+        self._counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._upper, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def _snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child for one label combination."""
+
+    @abstractmethod
+    def _render_samples(self, const: str = "") -> List[str]:
+        """Exposition lines for every child, with ``const`` labels appended to each."""
+
+    def render(self, const_labels: Optional[Mapping[str, str]] = None) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._render_samples(_const_labels(const_labels)),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _render_samples(self, const: str = "") -> List[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key, const)} {child.value}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_samples(self, const: str = "") -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            counts, total, count = child._snapshot()
+            cumulative = 0
+            for upper, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if upper == float("inf") else repr(upper)
+                labels = _format_labels(self.labelnames, key, const, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, const)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, const_labels: Optional[Mapping[str, str]] = None) -> str:
+        """Text exposition; ``const_labels`` (e.g. ``{"worker": "0"}``) are added to every sample."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render(const_labels))
+        return "\n".join(lines) + "\n"
+
+
+def merge_expositions(texts: Sequence[str]) -> str:
+    """Join the expositions of several workers, keeping each metric's samples under one HELP/TYPE header.
+
+    The inputs must carry a label that tells their samples apart, such as ``worker``.
+    """
+    families: Dict[str, List[str]] = {}
+    headers: Dict[str, List[str]] = {}
+    for text in texts:
+        family = ""
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                family = line.split(" ", 3)[2]
+                if len(headers.setdefault(family, [])) < 2:
+                    headers[family].append(line)
+                families.setdefault(family, [])
+            elif line:
+                families.setdefault(family, []).append(line)
+    lines: List[str] = []
+    for family, samples in families.items():
+        lines.extend(headers.get(family, []))
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY: Histogram = REGISTRY.register(
+    Histogram("trading_agent_stage_seconds", "Time spent in each webhook pipeline stage", ["stage"])
+)
+DECISIONS: Counter = REGISTRY.register(Counter("trading_agent_decisions", "Trade decisions by action", ["action"]))
+IGNORE_REASONS: Counter = REGISTRY.register(
+    Counter("trading_agent_ignored_decisions", "Ignored decisions by reason", ["reason"])
+)
+EXECUTIONS: Counter = REGISTRY.register(Counter("trading_agent_executions", "Execution results by status", ["status"]))
+DUPLICATE_ALERTS: Counter = REGISTRY.register(
+    Counter("trading_agent_duplicate_alerts", "Duplicate webhooks answered without re-running the pipeline", ["source"])
+)
+AUDIT_DEAD_LETTERS: Counter = REGISTRY.register(
+    Counter("trading_agent_audit_dead_letters", "Audit records the writer could not commit and set aside", ["kind"])
+)
+
+
+def observe_stage(stage: str) -> Callable[[F], F]:
+    """Decorator recording the wall time of every call into ``STAGE_LATENCY{stage=...}``."""
+    child = STAGE_LATENCY.labels(stage)
+
+    def decorator(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+
+from trading_agent.config.settings import Settings
+from trading_agent.schemas.pipeline import Action, TradeDecision
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def new_client_order_id(symbol: str, prefix: str = "ta") -> str:
+    """A unique ID for one order; it is reused on every retry so the exchange can deduplicate."""
+    return f"{prefix}-{symbol}-{uuid.uuid4().hex}"
+
+
+@dataclass(frozen=True)
+class OrderRequest:
+    client_order_id: str
+    symbol: str
+    side: str
+    size: float
+    order_type: str
+    stop_loss: Optional[float]
+    take_profit: Optional[float]
+
+    @classmethod
+    def from_decision(cls, decision: TradeDecision, client_order_id: str) -> "OrderRequest":
+        return cls(
+            client_order_id=client_order_id,
+            symbol=decision.symbol,
+            side="buy" if decision.action == Action.ENTER_LONG else "sell",
+            size=decision.size,
+            order_type=decision.order_type,
+            stop_loss=decision.stop_loss,
+            take_profit=decision.take_profit,
+        )
+
+
+@dataclass(frozen=True)
+class OrderStatusUpdate:
+    client_order_id: str
+    exchange_order_id: Optional[str]
+    status: str
+    filled_size: float
+    error: Optional[str] = None
+
+
+class ExchangeError(RuntimeError):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class HttpExchangeClient:
+    """Submits orders over one pooled ``httpx.AsyncClient``.
+
+    The exchange is expected to accept ``POST /orders`` with the :class:`OrderRequest` fields
+    and answer with ``order_id``, ``status`` and ``filled_size``.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        import httpx  # only live trading talks to an exchange; paper workers never load it
+
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def submit(self, order: OrderRequest) -> OrderStatusUpdate:
+        import httpx
+
+        try:
+            response = await self._client.post(
+                "/orders",
+                json={
+                    "client_order_id": order.client_order_id,
+                    "symbol": order.symbol,
+                    "side": order.side,
+                    "size": order.size,
+                    "order_type": order.order_type,
+                    "stop_loss": order.stop_loss,
+                    "take_profit": order.take_profit,
+                },
+            )
+        except httpx.TransportError as exc:
+            raise ExchangeError(f"transport error: {exc}", retryable=True) from exc
+
+        if response.status_code >= 400:
+            raise ExchangeError(
+                f"exchange returned {response.status_code}: {response.text}",
+                retryable=response.status_code in RETRYABLE_STATUS_CODES,
+            )
+        body = response.json()
+        return OrderStatusUpdate(
+            client_order_id=order.client_order_id,
+            exchange_order_id=body.get("order_id"),
+            status=body.get("status", "submitted"),
+            filled_size=float(body.get("filled_size", 0.0)),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self._rate = rate
+        self._capacity = float(burst or max(1, int(rate)))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+StatusCallback = Callable[[OrderStatusUpdate], Awaitable[None]]
+
+
+class OrderDispatcher:
+    """Queues live orders per symbol and sends them to the exchange in the background.
+
+    Each symbol has a bounded queue drained by its own task, so orders for one symbol reach the
+    exchange in submission order. A global semaphore caps in-flight requests and a token bucket
+    caps the request rate. Retryable failures back off exponentially and reuse the same client
+    order ID. Every final status is handed to ``on_status``.
+    """
+
+    def __init__(
+        self,
+        client: HttpExchangeClient,
+        on_status: Optional[StatusCallback] = None,
+        concurrency: int = 4,
+        rate_limit: float = 10.0,
+        queue_size: int = 100,
+        max_retries: int = 3,
+        backoff: float = 0.2,
+    ):
+        self._client = client
+        self._on_status = on_status
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limiter = RateLimiter(rate_limit)
+        self._queue_size = queue_size
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings, on_status: Optional[StatusCallback] = None) -> "OrderDispatcher":
+        client = HttpExchangeClient(
+            settings.exchange_base_url,
+            max_connections=settings.order_concurrency,
+            timeout=settings.exchange_timeout_seconds,
+        )
+        return cls(
+            client,
+            on_status=on_status,
+            concurrency=settings.order_concurrency,
+            rate_limit=settings.order_rate_limit_per_second,
+            queue_size=settings.order_queue_size,
+            max_retries=settings.order_max_retries,
+            backoff=settings.order_retry_backoff_seconds,
+        )
+
+    def dispatch(self, order: OrderRequest) -> None:
+        """Queue an order; must be called from the event loop thread. Raises QueueFullError when its symbol's queue is full."""
+        queue = self._queues.get(order.symbol)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self._queue_size)
+            self._queues[order.symbol] = queue
+            self._workers[order.symbol] = asyncio.get_running_loop().create_task(
+                self._drain(queue), name=f"orders-{order.symbol}"
+            )
+        try:
+            queue.put_nowait(order)
+        except asyncio.QueueFull as exc:
+            raise QueueFullError(f"order queue for {order.symbol} is full") from exc
+
+    async def join(self) -> None:
+        """Wait until every queued order has a final status."""
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def close(self) -> None:
+        await self.join()
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        await self._client.aclose()
+
+    async def _drain(self, queue: asyncio.Queue) -> None:
+        while True:
+            order = await queue.get()
+            try:
+                update = await self._send(order)
+                if self._on_status is not None:
+                    await self._on_status(update)
+            except Exception:  # pragma: no cover - defensive logging
+                logger.exception("Order %s could not be processed", order.client_order_id)
+            finally:
+                queue.task_done()
+
+    async def _send(self, order: OrderRequest) -> OrderStatusUpdate:
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            try:
+                async with self._semaphore:
+                    return await self._client.submit(order)
+            except ExchangeError as exc:
+                if not exc.retryable or attempt >= self._max_retries:
+                    logger.warning("Order %s failed: %s", order.client_order_id, exc)
+                    return OrderStatusUpdate(order.client_order_id, None, "failed", 0.0, error=str(exc))
+                delay = self._backoff * (2**attempt)
+                attempt += 1
+                logger.info("Retrying order %s in %.2fs (%s)", order.client_order_id, delay, exc)
+                await asyncio.sleep(delay)
@@ -1,65 +1,584 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from trading_agent.config.settings import get_settings
 from trading_agent.db.database import session_scope
-from trading_agent.models.entities import Alert, Decision, Order, ValidationResult
-from trading_agent.schemas.alert import AlertPayload
-from trading_agent.schemas.pipeline import TradeDecision, ValidationResultSchema
+from trading_agent.models.entities import Alert, Decision, Order, Position, ValidationResult
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.schemas.pipeline import Action, AnyValidation, TradeDecision
+from trading_agent.services.metrics import observe_stage
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.pipeline import PipelineOutcome
+from trading_agent.services.risk_book import PENDING_ORDER_STATUSES, RiskBook
+from trading_agent.services.rollups import UNKNOWN_TIMEFRAME, RollupDeltas, RollupKey
 
+logger = logging.getLogger(__name__)
 
-def persist_alert(alert: AlertPayload) -> int:
-    with session_scope() as session:
-        db_alert = Alert(
-            symbol=alert.symbol,
-            price=alert.price,
-            signal=alert.signal,
-            timeframe=alert.timeframe,
-            indicators=alert.indicators.model_dump(),
+
+@dataclass(frozen=True)
+class PipelineRecordIds:
+    alert_id: int
+    validation_id: int
+    decision_id: int
+    order_id: int
+    position_id: Optional[int] = None
+
+
+def _indicator_values(indicators: Any) -> dict[str, float]:
+    # Attribute reads work for IndicatorPayload and ParsedIndicators and skip model_dump()
+    return {"RSI": indicators.RSI, "MACD": indicators.MACD, "EMA20": indicators.EMA20, "ATR": indicators.ATR}
+
+
+def _alert_values(alert: AnyAlert, idempotency_key: Optional[str] = None) -> dict[str, Any]:
+    return {
+        "symbol": alert.symbol,
+        "price": alert.price,
+        "signal": alert.signal,
+        "timeframe": alert.timeframe,
+        "indicators": _indicator_values(alert.indicators),
+        "idempotency_key": idempotency_key,
+    }
+
+
+def _validation_values(alert_id: int, validation: AnyValidation) -> dict[str, Any]:
+    return {
+        "alert_id": alert_id,
+        "valid": validation.valid,
+        "confidence": validation.confidence,
+        "reasons": validation.reasons,
+    }
+
+
+def _decision_values(alert_id: int, decision: TradeDecision) -> dict[str, Any]:
+    return {
+        "alert_id": alert_id,
+        "action": decision.action,
+        "symbol": decision.symbol,
+        "order_type": decision.order_type,
+        "size": decision.size,
+        "stop_loss": decision.stop_loss,
+        "take_profit": decision.take_profit,
+        "confidence": decision.confidence,
+    }
+
+
+def _order_values(decision_id: int, execution: Any) -> dict[str, Any]:
+    return {
+        "decision_id": decision_id,
+        "client_order_id": getattr(execution, "client_order_id", None),
+        "exchange_order_id": execution.order_id,
+        "status": execution.status,
+        "filled_size": execution.executed_size,
+    }
+
+
+def _position_values(decision: TradeDecision, execution: Any, price: float) -> Optional[dict[str, Any]]:
+    if decision.action == Action.IGNORE or execution.status != "filled" or execution.executed_size <= 0:
+        return None
+    sign = 1.0 if decision.action == Action.ENTER_LONG else -1.0
+    return {
+        "symbol": decision.symbol,
+        "size": sign * execution.executed_size,
+        "entry_price": price,
+        "stop_loss": decision.stop_loss,
+        "take_profit": decision.take_profit,
+        "open": True,
+    }
+
+
+def _alert_row(alert: AnyAlert, idempotency_key: Optional[str] = None) -> Alert:
+    return Alert(**_alert_values(alert, idempotency_key))
+
+
+def _validation_row(alert_id: int, validation: AnyValidation) -> ValidationResult:
+    return ValidationResult(**_validation_values(alert_id, validation))
+
+
+def _decision_row(alert_id: int, decision: TradeDecision, created_at: datetime) -> Decision:
+    # Stamped explicitly so the rollup delta lands on the same day as the row
+    return Decision(**_decision_values(alert_id, decision), created_at=created_at)
+
+
+def _order_row(decision_id: int, execution: Any) -> Order:
+    return Order(**_order_values(decision_id, execution))
+
+
+def _position_row(decision: TradeDecision, execution: Any, price: float, decision_id: int) -> Optional[Position]:
+    values = _position_values(decision, execution, price)
+    return Position(**values, decision_id=decision_id) if values is not None else None
+
+
+def _record_outcome(
+    deltas: RollupDeltas, key: RollupKey, decision: Any, price: float, order: Optional[dict[str, Any]] = None
+) -> None:
+    """Count a decision (a model or its row values) and, when given, the values of its order row."""
+    action, confidence = (
+        (decision["action"], decision["confidence"]) if isinstance(decision, dict) else (decision.action, decision.confidence)
+    )
+    deltas.decision(key, action, confidence)
+    if order is not None:
+        deltas.order(key, action, price, order["status"], order["filled_size"] or 0.0)
+
+
+def _apply_order_status(session: Session, deltas: RollupDeltas, values: dict[str, Any]) -> bool:
+    """Update the order with ``values["client_order_id"]`` and move its rollup counts from the old state to the new one.
+
+    The first final status with a fill opens the order's position, as a paper fill does, so the
+    risk book counts it after a restart and it can be closed.
+    """
+    row = session.execute(
+        select(
+            Order.id, Order.status, Order.filled_size, Decision.id, Decision.symbol, Decision.created_at,
+            Decision.action, Decision.stop_loss, Decision.take_profit, Alert.timeframe, Alert.price,
+        )
+        .join(Decision, Decision.id == Order.decision_id)
+        .join(Alert, Alert.id == Decision.alert_id)
+        .where(Order.client_order_id == values["client_order_id"])
+        .with_for_update(of=Order)
+    ).one_or_none()
+    if row is None:
+        return False
+    order_id, status, filled_size, decision_id, symbol, created_at, action, stop_loss, take_profit, timeframe, price = row
+    session.execute(
+        update(Order)
+        .where(Order.id == order_id)
+        .values(status=values["status"], exchange_order_id=values["exchange_order_id"], filled_size=values["filled_size"])
+    )
+    deltas.order_change(
+        (symbol, created_at.date(), timeframe), action, price,
+        (status, filled_size or 0.0), (values["status"], values["filled_size"] or 0.0),
+    )
+    filled = values["filled_size"] or 0.0
+    if status in PENDING_ORDER_STATUSES and values["status"] not in PENDING_ORDER_STATUSES and filled > 0:
+        sign = -1.0 if action == Action.ENTER_SHORT else 1.0
+        session.add(
+            Position(
+                symbol=symbol, size=sign * filled, entry_price=price, stop_loss=stop_loss,
+                take_profit=take_profit, open=True, decision_id=decision_id,
+            )
         )
+    return True
+
+
+@observe_stage("persist_alert")
+def persist_alert(alert: AnyAlert) -> int:
+    with session_scope() as session:
+        db_alert = _alert_row(alert)
         session.add(db_alert)
         session.flush()
         return db_alert.id
 
 
-def persist_validation(alert_id: int, validation: ValidationResultSchema) -> int:
+@observe_stage("persist_validation")
+def persist_validation(alert_id: int, validation: AnyValidation) -> int:
     with session_scope() as session:
-        record = ValidationResult(
-            alert_id=alert_id,
-            valid=validation.valid,
-            confidence=validation.confidence,
-            reasons=validation.reasons,
-        )
+        record = _validation_row(alert_id, validation)
         session.add(record)
         session.flush()
         return record.id
 
 
+@observe_stage("persist_decision")
 def persist_decision(alert_id: int, decision: TradeDecision) -> int:
     with session_scope() as session:
-        record = Decision(
-            alert_id=alert_id,
-            action=decision.action,
-            symbol=decision.symbol,
-            order_type=decision.order_type,
-            size=decision.size,
-            stop_loss=decision.stop_loss,
-            take_profit=decision.take_profit,
-            confidence=decision.confidence,
-        )
+        timeframe = session.scalar(select(Alert.timeframe).where(Alert.id == alert_id))
+        record = _decision_row(alert_id, decision, datetime.utcnow())
         session.add(record)
         session.flush()
+        deltas = RollupDeltas()
+        deltas.decision((decision.symbol, record.created_at.date(), timeframe), decision.action, decision.confidence)
+        deltas.apply(session)
         return record.id
 
 
+@observe_stage("persist_order")
 def persist_order(decision_id: int, execution: Any) -> int:
     with session_scope() as session:
-        record = Order(
-            decision_id=decision_id,
-            exchange_order_id=execution.order_id,
-            status=execution.status,
-            filled_size=execution.executed_size,
-        )
+        symbol, created_at, action, timeframe, price = session.execute(
+            select(Decision.symbol, Decision.created_at, Decision.action, Alert.timeframe, Alert.price)
+            .join(Alert, Alert.id == Decision.alert_id)
+            .where(Decision.id == decision_id)
+        ).one()
+        record = _order_row(decision_id, execution)
         session.add(record)
         session.flush()
+        deltas = RollupDeltas()
+        deltas.order((symbol, created_at.date(), timeframe), action, price, execution.status, execution.executed_size)
+        deltas.apply(session)
         return record.id
+
+
+@observe_stage("persist_pipeline")
+def persist_pipeline(
+    alert: AnyAlert,
+    validation: AnyValidation,
+    decision: TradeDecision,
+    execution: Any,
+    idempotency_key: Optional[str] = None,
+) -> PipelineRecordIds:
+    """Write the alert, validation, decision and order rows of one webhook in a single transaction.
+
+    A filled entry also opens a ``positions`` row so the risk book can be rebuilt after a restart.
+    The performance rollup of the decision's day is incremented in the same transaction.
+    """
+    now = datetime.utcnow()
+    with session_scope() as session:
+        alert_row = _alert_row(alert, idempotency_key)
+        session.add(alert_row)
+        session.flush()
+
+        validation_row = _validation_row(alert_row.id, validation)
+        decision_row = _decision_row(alert_row.id, decision, now)
+        session.add_all([validation_row, decision_row])
+        session.flush()
+
+        order_values = _order_values(decision_row.id, execution)
+        order_row = Order(**order_values)
+        session.add(order_row)
+        position_row = _position_row(decision, execution, alert.price, decision_row.id)
+        if position_row is not None:
+            session.add(position_row)
+        session.flush()
+
+        deltas = RollupDeltas()
+        _record_outcome(deltas, (decision.symbol, now.date(), alert.timeframe), decision, alert.price, order_values)
+        deltas.apply(session)
+
+        return PipelineRecordIds(
+            alert_id=alert_row.id,
+            validation_id=validation_row.id,
+            decision_id=decision_row.id,
+            order_id=order_row.id,
+            position_id=position_row.id if position_row is not None else None,
+        )
+
+
+def _insert_returning_ids(session: Session, entity: type, rows: list[dict[str, Any]]) -> list[int]:
+    if not rows:
+        return []
+    statement = insert(entity).returning(entity.id, sort_by_parameter_order=True)
+    return list(session.scalars(statement, rows))
+
+
+@observe_stage("update_order_status")
+def update_order_status(status_update: OrderStatusUpdate) -> bool:
+    """Record the exchange's answer for an order; False when no row has that client order ID yet."""
+    with session_scope() as session:
+        deltas = RollupDeltas()
+        if not _apply_order_status(session, deltas, order_status_record(status_update)):
+            return False
+        deltas.apply(session)
+        return True
+
+
+@observe_stage("persist_pipeline_batch")
+def persist_pipeline_batch(
+    outcomes: Sequence[PipelineOutcome], idempotency_keys: Optional[Sequence[Optional[str]]] = None
+) -> List[PipelineRecordIds]:
+    """Bulk-insert the rows of many webhooks in one transaction, one multi-row INSERT per table.
+
+    ``idempotency_keys``, when given, holds one key per outcome; a key that is already stored
+    violates its unique constraint and rolls the whole batch back.
+    """
+    if not outcomes:
+        return []
+    keys = idempotency_keys if idempotency_keys is not None else [None] * len(outcomes)
+    now = datetime.utcnow()
+    with session_scope() as session:
+        alert_ids = _insert_returning_ids(
+            session, Alert, [_alert_values(outcome.alert, key) for outcome, key in zip(outcomes, keys)]
+        )
+        validation_ids = _insert_returning_ids(
+            session,
+            ValidationResult,
+            [_validation_values(alert_id, outcome.validation) for alert_id, outcome in zip(alert_ids, outcomes)],
+        )
+        decision_ids = _insert_returning_ids(
+            session,
+            Decision,
+            [_stamped(_decision_values(alert_id, outcome.decision), now) for alert_id, outcome in zip(alert_ids, outcomes)],
+        )
+        orders = [_order_values(decision_id, outcome.execution) for decision_id, outcome in zip(decision_ids, outcomes)]
+        order_ids = _insert_returning_ids(session, Order, orders)
+
+        positions = [_position_values(o.decision, o.execution, o.alert.price) for o in outcomes]
+        position_ids = iter(
+            _insert_returning_ids(
+                session,
+                Position,
+                [{**values, "decision_id": d} for values, d in zip(positions, decision_ids) if values is not None],
+            )
+        )
+
+        deltas = RollupDeltas()
+        for outcome, order in zip(outcomes, orders):
+            key = (outcome.decision.symbol, now.date(), outcome.alert.timeframe)
+            _record_outcome(deltas, key, outcome.decision, outcome.alert.price, order)
+        deltas.apply(session)
+
+        return [
+            PipelineRecordIds(
+                alert_id=alert_id,
+                validation_id=validation_id,
+                decision_id=decision_id,
+                order_id=order_id,
+                position_id=next(position_ids) if position is not None else None,
+            )
+            for alert_id, validation_id, decision_id, order_id, position in zip(
+                alert_ids, validation_ids, decision_ids, order_ids, positions
+            )
+        ]
+
+
+@observe_stage("persist_alerts")
+def persist_alerts(
+    alerts: Sequence[AnyAlert],
+    idempotency_keys: Optional[Sequence[Optional[str]]] = None,
+    before_commit: Optional[Callable[[List[int]], None]] = None,
+) -> List[int]:
+    """Insert only the alert rows of many webhooks, in one transaction; returns their IDs in order.
+
+    With write-behind auditing this is the one write a webhook waits for; the validation,
+    decision and order rows follow through :class:`trading_agent.services.audit_log.AuditWriter`.
+    ``before_commit`` gets the new IDs while the transaction is still open, so the audit
+    records can be logged before the alerts become visible.
+    """
+    if not alerts:
+        return []
+    keys = idempotency_keys if idempotency_keys is not None else [None] * len(alerts)
+    with session_scope() as session:
+        alert_ids = _insert_returning_ids(session, Alert, [_alert_values(alert, key) for alert, key in zip(alerts, keys)])
+        if before_commit is not None:
+            before_commit(alert_ids)
+        return alert_ids
+
+
+AUDIT_PIPELINE = "pipeline"
+AUDIT_ORDER_STATUS = "order_status"
+
+
+def audit_record(
+    alert_id: int, outcome: PipelineOutcome, created_at: Optional[datetime] = None, idempotency_key: Optional[str] = None
+) -> dict[str, Any]:
+    """JSON-ready rows of one webhook except its alert, stamped with the time they happened.
+
+    ``idempotency_key`` identifies the alert row on replay, in case the record was logged for
+    an alert insert that then rolled back and ``alert_id`` went to another alert.
+    """
+    decision, execution = outcome.decision, outcome.execution
+    return {
+        "kind": AUDIT_PIPELINE,
+        "alert_id": alert_id,
+        "idempotency_key": idempotency_key,
+        "created_at": (created_at or datetime.utcnow()).isoformat(),
+        "validation": _validation_values(alert_id, outcome.validation),
+        "decision": _decision_values(alert_id, decision),
+        "order": _order_values(0, execution),  # decision_id is only known once the decision is inserted
+        "position": _position_values(decision, execution, outcome.alert.price),
+    }
+
+
+def order_status_record(status_update: OrderStatusUpdate) -> dict[str, Any]:
+    return {
+        "kind": AUDIT_ORDER_STATUS,
+        "client_order_id": status_update.client_order_id,
+        "exchange_order_id": status_update.exchange_order_id,
+        "status": status_update.status,
+        "filled_size": status_update.filled_size,
+    }
+
+
+def _stamped(values: dict[str, Any], created_at: datetime, **extra: Any) -> dict[str, Any]:
+    return {**values, **extra, "created_at": created_at}
+
+
+@observe_stage("write_audit_records")
+def write_audit_records(records: Sequence[dict[str, Any]], skip_applied: bool = False) -> List[dict[str, Any]]:
+    """Commit audit records in one transaction, inserts first and then status updates in order.
+
+    ``skip_applied`` drops pipeline records whose validation row already exists (or that repeat
+    an earlier record of the batch), which makes replaying a log after a crash idempotent. It
+    also drops records whose alert never committed. Returns the status records that matched no
+    order row, so the caller can try them again once the order shows up.
+    """
+    pipeline = [record for record in records if record["kind"] == AUDIT_PIPELINE]
+    statuses = [record for record in records if record["kind"] == AUDIT_ORDER_STATUS]
+    with session_scope() as session:
+        alerts: Dict[int, Tuple[str, float]] = {}
+        keys: Dict[int, Optional[str]] = {}
+        if pipeline:
+            for alert_id, timeframe, price, key in session.execute(
+                select(Alert.id, Alert.timeframe, Alert.price, Alert.idempotency_key).where(
+                    Alert.id.in_([record["alert_id"] for record in pipeline])
+                )
+            ):
+                alerts[alert_id] = (timeframe, price)
+                keys[alert_id] = key
+        if skip_applied and pipeline:
+            applied = set(
+                session.scalars(
+                    select(ValidationResult.alert_id).where(
+                        ValidationResult.alert_id.in_([record["alert_id"] for record in pipeline])
+                    )
+                )
+            )
+            fresh = []
+            for record in pipeline:
+                alert_id = record["alert_id"]
+                # Logged before the alert commit, whose transaction may then have rolled back
+                stored = alert_id in alerts and record.get("idempotency_key") in (None, keys[alert_id])
+                if stored and alert_id not in applied:
+                    applied.add(alert_id)
+                    fresh.append(record)
+            pipeline = fresh
+        stamps = [datetime.fromisoformat(record["created_at"]) for record in pipeline]
+        _insert_returning_ids(
+            session, ValidationResult, [_stamped(r["validation"], at) for r, at in zip(pipeline, stamps)]
+        )
+        decision_ids = _insert_returning_ids(
+            session, Decision, [_stamped(r["decision"], at) for r, at in zip(pipeline, stamps)]
+        )
+        _insert_returning_ids(
+            session,
+            Order,
+            [_stamped(r["order"], at, decision_id=d) for r, at, d in zip(pipeline, stamps, decision_ids)],
+        )
+        _insert_returning_ids(
+            session,
+            Position,
+            [
+                _stamped(r["position"], at, decision_id=d)
+                for r, at, d in zip(pipeline, stamps, decision_ids)
+                if r["position"] is not None
+            ],
+        )
+
+        deltas = RollupDeltas()
+        for record, at in zip(pipeline, stamps):
+            timeframe, price = alerts[record["alert_id"]]
+            decision = record["decision"]
+            _record_outcome(deltas, (decision["symbol"], at.date(), timeframe), decision, price, record["order"])
+
+        unmatched = [record for record in statuses if not _apply_order_status(session, deltas, record)]
+        deltas.apply(session)
+        return unmatched
+
+
+@observe_stage("close_position")
+def close_position(
+    position_id: int, exit_price: float, closed_at: Optional[datetime] = None, risk_book: Optional[RiskBook] = None
+) -> Optional[float]:
+    """Close an open position at ``exit_price``; returns its realized P&L, or None when it is not open.
+
+    The P&L counts towards the rollup of the day it closed, under the timeframe of the alert
+    that opened it. Once the close commits, the position's exposure is released from
+    ``risk_book``, and its P&L is added to the book's daily loss when it closed today.
+    """
+    closed_at = closed_at or datetime.utcnow()
+    with session_scope() as session:
+        row = session.execute(
+            select(Position.symbol, Position.size, Position.entry_price, Alert.timeframe)
+            .outerjoin(Decision, Decision.id == Position.decision_id)
+            .outerjoin(Alert, Alert.id == Decision.alert_id)
+            .where(Position.id == position_id, Position.open.is_(True))
+            .with_for_update(of=Position)
+        ).one_or_none()
+        if row is None:
+            return None
+        symbol, size, entry_price, timeframe = row
+        realized_pnl = size * (exit_price - entry_price)
+        session.execute(
+            update(Position)
+            .where(Position.id == position_id)
+            .values(open=False, realized_pnl=realized_pnl, closed_at=closed_at)
+        )
+        deltas = RollupDeltas()
+        deltas.closed_position((symbol, closed_at.date(), timeframe or UNKNOWN_TIMEFRAME), realized_pnl)
+        deltas.apply(session)
+    if risk_book is not None:
+        today = closed_at.date() == datetime.utcnow().date()
+        risk_book.close_position(symbol, size, entry_price, realized_pnl if today else 0.0)
+    return realized_pnl
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_persistence_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = ThreadPoolExecutor(max_workers=settings.persistence_workers, thread_name_prefix="persistence")
+        return _executor
+
+
+def shutdown_persistence_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def persist_pipeline_async(
+    alert: AnyAlert,
+    validation: AnyValidation,
+    decision: TradeDecision,
+    execution: Any,
+    idempotency_key: Optional[str] = None,
+) -> PipelineRecordIds:
+    """Run :func:`persist_pipeline` on the bounded persistence thread pool so the event loop is never blocked."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_persistence_executor(), partial(persist_pipeline, alert, validation, decision, execution, idempotency_key)
+    )
+
+
+async def persist_pipeline_batch_async(
+    outcomes: Sequence[PipelineOutcome], idempotency_keys: Optional[Sequence[Optional[str]]] = None
+) -> List[PipelineRecordIds]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_persistence_executor(), partial(persist_pipeline_batch, outcomes, idempotency_keys)
+    )
+
+
+async def persist_alerts_async(
+    alerts: Sequence[AnyAlert],
+    idempotency_keys: Optional[Sequence[Optional[str]]] = None,
+    before_commit: Optional[Callable[[List[int]], None]] = None,
+) -> List[int]:
+    """Run :func:`persist_alerts` on the persistence pool; ``before_commit`` runs on that thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_persistence_executor(), partial(persist_alerts, alerts, idempotency_keys, before_commit)
+    )
+
+
+async def update_order_status_async(status_update: OrderStatusUpdate, attempts: int = 5, delay: float = 0.05) -> None:
+    """Persist an order status off the event loop.
+
+    The dispatcher can hear back from the exchange before the webhook's own transaction has
+    inserted the order row, so a missing row is retried briefly before giving up.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(attempts):
+        if await loop.run_in_executor(get_persistence_executor(), update_order_status, status_update):
+            return
+        await asyncio.sleep(delay * (attempt + 1))
+    logger.warning(
+        "No order row for client order id %s; status %s not recorded", status_update.client_order_id, status_update.status
+    )
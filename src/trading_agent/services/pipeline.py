@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.schemas.pipeline import Action, AnyValidation, ExecutionResult, TradeDecision
+from trading_agent.services.decision_engine import DecisionEngine
+from trading_agent.services.execution_engine import ExecutionEngine
+from trading_agent.services.market_context import MarketContextProvider
+from trading_agent.services.metrics import DECISIONS, EXECUTIONS, IGNORE_REASONS, STAGE_LATENCY
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.risk_book import RiskBook
+from trading_agent.services.validation_engine import ValidationEngine
+
+
+_CONTEXT_LATENCY = STAGE_LATENCY.labels("market_context")
+_EVALUATE_LATENCY = STAGE_LATENCY.labels("validation_engine.evaluate")
+_EVALUATE_MANY_LATENCY = STAGE_LATENCY.labels("validation_engine.evaluate_many")
+_DECIDE_LATENCY = STAGE_LATENCY.labels("decision_engine.decide")
+_EXECUTE_LATENCY = STAGE_LATENCY.labels("execution_engine.execute")
+_DECISION_COUNTS = {action: DECISIONS.labels(action.value) for action in Action}
+
+
+@dataclass
+class PipelineOutcome:
+    alert: AnyAlert
+    validation: AnyValidation
+    decision: TradeDecision
+    execution: ExecutionResult
+
+
+class TradingPipeline:
+    """Validation, decision and execution for alerts, sharing one context provider and risk book."""
+
+    def __init__(
+        self,
+        validation_engine: ValidationEngine,
+        decision_engine: DecisionEngine,
+        execution_engine: ExecutionEngine,
+        context_provider: MarketContextProvider,
+        risk_book: RiskBook,
+    ):
+        self.validation_engine = validation_engine
+        self.decision_engine = decision_engine
+        self.execution_engine = execution_engine
+        self.context_provider = context_provider
+        self.risk_book = risk_book
+
+    def process(self, alert: AnyAlert) -> PipelineOutcome:
+        clock = time.perf_counter
+        start = clock()
+        context = self.context_provider.observe(alert)
+        checkpoint = clock()
+        _CONTEXT_LATENCY.observe(checkpoint - start)
+
+        start = checkpoint
+        validation = self.validation_engine.evaluate(alert, context)
+        _EVALUATE_LATENCY.observe(clock() - start)
+        return self._decide(alert, validation)
+
+    def _decide(self, alert: AnyAlert, validation: AnyValidation) -> PipelineOutcome:
+        clock = time.perf_counter
+        start = clock()
+        decision = self.decision_engine.decide(alert, validation, self.risk_book.snapshot())
+        checkpoint = clock()
+        _DECIDE_LATENCY.observe(checkpoint - start)
+
+        start = checkpoint
+        execution = self.execution_engine.execute(decision)
+        _EXECUTE_LATENCY.observe(clock() - start)
+
+        self.risk_book.apply_execution(decision, execution, alert.price)
+        _DECISION_COUNTS[decision.action].inc()
+        if decision.reason is not None:
+            IGNORE_REASONS.labels(decision.reason).inc()
+        EXECUTIONS.labels(execution.status).inc()
+        return PipelineOutcome(alert=alert, validation=validation, decision=decision, execution=execution)
+
+    def process_batch(self, alerts: Sequence[AnyAlert]) -> List[PipelineOutcome]:
+        # Alerts run in arrival order so each decision sees the exposure left by the ones before it
+        if self.validation_engine.model is None or len(alerts) < 2:
+            return [self.process(alert) for alert in alerts]
+        # Contexts depend only on the alerts, not on decisions, so a confidence model can score
+        # the whole micro-batch in one prediction before the decisions run in order
+        clock = time.perf_counter
+        contexts = []
+        for alert in alerts:
+            start = clock()
+            contexts.append(self.context_provider.observe(alert))
+            _CONTEXT_LATENCY.observe(clock() - start)
+        start = clock()
+        validations = self.validation_engine.evaluate_many(alerts, contexts)
+        _EVALUATE_MANY_LATENCY.observe(clock() - start)
+        return [self._decide(alert, validation) for alert, validation in zip(alerts, validations)]
+
+    def dispatch(self, outcomes: Sequence[PipelineOutcome]) -> List[OrderStatusUpdate]:
+        """Send the live orders of outcomes whose rows are committed.
+
+        An order that cannot be queued gets a failed execution and frees its exposure; the
+        returned updates record the failure on its committed order row.
+        """
+        failures = []
+        for outcome in outcomes:
+            execution = outcome.execution
+            error = self.execution_engine.dispatch(outcome.decision, execution)
+            if error is None:
+                continue
+            self.risk_book.settle_order(execution.client_order_id, "failed", 0.0)
+            outcome.execution = execution.model_copy(update={"success": False, "status": "failed", "error": error})
+            failures.append(OrderStatusUpdate(execution.client_order_id, None, "failed", 0.0, error=error))
+        return failures
+
+    def discard(self, outcomes: Sequence[PipelineOutcome]) -> None:
+        """Take outcomes whose rows could not be committed back out of the risk book; their orders were never sent."""
+        for outcome in outcomes:
+            self.risk_book.revert_execution(outcome.decision, outcome.execution, outcome.alert.price)
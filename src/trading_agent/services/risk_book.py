@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime, time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from trading_agent.models.entities import Alert, Decision, Order, Position
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision
+from trading_agent.services.decision_engine import RiskState
+
+PENDING_ORDER_STATUSES = ("pending", "submitted")
+
+
+class RiskBook:
+    """Process-wide view of open exposure per symbol and realized P&L for the current UTC day.
+
+    Exposure is kept as notional / account equity so it compares directly with
+    ``Settings.max_symbol_exposure``. All access goes through one lock, and :meth:`snapshot`
+    copies the state so decisions see a consistent view without touching the database.
+
+    Live orders reserve their full size until the exchange answers; :meth:`settle_order`
+    releases whatever did not fill and :meth:`close_position` releases a closed position.
+    """
+
+    def __init__(self, account_equity: float, today: Callable[[], date] = lambda: datetime.utcnow().date()):
+        self.account_equity = account_equity
+        self._today = today
+        self._lock = threading.Lock()
+        self._notional: Dict[str, float] = {}
+        self._reserved: Dict[str, Tuple[str, float, float]] = {}  # client order ID -> symbol, size, price
+        self._realized_pl = 0.0
+        self._day = today()
+
+    def hydrate(self, session: Session) -> None:
+        """Rebuild state from open positions, pending orders and positions closed today."""
+        notional: Dict[str, float] = {}
+        reserved: Dict[str, Tuple[str, float, float]] = {}
+        for symbol, size, entry_price in session.execute(
+            select(Position.symbol, Position.size, Position.entry_price).where(Position.open.is_(True))
+        ):
+            notional[symbol] = notional.get(symbol, 0.0) + abs(size) * entry_price
+
+        # Submitted orders have not become positions yet but already commit capital
+        pending = (
+            select(Order.client_order_id, Decision.symbol, Decision.size, Alert.price)
+            .join(Order, Order.decision_id == Decision.id)
+            .join(Alert, Alert.id == Decision.alert_id)
+            .where(Order.status.in_(PENDING_ORDER_STATUSES))
+        )
+        for client_order_id, symbol, size, price in session.execute(pending):
+            notional[symbol] = notional.get(symbol, 0.0) + abs(size) * price
+            if client_order_id is not None:
+                reserved[client_order_id] = (symbol, abs(size), price)
+
+        today = self._today()
+        realized = session.scalars(
+            select(Position.realized_pnl).where(
+                Position.open.is_(False),
+                Position.closed_at >= datetime.combine(today, time.min),
+                Position.realized_pnl.is_not(None),
+            )
+        ).all()
+
+        with self._lock:
+            self._notional = notional
+            self._reserved = reserved
+            self._realized_pl = float(sum(realized))
+            self._day = today
+
+    def apply_execution(self, decision: TradeDecision, execution: ExecutionResult, price: float) -> None:
+        """Add the notional of a filled or submitted entry to its symbol's exposure."""
+        if decision.action == Action.IGNORE or not execution.success:
+            return
+        size = execution.executed_size if execution.status == "filled" else decision.size
+        if size <= 0:
+            return
+        with self._lock:
+            self._notional[decision.symbol] = self._notional.get(decision.symbol, 0.0) + size * price
+            if execution.status in PENDING_ORDER_STATUSES and execution.client_order_id is not None:
+                self._reserved[execution.client_order_id] = (decision.symbol, size, price)
+
+    def revert_execution(self, decision: TradeDecision, execution: ExecutionResult, price: float) -> None:
+        """Undo :meth:`apply_execution` for an outcome whose rows were never committed."""
+        if decision.action == Action.IGNORE or not execution.success:
+            return
+        size = execution.executed_size if execution.status == "filled" else decision.size
+        with self._lock:
+            if execution.client_order_id is not None:
+                self._reserved.pop(execution.client_order_id, None)
+            if size > 0:
+                self._release(decision.symbol, size * price)
+
+    def settle_order(self, client_order_id: str, status: str, filled_size: float) -> None:
+        """Release the unfilled part of a pending order once the exchange reports its final status."""
+        if status in PENDING_ORDER_STATUSES:
+            return
+        with self._lock:
+            reserved = self._reserved.pop(client_order_id, None)
+            if reserved is not None:
+                symbol, size, price = reserved
+                self._release(symbol, max(size - filled_size, 0.0) * price)
+
+    def close_position(self, symbol: str, size: float, entry_price: float, realized_pl: float) -> None:
+        with self._lock:
+            self._roll_day()
+            self._release(symbol, abs(size) * entry_price)
+            self._realized_pl += realized_pl
+
+    def snapshot(self) -> RiskState:
+        with self._lock:
+            self._roll_day()
+            equity = self.account_equity
+            return RiskState(
+                open_positions={symbol: value / equity for symbol, value in self._notional.items()},
+                daily_loss_fraction=max(-self._realized_pl, 0.0) / equity,
+            )
+
+    @property
+    def realized_pl(self) -> float:
+        with self._lock:
+            self._roll_day()
+            return self._realized_pl
+
+    def _release(self, symbol: str, notional: float) -> None:
+        remaining = self._notional.get(symbol, 0.0) - notional
+        if remaining > 0:
+            self._notional[symbol] = remaining
+        else:
+            self._notional.pop(symbol, None)
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._realized_pl = 0.0
+
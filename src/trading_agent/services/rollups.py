@@ -0,0 +1,291 @@
+"""Performance rollups per symbol, UTC day and alert timeframe.
+
+``performance_rollups`` holds running totals so dashboards read a few rows instead of scanning
+``decisions`` and ``orders``. Every write path in :mod:`trading_agent.services.persistence`
+collects a :class:`RollupDeltas` for the rows it inserts or changes. It applies them as
+``INSERT ... ON CONFLICT DO UPDATE`` increments in the same transaction, so the totals commit
+or roll back with the rows and concurrent workers never overwrite each other.
+
+:func:`compute_rollups` recomputes the same totals from the raw tables with grouped queries;
+:func:`backfill` uses it to fill the table for existing history in bulk.
+
+Usage::
+
+    python -m trading_agent.services.rollups --start 2024-01-01 --end 2024-03-31
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, and_, case, delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Decision, Order, PerformanceRollup, Position, SignalAction
+
+RollupKey = Tuple[str, date, str]  # symbol, UTC day, alert timeframe
+UNKNOWN_TIMEFRAME = ""  # positions not linked to the decision that opened them
+
+COUNTERS = (
+    "decisions",
+    "entries",
+    "long_entries",
+    "confidence_sum",
+    "orders",
+    "filled_orders",
+    "filled_size",
+    "gross_notional",
+    "net_notional",
+    "closed_positions",
+    "winning_positions",
+    "realized_pnl",
+)
+FILLED = "filled"
+
+
+def _action_name(action: Any) -> str:
+    # Enum members from the pipeline, plain strings from replayed audit records
+    return getattr(action, "value", action)
+
+
+def _direction(action: Any) -> int:
+    name = _action_name(action)
+    return 1 if name == SignalAction.ENTER_LONG.value else -1 if name == SignalAction.ENTER_SHORT.value else 0
+
+
+def _as_date(value: Any) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class RollupDeltas:
+    """Increments to rollup rows, summed per key so a batch costs one upsert per key it touches."""
+
+    def __init__(self) -> None:
+        self.rows: Dict[RollupKey, Dict[str, float]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def _row(self, key: RollupKey) -> Dict[str, float]:
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = dict.fromkeys(COUNTERS, 0)
+        return row
+
+    def decision(self, key: RollupKey, action: Any, confidence: int) -> None:
+        row = self._row(key)
+        direction = _direction(action)
+        row["decisions"] += 1
+        row["entries"] += direction != 0
+        row["long_entries"] += direction > 0
+        row["confidence_sum"] += confidence
+
+    def order(self, key: RollupKey, action: Any, price: float, status: str, filled_size: float, sign: int = 1) -> None:
+        """Count an order in its current state; ``sign=-1`` takes a previous state back out."""
+        row = self._row(key)
+        notional = filled_size * price
+        row["orders"] += sign
+        row["filled_orders"] += sign * (status == FILLED)
+        row["filled_size"] += sign * filled_size
+        row["gross_notional"] += sign * notional
+        row["net_notional"] += sign * _direction(action) * notional
+
+    def order_change(
+        self, key: RollupKey, action: Any, price: float, old: Tuple[str, float], new: Tuple[str, float]
+    ) -> None:
+        self.order(key, action, price, *old, sign=-1)
+        self.order(key, action, price, *new)
+
+    def closed_position(self, key: RollupKey, realized_pnl: float) -> None:
+        row = self._row(key)
+        row["closed_positions"] += 1
+        row["winning_positions"] += realized_pnl > 0
+        row["realized_pnl"] += realized_pnl
+
+    def apply(self, session: Session) -> None:
+        if not self.rows:
+            return
+        # Sorted so concurrent transactions lock rows in the same order
+        rows = [
+            {"symbol": symbol, "day": day, "timeframe": timeframe, **values, "updated_at": datetime.utcnow()}
+            for (symbol, day, timeframe), values in sorted(self.rows.items())
+        ]
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            statement = upsert(PerformanceRollup)
+            increments = {name: getattr(PerformanceRollup, name) + getattr(statement.excluded, name) for name in COUNTERS}
+            statement = statement.on_conflict_do_update(
+                index_elements=["symbol", "day", "timeframe"],
+                set_={**increments, "updated_at": statement.excluded.updated_at},
+            )
+            session.execute(statement, rows)
+        else:
+            for row in rows:
+                key = and_(
+                    PerformanceRollup.symbol == row["symbol"],
+                    PerformanceRollup.day == row["day"],
+                    PerformanceRollup.timeframe == row["timeframe"],
+                )
+                increments = {name: getattr(PerformanceRollup, name) + row[name] for name in COUNTERS}
+                result = session.execute(update(PerformanceRollup).where(key).values(**increments, updated_at=row["updated_at"]))
+                if result.rowcount == 0:
+                    session.execute(insert(PerformanceRollup).values(**row))
+        self.rows.clear()
+
+
+def compute_rollups(
+    session: Session, start: Optional[date] = None, end: Optional[date] = None
+) -> Dict[RollupKey, Dict[str, float]]:
+    """Rollup totals recomputed from the raw tables for days in ``[start, end]``, keyed like the table."""
+
+    def in_range(column: Any) -> List[Any]:
+        conditions = []
+        if start is not None:
+            conditions.append(column >= datetime.combine(start, time.min))
+        if end is not None:
+            conditions.append(column < datetime.combine(end + timedelta(days=1), time.min))
+        return conditions
+
+    day = func.date(Decision.created_at)
+    direction = case(
+        (Decision.action == SignalAction.ENTER_LONG, 1), (Decision.action == SignalAction.ENTER_SHORT, -1), else_=0
+    )
+    decisions = (
+        select(
+            Decision.symbol,
+            day,
+            Alert.timeframe,
+            func.count(),
+            func.sum(case((Decision.action != SignalAction.IGNORE, 1), else_=0)),
+            func.sum(case((Decision.action == SignalAction.ENTER_LONG, 1), else_=0)),
+            func.sum(Decision.confidence),
+        )
+        .join(Alert, Alert.id == Decision.alert_id)
+        .where(*in_range(Decision.created_at))
+        .group_by(Decision.symbol, day, Alert.timeframe)
+    )
+    notional = Order.filled_size * Alert.price
+    orders = (
+        select(
+            Decision.symbol,
+            day,
+            Alert.timeframe,
+            func.count(),
+            func.sum(case((Order.status == FILLED, 1), else_=0)),
+            func.sum(Order.filled_size),
+            func.sum(notional),
+            func.sum(notional * direction),
+        )
+        .join(Decision, Decision.id == Order.decision_id)
+        .join(Alert, Alert.id == Decision.alert_id)
+        .where(*in_range(Decision.created_at))
+        .group_by(Decision.symbol, day, Alert.timeframe)
+    )
+    closed_day = func.date(Position.closed_at)
+    timeframe = func.coalesce(Alert.timeframe, literal(UNKNOWN_TIMEFRAME))
+    positions = (
+        select(
+            Position.symbol,
+            closed_day,
+            timeframe,
+            func.count(),
+            func.sum(case((Position.realized_pnl > 0, 1), else_=0)),
+            func.sum(Position.realized_pnl.cast(Float)),
+        )
+        .outerjoin(Decision, Decision.id == Position.decision_id)
+        .outerjoin(Alert, Alert.id == Decision.alert_id)
+        .where(Position.open.is_(False), Position.realized_pnl.is_not(None), *in_range(Position.closed_at))
+        .group_by(Position.symbol, closed_day, timeframe)
+    )
+
+    totals: Dict[RollupKey, Dict[str, float]] = {}
+    for query, names in (
+        (decisions, COUNTERS[:4]),
+        (orders, COUNTERS[4:9]),
+        (positions, COUNTERS[9:]),
+    ):
+        for symbol, row_day, row_timeframe, *values in session.execute(query):
+            row = totals.setdefault((symbol, _as_date(row_day), row_timeframe), dict.fromkeys(COUNTERS, 0))
+            row.update(zip(names, (value or 0 for value in values)))
+    return totals
+
+
+def backfill(start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """Replace the rollup rows for days in ``[start, end]`` (all days by default) with a full recompute.
+
+    Runs in one transaction. Writes made while it runs can be counted twice or not at all for
+    the days being rebuilt, so backfill closed days or run it before serving.
+    """
+    with session_scope() as session:
+        totals = compute_rollups(session, start, end)
+        stale = delete(PerformanceRollup)
+        if start is not None:
+            stale = stale.where(PerformanceRollup.day >= start)
+        if end is not None:
+            stale = stale.where(PerformanceRollup.day <= end)
+        session.execute(stale)
+        if totals:
+            now = datetime.utcnow()
+            session.execute(
+                insert(PerformanceRollup),
+                [
+                    {"symbol": symbol, "day": day, "timeframe": timeframe, **values, "updated_at": now}
+                    for (symbol, day, timeframe), values in sorted(totals.items())
+                ],
+            )
+        return len(totals)
+
+
+def daily_rollups(
+    session: Session,
+    symbol: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    timeframe: Optional[str] = None,
+    limit: int = 1000,
+) -> List[PerformanceRollup]:
+    """Rollup rows for days in ``[start, end]`` in day order, served by the primary key or the day index."""
+    query = select(PerformanceRollup).order_by(PerformanceRollup.day, PerformanceRollup.symbol, PerformanceRollup.timeframe)
+    if symbol is not None:
+        query = query.where(PerformanceRollup.symbol == symbol)
+    if timeframe is not None:
+        query = query.where(PerformanceRollup.timeframe == timeframe)
+    if start is not None:
+        query = query.where(PerformanceRollup.day >= start)
+    if end is not None:
+        query = query.where(PerformanceRollup.day <= end)
+    return list(session.scalars(query.limit(limit)))
+
+
+def symbol_totals(
+    session: Session, start: Optional[date] = None, end: Optional[date] = None, timeframe: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Rollup rows summed per symbol over ``[start, end]``."""
+    query = select(PerformanceRollup.symbol, *(func.sum(getattr(PerformanceRollup, name)) for name in COUNTERS))
+    if timeframe is not None:
+        query = query.where(PerformanceRollup.timeframe == timeframe)
+    if start is not None:
+        query = query.where(PerformanceRollup.day >= start)
+    if end is not None:
+        query = query.where(PerformanceRollup.day <= end)
+    query = query.group_by(PerformanceRollup.symbol).order_by(PerformanceRollup.symbol)
+    return [{"symbol": symbol, **dict(zip(COUNTERS, values))} for symbol, *values in session.execute(query)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild performance rollups from the decisions, orders and positions tables.")
+    parser.add_argument("--start", type=date.fromisoformat, help="first UTC day to rebuild (default: the earliest)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last UTC day to rebuild (default: the latest)")
+    args = parser.parse_args(argv)
+    print(f"wrote {backfill(args.start, args.end)} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
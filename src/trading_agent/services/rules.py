@@ -0,0 +1,260 @@
+"""Validation rules declared as data and compiled into one evaluator.
+
+A :class:`Rule` is an if/elif/else over :class:`Outcome`\\ s: the first outcome whose
+predicate holds adds its weight to the confidence and records its reason. Every outcome of
+a :class:`RuleTable` owns one bit, so a verdict carries its reasons as an integer mask and
+the strings are only built when something reads them.
+
+Predicates take ``(alert, context)`` where ``alert`` exposes ``price``, ``rsi``, ``macd``,
+``ema20``, ``atr``, ``buy`` and ``sell`` as either scalars (live alerts) or NumPy arrays
+(backtests). The same function serves both, so combine conditions with ``&`` and ``|``
+rather than ``and``/``or``, and use ``sell`` instead of negating ``buy``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from trading_agent.schemas.alert import AnyAlert
+from trading_agent.schemas.pipeline import ReasonNames, ValidationVerdict
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Predicate = Callable[[Any, Any], Any]
+
+_new_tuple = tuple.__new__  # builds NamedTuples without the keyword-handling __new__
+
+MAX_OUTCOMES = 63  # reason bits that fit in an int64 mask
+
+
+@dataclass(frozen=True)
+class Outcome:
+    reason: str
+    weight: int = 0
+    when: Optional[Predicate] = None  # None matches anything, for the final "else"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One scored check; ``symbols``/``timeframes`` limit which alerts it applies to.
+
+    Scoping lets two variants of a rule run side by side, e.g. a candidate threshold on a few
+    symbols while the rest keep the current one. ``applies`` gates the rule on the market
+    context, for checks that need data the context may not have.
+    """
+
+    name: str
+    outcomes: Tuple[Outcome, ...]
+    symbols: Optional[FrozenSet[str]] = None
+    timeframes: Optional[FrozenSet[str]] = None
+    applies: Optional[Callable[[Any], bool]] = None
+
+    def matches(self, symbol: str, timeframe: str) -> bool:
+        return (self.symbols is None or symbol in self.symbols) and (
+            self.timeframes is None or timeframe in self.timeframes
+        )
+
+
+class AlertRow(NamedTuple):
+    """The fields predicates see, for one alert or (as arrays) for a batch."""
+
+    price: Any
+    rsi: Any
+    macd: Any
+    ema20: Any
+    atr: Any
+    buy: Any
+    sell: Any
+
+    @classmethod
+    def from_columns(cls, columns: Any) -> "AlertRow":
+        buy = columns.signal > 0
+        return cls(columns.price, columns.rsi, columns.macd, columns.ema20, columns.atr, buy, ~buy)
+
+
+# (applies, ((when, weight, bit), ...)) with the bit already shifted into place
+_CompiledRule = Tuple[Optional[Callable[[Any], bool]], Tuple[Tuple[Optional[Predicate], int, int], ...]]
+_ScalarEvaluator = Callable[[AnyAlert, Any, int], ValidationVerdict]
+
+
+def _generate_scalar(rules: Sequence[_CompiledRule], reason_names: ReasonNames) -> _ScalarEvaluator:
+    """Unroll ``rules`` into one if/elif function from an alert to its verdict.
+
+    This is what the hand-written engine looked like, minus the reason strings; it is about
+    three times faster than looping over the table, which matters on the live path.
+    """
+    namespace: Dict[str, Any] = {"AlertRow": AlertRow, "Verdict": ValidationVerdict, "names": reason_names}
+    lines = [
+        "def evaluate(alert, c, threshold):",
+        "    i = alert.indicators",
+        "    buy = alert.signal == 'buy'",
+        "    a = new_tuple(AlertRow, (alert.price, i.RSI, i.MACD, i.EMA20, i.ATR, buy, not buy))",
+        "    confidence = 0",
+        "    mask = 0",
+    ]
+    namespace["new_tuple"] = _new_tuple
+    lowest = highest = 0
+    for r, (applies, outcomes) in enumerate(rules):
+        if not outcomes:
+            continue
+        indent = "    "
+        if applies is not None:
+            namespace[f"applies_{r}"] = applies
+            lines.append(f"    if applies_{r}(c):")
+            indent += "    "
+        weights = [weight for _, weight, _ in outcomes]
+        lowest += min(min(weights), 0)
+        highest += max(max(weights), 0)
+        for o, (when, weight, bit) in enumerate(outcomes):
+            body = f"confidence += {weight}; mask |= {bit}" if weight else f"mask |= {bit}"
+            if when is None:
+                if o:
+                    lines.append(f"{indent}else:")
+                    lines.append(f"{indent}    {body}")
+                else:
+                    lines.append(f"{indent}{body}")
+                break
+            namespace[f"when_{r}_{o}"] = when
+            lines.append(f"{indent}{'elif' if o else 'if'} when_{r}_{o}(a, c):")
+            lines.append(f"{indent}    {body}")
+    # Clamps are only emitted when the weights can actually cross a bound
+    if lowest < 0:
+        lines += ["    if confidence < 0:", "        confidence = 0"]
+    lines.append("    valid = confidence >= threshold")
+    if highest > 100:
+        lines += ["    if confidence > 100:", "        confidence = 100"]
+    lines.append("    return new_tuple(Verdict, (valid, confidence, mask, names))")
+    exec("\n".join(lines), namespace)
+    return namespace["evaluate"]
+
+
+class RuleTable:
+    """Rules compiled for scalar and array evaluation.
+
+    Confidence is the sum of the matched weights clamped to ``[0, 100]``; an alert is valid
+    when the (non-negative) sum reaches the threshold.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+        reasons: List[str] = []
+        compiled: List[_CompiledRule] = []
+        for rule in self.rules:
+            outcomes = []
+            for outcome in rule.outcomes:
+                outcomes.append((outcome.when, outcome.weight, 1 << len(reasons)))
+                reasons.append(outcome.reason)
+            compiled.append((rule.applies, tuple(outcomes)))
+        if len(reasons) > MAX_OUTCOMES:
+            raise ValueError(f"A rule table holds at most {MAX_OUTCOMES} outcomes, got {len(reasons)}")
+        self.reason_names = ReasonNames(reasons)
+        self._compiled: Tuple[_CompiledRule, ...] = tuple(compiled)
+        self._scoped = any(rule.symbols is not None or rule.timeframes is not None for rule in self.rules)
+        self._scalar = None if self._scoped else _generate_scalar(self._compiled, self.reason_names)
+        self._by_scope: Dict[Tuple[str, str], _ScalarEvaluator] = {}
+
+    def _scalar_for(self, symbol: str, timeframe: str) -> _ScalarEvaluator:
+        key = (symbol, timeframe)
+        evaluator = self._by_scope.get(key)
+        if evaluator is None:
+            # Generated once per (symbol, timeframe) seen; rules outside the scope are left out
+            evaluator = self._by_scope[key] = _generate_scalar(
+                [compiled for rule, compiled in zip(self.rules, self._compiled) if rule.matches(symbol, timeframe)],
+                self.reason_names,
+            )
+        return evaluator
+
+    def evaluate(self, alert: AnyAlert, context: Any, validity_threshold: int) -> ValidationVerdict:
+        scalar = self._scalar or self._scalar_for(alert.symbol, alert.timeframe)
+        return scalar(alert, context, validity_threshold)
+
+    def evaluate_batch(
+        self, columns: Any, context: Any, validity_threshold: int, timeframe: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Array form of :meth:`evaluate`: ``(valid, confidence, reason_mask)`` per alert.
+
+        ``timeframe`` is only needed when some rule is scoped to timeframes.
+        """
+        import numpy as np  # live serving only uses the scalar evaluators
+
+        row = AlertRow.from_columns(columns)
+        count = len(row.price)
+        confidence = np.zeros(count, dtype=np.int64)
+        mask = np.zeros(count, dtype=np.int64)
+        for rule, (applies, outcomes) in zip(self.rules, self._compiled):
+            if applies is not None and not applies(context):
+                continue
+            remaining = self._scope_mask(rule, columns, timeframe, count)
+            for when, weight, bit in outcomes:
+                hit = remaining if when is None else remaining & np.broadcast_to(when(row, context), count)
+                if weight:
+                    confidence += np.where(hit, weight, 0)
+                mask |= np.where(hit, bit, 0)
+                remaining = remaining & ~hit
+        confidence = np.maximum(confidence, 0)
+        return confidence >= validity_threshold, np.minimum(confidence, 100), mask
+
+    @staticmethod
+    def _scope_mask(rule: Rule, columns: Any, timeframe: Optional[np.ndarray], count: int) -> np.ndarray:
+        import numpy as np
+
+        scope = np.ones(count, dtype=bool)
+        if rule.symbols is not None:
+            scope &= columns.symbol_mask(list(rule.symbols))
+        if rule.timeframes is not None:
+            if timeframe is None:
+                raise ValueError(f"Rule {rule.name!r} is scoped to timeframes; pass the timeframe column")
+            scope &= np.isin(timeframe, list(rule.timeframes))
+        return scope
+
+    def expand(self, mask: int) -> List[str]:
+        return self.reason_names.expand(int(mask))
+
+
+def _ema_aligned(a, c):
+    return (a.ema20 >= c.ema_slow) & (a.ema20 >= a.rsi)
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule("ema_trend", (Outcome("EMA trend aligned", 20, _ema_aligned), Outcome("EMA trend misaligned"))),
+    Rule(
+        "vwap",
+        (Outcome("Price above VWAP", 10, lambda a, c: a.price >= c.vwap), Outcome("Price below VWAP")),
+        applies=lambda c: c.vwap is not None,
+    ),
+    Rule(
+        "rsi",
+        (
+            Outcome("RSI oversold", 25, lambda a, c: (a.rsi < 30) & a.buy),
+            Outcome("RSI overbought", 25, lambda a, c: (a.rsi > 70) & a.sell),
+            Outcome("RSI neutral"),
+        ),
+    ),
+    Rule(
+        "macd",
+        (
+            Outcome("MACD bullish", 15, lambda a, c: (a.macd > 0) & a.buy),
+            Outcome("MACD bearish", 15, lambda a, c: (a.macd < 0) & a.sell),
+            Outcome("MACD unconfirmed"),
+        ),
+    ),
+    Rule(
+        "atr",
+        (Outcome("ATR normal", 10, lambda a, c: a.atr <= 1.5 * c.atr_baseline), Outcome("ATR elevated", -10)),
+    ),
+)
+
+DEFAULT_TABLE = RuleTable(DEFAULT_RULES)
+
+
+def compile_rules(rules: Optional[Sequence[Rule] | RuleTable] = None) -> RuleTable:
+    """A :class:`RuleTable` for ``rules``; ``None`` gives the shared default table."""
+    if rules is None:
+        return DEFAULT_TABLE
+    if isinstance(rules, RuleTable):
+        return rules
+    return RuleTable(rules)
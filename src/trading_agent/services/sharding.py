@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+from bisect import bisect
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from trading_agent.config.settings import Settings
+
+if TYPE_CHECKING:
+    import httpx
+
+FORWARDED_HEADER = "X-Trading-Agent-Forwarded"
+
+
+class WorkerUnavailable(Exception):
+    """A forwarded request could not reach its worker (socket missing, connection reset, timeout)."""
+
+    def __init__(self, worker: int):
+        super().__init__(f"Worker {worker} owning this symbol is unavailable")
+        self.worker = worker
+
+
+def _point(key: str) -> int:
+    # A stable hash: Python's hash() is salted per process, so workers would disagree
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of keys onto nodes, with ``replicas`` virtual points per node.
+
+    Changing the number of nodes only moves the keys whose nearest point changed, roughly
+    ``1 / len(nodes)`` of them, so a resized deployment rebuilds as little state as possible.
+    """
+
+    def __init__(self, nodes: Sequence[int], replicas: int = 64):
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        ring = sorted((_point(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas))
+        self._points = [point for point, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    def owner(self, key: str) -> int:
+        index = bisect(self._points, _point(key)) % len(self._points)
+        return self._nodes[index]
+
+
+def worker_socket_path(socket_dir: str, index: int) -> Path:
+    return Path(socket_dir) / f"worker-{index}.sock"
+
+
+class ShardRouter:
+    """Sends every symbol to the one worker that owns it.
+
+    Decisions read and update per-symbol exposure and market context held in process memory,
+    so each symbol must always be decided by the same process. Alerts that arrive at a
+    non-owner are forwarded over the owner's Unix socket; forwarded requests carry
+    :data:`FORWARDED_HEADER` and are always handled locally.
+    """
+
+    def __init__(
+        self,
+        worker_index: int,
+        worker_count: int,
+        socket_dir: str,
+        transport_factory: Optional[Callable[[int], httpx.AsyncBaseTransport]] = None,
+        timeout: float = 30.0,
+    ):
+        import httpx  # single-worker serving never builds a router, so it never loads httpx
+
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.socket_dir = socket_dir
+        self._ring = HashRing(range(worker_count))
+        self._owners: Dict[str, int] = {}
+        self._transport_factory = transport_factory or (
+            lambda index: httpx.AsyncHTTPTransport(uds=str(worker_socket_path(socket_dir, index)))
+        )
+        self._timeout = timeout
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["ShardRouter"]:
+        if settings.worker_count <= 1:
+            return None
+        return cls(settings.worker_index, settings.worker_count, settings.worker_socket_dir)
+
+    def owner(self, symbol: str) -> int:
+        owner = self._owners.get(symbol)
+        if owner is None:
+            owner = self._owners[symbol] = self._ring.owner(symbol)
+        return owner
+
+    def is_local(self, symbol: str) -> bool:
+        return self.owner(symbol) == self.worker_index
+
+    def partition(self, symbols: Sequence[str]) -> Dict[int, List[int]]:
+        """Group positions in ``symbols`` by owning worker."""
+        groups: Dict[int, List[int]] = {}
+        for position, symbol in enumerate(symbols):
+            groups.setdefault(self.owner(symbol), []).append(position)
+        return groups
+
+    def _client(self, worker: int) -> httpx.AsyncClient:
+        client = self._clients.get(worker)
+        if client is None:
+            import httpx
+
+            client = self._clients[worker] = httpx.AsyncClient(
+                transport=self._transport_factory(worker), base_url="http://worker", timeout=self._timeout
+            )
+        return client
+
+    async def forward(self, worker: int, path: str, body: bytes, headers: Mapping[str, str]) -> Tuple[int, bytes]:
+        """POST ``body`` to ``path`` on ``worker``; returns its status code and raw response body.
+
+        Raises :class:`WorkerUnavailable` when the worker cannot be reached.
+        """
+        import httpx
+
+        try:
+            response = await self._client(worker).post(
+                path,
+                content=body,
+                headers={**headers, FORWARDED_HEADER: str(self.worker_index), "Content-Type": "application/json"},
+            )
+        except httpx.TransportError as exc:
+            raise WorkerUnavailable(worker) from exc
+        return response.status_code, response.content
+
+    async def fetch(self, worker: int, path: str) -> Tuple[int, bytes]:
+        """GET ``path`` from ``worker`` itself, without further routing."""
+        response = await self._client(worker).get(path, headers={FORWARDED_HEADER: str(self.worker_index)})
+        return response.status_code, response.content
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Protocol, Sequence
 
-from trading_agent.schemas.alert import AlertPayload
-from trading_agent.schemas.pipeline import ValidationResultSchema
+from trading_agent.schemas.alert import AnyAlert, ParsedIndicators
+from trading_agent.schemas.pipeline import ReasonNames, ValidationVerdict
+from trading_agent.services.rules import Rule, RuleTable, compile_rules
 
 
 @dataclass
@@ -15,56 +16,112 @@ class MarketContext:
     atr_baseline: float
 
 
+DEFAULT_VALIDITY_THRESHOLD = 40
+
+# Appended after the rule table's reasons when an alert's indicators disagree with market data
+MISMATCH_REASONS = (
+    "RSI disagrees with market data",
+    "MACD disagrees with market data",
+    "EMA20 disagrees with market data",
+    "ATR disagrees with market data",
+)
+
+
+class ConfidenceScorer(Protocol):
+    """Scores alerts in place of the rule weights, e.g. a :class:`trading_agent.services.confidence_model.ConfidenceModel`."""
+
+    def score(self, alerts: Sequence[AnyAlert], contexts: Sequence[MarketContext]) -> Sequence[int]: ...
+
+
+class IndicatorSource(Protocol):
+    """Indicators computed from market data, e.g. a :class:`trading_agent.services.candles.CandleAggregator`."""
+
+    def indicators(self, symbol: str, timeframe: str) -> Optional[ParsedIndicators]: ...
+
+
+@dataclass(frozen=True)
+class IndicatorTolerance:
+    """How far an alert's indicators may be from the computed ones, each in its natural unit."""
+
+    rsi_points: float = 5.0
+    macd_atr: float = 0.25  # MACD is near zero, so it is compared in units of the computed ATR
+    ema20_fraction: float = 0.005
+    atr_fraction: float = 0.2
+
+    def mismatches(self, sent: ParsedIndicators, computed: ParsedIndicators) -> int:
+        """Bitmask over :data:`MISMATCH_REASONS` of the indicators that are out of tolerance."""
+        mask = 0
+        if abs(sent.RSI - computed.RSI) > self.rsi_points:
+            mask |= 1
+        if abs(sent.MACD - computed.MACD) > self.macd_atr * computed.ATR:
+            mask |= 2
+        if abs(sent.EMA20 - computed.EMA20) > self.ema20_fraction * abs(computed.EMA20):
+            mask |= 4
+        if abs(sent.ATR - computed.ATR) > self.atr_fraction * computed.ATR:
+            mask |= 8
+        return mask
+
+
 class ValidationEngine:
-    def __init__(self, context: MarketContext):
+    """Scores alerts against a rule table (:data:`trading_agent.services.rules.DEFAULT_RULES` by default).
+
+    With an ``indicators`` source, the indicators an alert carries are also checked against
+    those computed from market data for its symbol and timeframe. An alert outside
+    ``tolerance`` is invalid, with a reason per disagreeing indicator. Series the source does
+    not know or has not warmed up yet are not checked.
+
+    With a ``model``, confidence is the model's score instead of the sum of rule weights and
+    validity compares that score to the threshold; the rule reasons are still reported.
+    """
+
+    def __init__(
+        self,
+        context: Optional[MarketContext] = None,
+        validity_threshold: int = DEFAULT_VALIDITY_THRESHOLD,
+        rules: Optional[Sequence[Rule] | RuleTable] = None,
+        indicators: Optional[IndicatorSource] = None,
+        tolerance: IndicatorTolerance = IndicatorTolerance(),
+        model: Optional[ConfidenceScorer] = None,
+    ):
         self.context = context
+        self.validity_threshold = validity_threshold
+        self.rules = compile_rules(rules)
+        self.indicators = indicators
+        self.tolerance = tolerance
+        self.model = model
+        self._mismatch_shift = len(self.rules.reason_names)
+        self._reason_names = ReasonNames(self.rules.reason_names + MISMATCH_REASONS)
+
+    def evaluate(self, alert: AnyAlert, context: Optional[MarketContext] = None) -> ValidationVerdict:
+        context = context or self.context
+        if context is None:
+            raise ValueError("A MarketContext is required to evaluate an alert")
+        verdict = self.rules.evaluate(alert, context, self.validity_threshold)
+        if self.model is not None:
+            verdict = self._rescore(verdict, self.model.score((alert,), (context,))[0])
+        if self.indicators is None:
+            return verdict
+        return self._check_indicators(alert, verdict)
+
+    def evaluate_many(self, alerts: Sequence[AnyAlert], contexts: Sequence[MarketContext]) -> List[ValidationVerdict]:
+        """Verdicts for ``alerts``, each against its own context; a model scores them all in one call."""
+        verdicts = [self.rules.evaluate(alert, context, self.validity_threshold) for alert, context in zip(alerts, contexts)]
+        if self.model is not None and verdicts:
+            verdicts = [self._rescore(verdict, score) for verdict, score in zip(verdicts, self.model.score(alerts, contexts))]
+        if self.indicators is not None:
+            verdicts = [self._check_indicators(alert, verdict) for alert, verdict in zip(alerts, verdicts)]
+        return verdicts
+
+    def _rescore(self, verdict: ValidationVerdict, confidence: int) -> ValidationVerdict:
+        return ValidationVerdict(confidence >= self.validity_threshold, confidence, verdict.reason_mask, verdict.reason_names)
 
-    def evaluate(self, alert: AlertPayload) -> ValidationResultSchema:
-        reasons: List[str] = []
-        confidence = 0
-
-        indicators = alert.indicators
-
-        # Trend alignment
-        if indicators.EMA20 >= self.context.ema_slow and indicators.EMA20 >= indicators.RSI:
-            reasons.append("EMA trend aligned")
-            confidence += 20
-        else:
-            reasons.append("EMA trend misaligned")
-
-        if self.context.vwap is not None:
-            if alert.price >= self.context.vwap:
-                reasons.append("Price above VWAP")
-                confidence += 10
-            else:
-                reasons.append("Price below VWAP")
-
-        # Indicator confirmation
-        if indicators.RSI < 30 and alert.signal == "buy":
-            reasons.append("RSI oversold")
-            confidence += 25
-        elif indicators.RSI > 70 and alert.signal == "sell":
-            reasons.append("RSI overbought")
-            confidence += 25
-        else:
-            reasons.append("RSI neutral")
-
-        if indicators.MACD > 0 and alert.signal == "buy":
-            reasons.append("MACD bullish")
-            confidence += 15
-        elif indicators.MACD < 0 and alert.signal == "sell":
-            reasons.append("MACD bearish")
-            confidence += 15
-        else:
-            reasons.append("MACD unconfirmed")
-
-        # Volatility regime
-        if indicators.ATR <= 1.5 * self.context.atr_baseline:
-            reasons.append("ATR normal")
-            confidence += 10
-        else:
-            reasons.append("ATR elevated")
-            confidence = max(confidence - 10, 0)
-
-        valid = confidence >= 40
-        return ValidationResultSchema(valid=valid, confidence=min(confidence, 100), reasons=reasons)
+    def _check_indicators(self, alert: AnyAlert, verdict: ValidationVerdict) -> ValidationVerdict:
+        computed = self.indicators.indicators(alert.symbol, alert.timeframe)
+        if computed is None:
+            return verdict
+        mismatches = self.tolerance.mismatches(alert.indicators, computed)
+        if not mismatches:
+            return verdict
+        return ValidationVerdict(
+            False, verdict.confidence, verdict.reason_mask | mismatches << self._mismatch_shift, self._reason_names
+        )
@@ -0,0 +1,21 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Point the engine at a throwaway database before any trading_agent.db import happens
+_TMP = Path(tempfile.mkdtemp())
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'test.db'}")
+os.environ.setdefault("AUDIT_LOG_PATH", str(_TMP / "audit.log"))
+
+
+@pytest.fixture
+def db_tables():
+    from trading_agent.db.database import Base, get_engine
+    import trading_agent.models.entities  # noqa: F401 - register tables
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from trading_agent.schemas.alert import AlertPayload, ParsedAlert, decode_alert, decode_alerts
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _body(**overrides) -> bytes:
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+    payload.update(overrides)
+    return json.dumps(payload).encode()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        _body(),
+        _body(price=1725),
+        _body(price="1725.5"),  # coerced exactly as the model would
+        _body(timestamp="2024-01-01T00:00:00Z"),
+        _body(timestamp=1704067200),
+        _body(extra="ignored"),
+    ],
+)
+def test_decoded_alert_matches_pydantic_model(body):
+    alert = decode_alert(body)
+    assert isinstance(alert, ParsedAlert)
+    assert alert == ParsedAlert.from_payload(AlertPayload.model_validate_json(body))
+    assert alert.to_payload() == AlertPayload.model_validate_json(body)
+
+
+def test_decoded_field_types():
+    alert = decode_alert(_body(price=1725, timestamp="2024-01-01T00:00:00Z"))
+    assert type(alert.price) is float
+    assert alert.timestamp == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert alert.indicators._asdict() == {"RSI": 28.4, "MACD": 0.002, "EMA20": 1701.3, "ATR": 18.2}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"{not json", _body(symbol="DOGE"), _body(signal="hold"), _body(price=None), _body(indicators={"RSI": 1.0}), b"[]"],
+)
+def test_invalid_bodies_raise_pydantic_errors(body):
+    with pytest.raises(ValidationError) as fast:
+        decode_alert(body)
+    with pytest.raises(ValidationError) as reference:
+        AlertPayload.model_validate_json(body)
+    # Top-level type errors name a dict rather than the model class, but read the same
+    assert [(e["loc"], e["msg"]) for e in fast.value.errors()] == [(e["loc"], e["msg"]) for e in reference.value.errors()]
+
+
+def test_decode_alerts_falls_back_per_body_with_indexed_errors():
+    good, coerced = json.loads(_body()), json.loads(_body(price="1.5"))
+    alerts = decode_alerts(json.dumps([good, coerced]).encode())
+    assert [alert.price for alert in alerts] == [1725.5, 1.5]
+
+    with pytest.raises(ValidationError) as exc:
+        decode_alerts(json.dumps([good, {**good, "symbol": "DOGE"}]).encode())
+    assert exc.value.errors()[0]["loc"][:2] == (1, "symbol")
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from trading_agent.api.main import app
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Order
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _payload(name: str) -> dict:
+    return json.loads((EXAMPLES / name).read_text())
+
+
+def test_webhook_reuses_engines_across_requests(db_tables):
+    payload = _payload("webhook_buy.json")
+
+    with TestClient(app) as client:
+        pipeline = app.state.pipeline
+        first = client.post("/webhook", json=payload)
+        second = client.post("/webhook", json=payload)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert app.state.pipeline is pipeline
+
+
+def test_batch_webhook_returns_one_result_per_alert(db_tables):
+    alerts = [_payload("webhook_buy.json"), _payload("webhook_sell.json"), _payload("webhook_buy.json")]
+
+    with TestClient(app) as client:
+        response = client.post("/webhook/batch", json=alerts)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == 3
+    # The repeated buy alert is a duplicate and shares the first one's result
+    assert results[2] == results[0]
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 2
+        assert session.scalar(select(func.count()).select_from(Order)) == 2
+
+
+def test_invalid_webhook_body_is_rejected_with_422(db_tables):
+    payload = {**_payload("webhook_buy.json"), "symbol": "DOGE"}
+
+    with TestClient(app) as client:
+        response = client.post("/webhook", json=payload)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["symbol"]
+
+
+def test_retried_webhook_returns_cached_result_without_new_rows(db_tables):
+    payload = _payload("webhook_buy.json")
+
+    with TestClient(app) as client:
+        first = client.post("/webhook", json=payload)
+        retry = client.post("/webhook", json=payload)
+        other = client.post("/webhook", json=payload, headers={"X-Alert-ID": "tv-42"})
+        other_retry = client.post("/webhook", json=payload, headers={"X-Alert-ID": "tv-42"})
+
+    assert first.json() == retry.json()
+    assert other.json() == other_retry.json()
+    assert other.json()["order_id"] != first.json()["order_id"]
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 2
+
+    # After a restart the in-memory cache is empty; the stored key still answers the retry
+    with TestClient(app) as client:
+        after_restart = client.post("/webhook", json=payload)
+
+    assert after_restart.status_code == 200
+    assert after_restart.json()["order_id"] == first.json()["order_id"]
+    assert after_restart.json()["status"] == first.json()["status"]
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 2
+
+
+def test_openapi_documents_the_webhook_bodies():
+    paths = app.openapi()["paths"]
+    single = paths["/webhook"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    batch = paths["/webhook/batch"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+
+    assert set(single["required"]) == {"symbol", "price", "signal", "timeframe", "indicators"}
+    assert single["properties"]["indicators"]["required"] == ["RSI", "MACD", "EMA20", "ATR"]
+    assert batch["type"] == "array" and batch["items"] == single
+    assert "$ref" not in json.dumps(single)
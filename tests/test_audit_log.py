@@ -0,0 +1,193 @@
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from trading_agent.api.main import app
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Decision, Order, Position, ValidationResult
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema
+from trading_agent.services.audit_log import AuditWriter, read_log
+from trading_agent.services.metrics import AUDIT_DEAD_LETTERS
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.persistence import audit_record, persist_alerts
+from trading_agent.services.pipeline import PipelineOutcome
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _outcome(index: int, status: str = "filled") -> PipelineOutcome:
+    alert = ParsedAlert("ETH", 1700.0 + index, "buy", "5m", ParsedIndicators(25.0, 0.01, 1695.0, 10.0))
+    decision = TradeDecision(
+        action=Action.ENTER_LONG, symbol="ETH", order_type="market", size=0.5, stop_loss=1680.0, take_profit=1740.0, confidence=75
+    )
+    execution = ExecutionResult(
+        success=True, order_id=None, client_order_id=f"client-{index}", status=status, executed_size=0.5
+    )
+    validation = ValidationResultSchema(valid=True, confidence=75, reasons=["RSI oversold"])
+    return PipelineOutcome(alert=alert, validation=validation, decision=decision, execution=execution)
+
+
+def _records(count: int, at: datetime, status: str = "filled") -> list:
+    outcomes = [_outcome(i, status) for i in range(count)]
+    alert_ids = persist_alerts([outcome.alert for outcome in outcomes])
+    return [audit_record(alert_id, outcome, at) for alert_id, outcome in zip(alert_ids, outcomes)]
+
+
+def _count(entity) -> int:
+    with session_scope() as session:
+        return session.scalar(select(func.count()).select_from(entity))
+
+
+def test_webhook_answers_before_audit_rows_and_flushes_them_on_shutdown(db_tables):
+    payload = json.loads((EXAMPLES / "webhook_sell.json").read_text())
+
+    with TestClient(app) as client:
+        app.state.audit.flush_interval = 60.0  # nothing is committed while the app runs
+        assert client.post("/webhook", json=payload).status_code == 200
+        assert _count(Alert) == 1
+        assert _count(Decision) == 0
+        log_path = app.state.audit.log_path
+        assert len(log_path.read_bytes().splitlines()) == 1
+
+    assert _count(ValidationResult) == _count(Decision) == _count(Order) == 1
+    assert log_path.read_bytes() == b""
+
+
+def test_recover_replays_the_log_once_with_original_timestamps(db_tables, tmp_path):
+    log_path = tmp_path / "audit.log"
+    at = datetime(2024, 1, 1, 12)
+
+    async def crash() -> None:
+        writer = AuditWriter(log_path)
+        await writer.start()
+        writer._task.cancel()  # the process dies before the writer commits anything
+        await writer.submit(_records(3, at))
+
+    asyncio.run(crash())
+    # A second copy of the log plus a torn line, as if a previous replay died half-way
+    log_path.write_bytes(log_path.read_bytes() * 2 + b'{"kind": "pipe')
+
+    assert AuditWriter(log_path).recover() == 6
+    assert _count(Decision) == _count(Order) == _count(Position) == 3
+    with session_scope() as session:
+        assert set(session.scalars(select(Decision.created_at))) == {at}
+    assert log_path.read_bytes() == b""
+    assert AuditWriter(log_path).recover() == 0
+
+
+def test_submit_blocks_when_the_queue_is_full(db_tables):
+    async def run() -> None:
+        writer = AuditWriter(max_pending=2)
+        records = _records(3, datetime.utcnow())
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(writer.submit(records), timeout=0.05)
+        assert writer.pending == 2
+
+    asyncio.run(run())
+
+
+def test_status_update_before_its_order_row_is_applied_once_the_order_lands(db_tables):
+    async def run() -> None:
+        writer = AuditWriter(flush_interval=0.0)
+        await writer.start()
+        records = _records(1, datetime.utcnow(), status="submitted")
+        await writer.submit_status(OrderStatusUpdate("client-0", "exchange-0", "filled", 0.5))
+        await asyncio.sleep(0.05)
+        await writer.submit(records)
+        await writer.close()
+
+    asyncio.run(run())
+    with session_scope() as session:
+        order = session.execute(select(Order.status, Order.exchange_order_id)).one()
+    assert tuple(order) == ("filled", "exchange-0")
+    # The submitted order opened no position; its fill does
+    assert _count(Alert) == 1 and _count(Position) == 1
+
+
+def test_a_record_that_cannot_be_written_is_dead_lettered_and_the_rest_commits(db_tables, tmp_path):
+    records = _records(5, datetime(2024, 1, 1, 12))
+    records[2]["decision"]["symbol"] = None  # violates NOT NULL on every attempt
+    log_path = tmp_path / "audit.log"
+    dead = AUDIT_DEAD_LETTERS.labels("pipeline")
+    before = dead.value
+
+    async def run() -> AuditWriter:
+        writer = AuditWriter(log_path, flush_interval=0.01)
+        await writer.start()
+        await writer.submit(records)
+        await asyncio.wait_for(writer.close(), timeout=5)
+        return writer
+
+    writer = asyncio.run(run())
+    assert _count(Decision) == _count(Order) == 4
+    assert dead.value == before + 1
+    assert [json.loads(line)["alert_id"] for line in writer.dead_letter_path.read_bytes().splitlines()] == [
+        records[2]["alert_id"]
+    ]
+    assert log_path.read_bytes() == b""
+
+
+def test_retry_of_a_webhook_whose_record_was_dead_lettered_is_answered_as_pending(db_tables, monkeypatch):
+    import trading_agent.api.main as api
+
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+    unwritable = api.audit_record
+
+    def broken_record(*args, **kwargs):
+        record = unwritable(*args, **kwargs)
+        record["decision"]["symbol"] = None  # violates NOT NULL on every attempt
+        return record
+
+    with TestClient(app) as client:
+        with monkeypatch.context() as patch:
+            patch.setattr(api, "audit_record", broken_record)
+            assert client.post("/webhook", json=payload).status_code == 200
+
+    # Restarted, so the retry is not answered from the in-memory cache
+    with TestClient(app) as client:
+        retry = client.post("/webhook", json=payload)
+
+    assert retry.status_code == 200
+    assert retry.json()["status"] == "pending" and retry.json()["order_id"] is None
+    assert _count(Alert) == 1 and _count(Decision) == 0
+
+
+def test_recover_skips_records_whose_alert_insert_rolled_back(db_tables, tmp_path):
+    log_path = tmp_path / "audit.log"
+    outcomes = [_outcome(0), _outcome(1)]
+    (alert_id,) = persist_alerts([outcomes[0].alert], ["id:kept"])
+    records = [
+        audit_record(alert_id, outcomes[1], idempotency_key="id:rolled-back"),  # its ID went to the kept alert
+        audit_record(alert_id, outcomes[0], idempotency_key="id:kept"),
+        audit_record(alert_id + 1, outcomes[1], idempotency_key="id:never-committed"),
+    ]
+    log_path.write_bytes(b"".join(json.dumps(record, default=str).encode() + b"\n" for record in records))
+
+    assert AuditWriter(log_path).recover() == 3
+    with session_scope() as session:
+        assert session.scalars(select(Decision.alert_id)).all() == [alert_id]
+        assert session.scalar(select(Order.client_order_id)) == "client-0"
+
+
+def test_log_is_kept_while_an_unmatched_status_is_held_in_memory(db_tables, tmp_path):
+    log_path = tmp_path / "audit.log"
+
+    async def crash() -> None:
+        writer = AuditWriter(log_path, flush_interval=0.0, status_retry_seconds=60.0)
+        await writer.start()
+        await writer.submit_status(OrderStatusUpdate("client-9", "exchange-9", "filled", 0.5))
+        await asyncio.sleep(0.05)
+        # Another record commits while the status still waits for its order row
+        await writer.submit(_records(1, datetime.utcnow()))
+        await asyncio.sleep(0.05)
+        assert _count(Order) == 1
+        writer._task.cancel()  # the process dies before the status is retried
+
+    asyncio.run(crash())
+    assert [record["kind"] for record in read_log(log_path)] == ["order_status", "pipeline"]
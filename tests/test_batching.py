@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from trading_agent.services.batching import MicroBatcher
+
+
+def test_micro_batcher_groups_concurrent_submissions():
+    batches = []
+
+    async def handler(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(handler, window=0.05, max_size=3)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    assert [len(batch) for batch in batches] == [3, 2]
+
+
+def test_micro_batcher_propagates_handler_errors():
+    async def handler(items):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(handler, window=0.01, max_size=10)
+        await batcher.start()
+        try:
+            await batcher.submit(1)
+        finally:
+            await batcher.stop()
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
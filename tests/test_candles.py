@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from trading_agent.schemas.alert import ParsedAlert
+from trading_agent.services.candles import CandleAggregator, timeframe_seconds
+from trading_agent.services.market_feed import MarketEvent, consume_socket, feed, read_events
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+START = 1_700_006_400  # a multiple of one day
+
+
+def _ticks(count: int = 20_000, seed: int = 1) -> list:
+    rng = np.random.default_rng(seed)
+    timestamps = START + np.cumsum(rng.exponential(5.0, count))
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 1e-3, count)))
+    volumes = rng.exponential(1.0, count)
+    return [
+        MarketEvent("ETH", t, p, p, p, p, v, 0.0) for t, p, v in zip(timestamps.tolist(), prices.tolist(), volumes.tolist())
+    ]
+
+
+def _reference(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> dict:
+    """Full-history recomputation: SMA-seeded EMA/RMA, like TradingView."""
+
+    def smoothed(values, period, alpha, first=0):
+        out = np.full(len(values), np.nan)
+        if len(values) - first < period:
+            return out
+        out[first + period - 1] = values[first : first + period].mean()
+        for i in range(first + period, len(values)):
+            out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])
+        return out
+
+    change = np.diff(close, prepend=np.nan)
+    gain = smoothed(np.where(change > 0, change, 0.0), 14, 1 / 14, first=1)
+    loss = smoothed(np.where(change < 0, -change, 0.0), 14, 1 / 14, first=1)
+    prev = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return {
+        "rsi": 100 - 100 / (1 + gain / loss),
+        "macd": smoothed(close, 12, 2 / 13) - smoothed(close, 26, 2 / 27),
+        "ema20": smoothed(close, 20, 2 / 21),
+        "atr": smoothed(true_range, 14, 1 / 14),
+    }
+
+
+def test_timeframe_labels():
+    assert [timeframe_seconds(label) for label in ("15m", "1h", "4H", "1d", "D", "240", "30s")] == [
+        900, 3600, 14_400, 86_400, 86_400, 14_400, 30
+    ]
+    with pytest.raises(ValueError):
+        timeframe_seconds("fortnight")
+    with pytest.raises(ValueError):
+        CandleAggregator(["2m", "5m"])
+
+
+def test_cascaded_timeframes_match_direct_aggregation_and_indicators_match_full_recompute():
+    ticks = _ticks()
+    cascaded = CandleAggregator(["1m", "5m", "15m", "1h"])
+    direct = CandleAggregator(["15m"])
+    feed(cascaded, ticks)
+    feed(direct, ticks)
+
+    for name in ("timestamp", "open", "high", "low", "close", "volume"):
+        np.testing.assert_allclose(cascaded.series("ETH", "15m").column(name), direct.series("ETH", "15m").column(name))
+
+    series = cascaded.series("ETH", "5m")
+    stamps = np.array([tick.timestamp for tick in ticks])
+    prices = np.array([tick.close for tick in ticks])
+    buckets = (stamps - stamps % 300).astype(np.int64)
+    first = np.flatnonzero(np.diff(buckets, prepend=-1))
+    closed = slice(0, len(series))  # the last bucket is still forming
+    np.testing.assert_array_equal(series.column("timestamp"), buckets[first][closed])
+    np.testing.assert_allclose(series.column("open"), prices[first][closed])
+    np.testing.assert_allclose(series.column("high"), np.maximum.reduceat(prices, first)[closed])
+    np.testing.assert_allclose(series.column("low"), np.minimum.reduceat(prices, first)[closed])
+
+    expected = _reference(series.column("high"), series.column("low"), series.column("close"))
+    for name, values in expected.items():
+        np.testing.assert_allclose(series.column(name), values, rtol=1e-9, equal_nan=True)
+    assert cascaded.indicators("ETH", "5") == pytest.approx(tuple(values[-1] for values in expected.values()))
+
+
+def test_bars_close_on_their_last_minute_and_ring_keeps_the_latest():
+    aggregator = CandleAggregator(["1m", "5m"], capacity=3)
+    for minute in range(20):
+        price = 100.0 + minute
+        aggregator.update_bar("SOL", START + 60 * minute, price, price + 1, price - 1, price, 2.0)
+
+    five = aggregator.series("SOL", "5m")
+    assert five.closed == 4 and five.bar_start is None
+    assert five.column("timestamp").tolist() == [START + 300, START + 600, START + 900]
+    assert five.column("volume").tolist() == [10.0, 10.0, 10.0]
+    assert five.column("high")[-1] == 120.0
+
+    aggregator.update_tick("SOL", START, 1.0)
+    assert aggregator.series("SOL", "1m").late == 1
+    assert aggregator.indicators("SOL", "1m") is None  # MACD needs 26 bars
+    assert aggregator.indicators("BTC-USD", "1m") is None
+
+
+def test_validation_rejects_alerts_whose_indicators_disagree_with_market_data():
+    aggregator = CandleAggregator(["5m"])
+    feed(aggregator, _ticks())
+    computed = aggregator.indicators("ETH", "5m")
+    context = MarketContext(ema_fast=1.0, ema_slow=0.5, vwap=None, atr_baseline=computed.ATR)
+    engine = ValidationEngine(context, indicators=aggregator)
+
+    honest = ParsedAlert("ETH", computed.EMA20, "buy", "5m", computed)
+    assert engine.evaluate(honest) == ValidationEngine(context).evaluate(honest)
+
+    forged = honest._replace(indicators=computed._replace(RSI=computed.RSI + 20))
+    verdict = engine.evaluate(forged)
+    assert not verdict.valid
+    assert "RSI disagrees with market data" in verdict.reasons
+    assert "MACD disagrees with market data" not in verdict.reasons
+
+    unknown = forged._replace(timeframe="1h")
+    assert engine.evaluate(unknown).reasons == ValidationEngine(context).evaluate(unknown).reasons
+
+
+def test_file_and_socket_replays_build_the_same_candles(tmp_path):
+    ticks = _ticks(2_000)
+    lines = [
+        json.dumps({"symbol": t.symbol, "timestamp": t.timestamp * 1000, "price": t.close, "volume": t.volume})
+        for t in ticks
+    ]
+    (tmp_path / "ticks.jsonl").write_text("\n".join(lines) + "\nnot json\n")
+    csv_rows = ["symbol,timestamp,price,volume"] + [f"{t.symbol},{t.timestamp!r},{t.close!r},{t.volume!r}" for t in ticks]
+    (tmp_path / "ticks.csv").write_text("\n".join(csv_rows) + "\n")
+
+    from_file = CandleAggregator(["1m", "5m"])
+    assert feed(from_file, read_events(tmp_path / "ticks.csv")) == len(ticks)
+
+    async def replay() -> CandleAggregator:
+        async def serve(reader, writer):
+            writer.write((tmp_path / "ticks.jsonl").read_bytes())
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        aggregator = CandleAggregator(["1m", "5m"])
+        task = asyncio.create_task(consume_socket(aggregator, "127.0.0.1", server.sockets[0].getsockname()[1]))
+        while aggregator.symbols() == [] or aggregator.series("ETH", "1m").closed < from_file.series("ETH", "1m").closed:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        server.close()
+        return aggregator
+
+    from_socket = asyncio.run(asyncio.wait_for(replay(), timeout=10))
+    for name in ("timestamp", "close", "volume", "rsi"):
+        np.testing.assert_allclose(
+            from_socket.series("ETH", "5m").column(name), from_file.series("ETH", "5m").column(name), equal_nan=True
+        )
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("xgboost")
+
+from trading_agent.backtesting.fills import CandleBook, CandleSeries, FillSimulator
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.store import StoredAlerts
+from trading_agent.backtesting.vectorized import BUY, SELL, AlertColumns
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+from trading_agent.services.confidence_model import (
+    ConfidenceModel,
+    alert_features,
+    column_features,
+    holdout_report,
+    outcome_labels,
+    roc_auc,
+)
+from trading_agent.services.decision_engine import DecisionEngine
+from trading_agent.services.execution_engine import ExecutionEngine
+from trading_agent.services.market_context import Candle, MarketContextProvider
+from trading_agent.services.pipeline import TradingPipeline
+from trading_agent.services.risk_book import RiskBook
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+CONTEXT = MarketContext(ema_fast=1010.0, ema_slow=1000.0, vwap=990.0, atr_baseline=12.0)
+
+
+def _columns(count: int, seed: int = 0) -> AlertColumns:
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(900.0, 1100.0, count)
+    return AlertColumns(
+        symbol=rng.choice(np.array(["ETH", "SOL"]), count),
+        price=price,
+        rsi=rng.uniform(0.0, 100.0, count),
+        macd=rng.uniform(-2.0, 2.0, count),
+        ema20=price * rng.uniform(0.98, 1.02, count),
+        atr=price * rng.uniform(0.002, 0.02, count),
+        signal=rng.choice(np.array([BUY, SELL], dtype=np.int8), count),
+    )
+
+
+def _alerts(columns: AlertColumns) -> list:
+    return [
+        ParsedAlert(
+            str(columns.symbol[i]),
+            float(columns.price[i]),
+            "buy" if columns.signal[i] == BUY else "sell",
+            "5m",
+            ParsedIndicators(float(columns.rsi[i]), float(columns.macd[i]), float(columns.ema20[i]), float(columns.atr[i])),
+        )
+        for i in range(len(columns))
+    ]
+
+
+def _labels(columns: AlertColumns) -> np.ndarray:
+    # Buys win when oversold and sells when overbought, plus some noise
+    noise = np.random.default_rng(1).random(len(columns)) < 0.1
+    return ((columns.signal == BUY) & (columns.rsi < 50) | (columns.signal == SELL) & (columns.rsi > 50)) ^ noise
+
+
+@pytest.fixture(scope="module")
+def model() -> ConfidenceModel:
+    columns = _columns(4_000)
+    return ConfidenceModel.train(column_features(columns, CONTEXT), _labels(columns), rounds=40)
+
+
+def test_features_match_between_live_and_columnar_paths():
+    columns = _columns(50)
+    np.testing.assert_array_equal(alert_features(_alerts(columns), [CONTEXT] * 50), column_features(columns, CONTEXT))
+
+    unknown = MarketContext(ema_fast=0.0, ema_slow=0.0, vwap=None, atr_baseline=0.0)
+    features = column_features(columns, unknown)
+    assert np.isnan(features[:, 5:]).all() and not np.isnan(features[:, :5]).any()
+    assert alert_features([], []).shape == (0, 8)
+
+
+def test_model_learns_labels_and_round_trips(model, tmp_path):
+    columns = _columns(1_000, seed=2)
+    features, labels = column_features(columns, CONTEXT), _labels(columns)
+    report = holdout_report(model, features, labels)
+    assert report["auc"] > 0.85 and report["accuracy"] > 0.8
+
+    loaded = ConfidenceModel.load(model.save(tmp_path / "model.json"))
+    np.testing.assert_array_equal(loaded.confidence(features), model.confidence(features))
+    assert roc_auc(np.array([0, 0, 1, 1]), np.array([0.1, 0.5, 0.5, 0.9])) == pytest.approx(0.875)
+
+
+def test_engine_scores_with_the_model_and_batches_match_single_alerts(model):
+    columns = _columns(200, seed=3)
+    alerts = _alerts(columns)
+    engine = ValidationEngine(CONTEXT, model=model)
+    rules_only = ValidationEngine(CONTEXT)
+
+    singles = [engine.evaluate(alert) for alert in alerts]
+    assert engine.evaluate_many(alerts, [CONTEXT] * len(alerts)) == singles
+    assert [v.confidence for v in singles] == model.confidence(column_features(columns, CONTEXT)).tolist()
+    assert all(v.valid == (v.confidence >= engine.validity_threshold) for v in singles)
+    assert [v.reasons for v in singles] == [rules_only.evaluate(alert).reasons for alert in alerts]
+
+
+def test_vectorized_backtest_matches_the_scalar_replay_with_a_model(model):
+    columns = _columns(500, seed=4)
+    backtester = Backtester(CONTEXT, confidence_model=model)
+    batch = backtester.run_batch(columns)
+    scalar = backtester.run(_alerts(columns))
+
+    assert [t.confidence for t in scalar.trades] == batch.decisions.confidence.tolist()
+    assert [t.action.value for t in scalar.trades] == [t.action.value for t in batch.decisions.to_trades()]
+    assert batch.net_pl == pytest.approx(scalar.net_pl)
+    assert Backtester(CONTEXT).run_batch(columns).net_pl != batch.net_pl
+
+
+def test_pipeline_scores_a_micro_batch_in_one_call(model):
+    class CountingModel:
+        calls = 0
+
+        def score(self, alerts, contexts):
+            CountingModel.calls += 1
+            return model.score(alerts, contexts)
+
+    def pipeline(scorer) -> TradingPipeline:
+        return TradingPipeline(
+            validation_engine=ValidationEngine(model=scorer),
+            decision_engine=DecisionEngine(),
+            execution_engine=ExecutionEngine(),
+            context_provider=MarketContextProvider(),
+            risk_book=RiskBook(account_equity=10_000.0),
+        )
+
+    alerts = _alerts(_columns(40, seed=5))
+    batched = pipeline(CountingModel()).process_batch(alerts)
+    assert CountingModel.calls == 1
+    one_by_one = pipeline(model)
+    expected = [one_by_one.process(alert) for alert in alerts]
+    assert [o.validation for o in batched] == [o.validation for o in expected]
+    assert [o.decision for o in batched] == [o.decision for o in expected]
+
+
+def test_outcome_labels_resolve_each_signal_against_later_candles():
+    start = datetime(2024, 1, 1)
+    bars = [(100, 101, 99, 100), (100, 110, 99, 109), (109, 109, 80, 81), (81, 82, 80, 81)]
+    candles = CandleBook(
+        {"ETH": CandleSeries.from_candles(Candle(start + timedelta(minutes=i), *bar, 1.0) for i, bar in enumerate(bars))}
+    )
+    # ATR 2: a buy at 100 targets 108 (hit in bar 1), a sell at 100 stops at 104 (also bar 1),
+    # a buy at 81 in the last bar never resolves and SOL has no candles
+    columns = AlertColumns(
+        symbol=np.array(["ETH", "ETH", "ETH", "SOL"]),
+        price=np.array([100.0, 100.0, 81.0, 100.0]),
+        rsi=np.full(4, 50.0),
+        macd=np.zeros(4),
+        ema20=np.full(4, 100.0),
+        atr=np.full(4, 2.0),
+        signal=np.array([BUY, SELL, BUY, BUY], dtype=np.int8),
+    )
+    stamps = np.array([start, start, start + timedelta(minutes=3), start], dtype="datetime64[us]")
+    stored = StoredAlerts(columns, np.arange(4), stamps, np.full(4, "5m"))
+
+    won, known = outcome_labels(stored, FillSimulator(candles))
+    assert known.tolist() == [True, True, False, False]
+    assert won[known].tolist() == [True, False]
@@ -1,6 +1,7 @@
+from trading_agent.config.settings import Settings
 from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
 from trading_agent.schemas.pipeline import Action
-from trading_agent.services.decision_engine import DecisionEngine, RiskState
+from trading_agent.services.decision_engine import DecisionCache, DecisionEngine, RiskState
 from trading_agent.schemas.pipeline import ValidationResultSchema
 
 
@@ -40,3 +41,51 @@ def test_decision_engine_ignores_when_confidence_low():
 
     assert decision.action == Action.IGNORE
     assert decision.size == 0
+
+
+def _alert(price: float, atr: float, signal: str = "buy") -> AlertPayload:
+    return AlertPayload(
+        symbol="ETH",
+        price=price,
+        signal=signal,
+        timeframe="5m",
+        indicators=IndicatorPayload(RSI=25.0, MACD=0.01, EMA20=1695.0, ATR=atr),
+    )
+
+
+def test_decision_cache_matches_uncached_decisions_and_counts_hits():
+    validation = ValidationResultSchema(valid=True, confidence=75, reasons=[])
+    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+    alerts = [_alert(1700.0 + i % 5, 10.0 + i % 3, "buy" if i % 2 else "sell") for i in range(60)]
+    cache = DecisionCache(max_entries=30)
+    cached, plain = DecisionEngine(Settings(), cache=cache), DecisionEngine(Settings())
+
+    assert [cached.decide(a, validation, risk_state) for a in alerts] == [
+        plain.decide(a, validation, risk_state) for a in alerts
+    ]
+    # (price, ATR, signal) repeats every 30 alerts
+    assert cache.misses == 30 and cache.hits == 30
+
+    small = DecisionCache(max_entries=8)
+    engine = DecisionEngine(Settings(), cache=small)
+    for alert in alerts:
+        engine.decide(alert, validation, risk_state)
+    assert len(small) == 8 and small.hits == 0
+
+
+def test_decision_cache_quantizes_inputs_and_resets_on_settings_change():
+    validation = ValidationResultSchema(valid=True, confidence=75, reasons=[])
+    risk_state = RiskState(open_positions={}, daily_loss_fraction=0.0)
+    settings = Settings()
+    cache = DecisionCache(price_quantum=1.0, atr_quantum=0.5)
+    engine = DecisionEngine(settings, cache=cache)
+
+    first = engine.decide(_alert(1700.2, 10.1), validation, risk_state)
+    second = engine.decide(_alert(1699.9, 9.9), validation, risk_state)
+    assert first == second and cache.hits == 1
+    assert first.stop_loss == 1700.0 - 2 * 10.0
+
+    settings.max_symbol_exposure = 0.5
+    resized = engine.decide(_alert(1700.2, 10.1), validation, risk_state)
+    assert resized.size > first.size
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1}
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from trading_agent.backtesting.fills import (
+    EXIT_END_OF_DATA,
+    EXIT_STOP,
+    EXIT_TARGET,
+    EXIT_TIMEOUT,
+    CandleBook,
+    CandleSeries,
+    FillSimulator,
+)
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.config.settings import Settings
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.services.market_context import Candle
+from trading_agent.services.validation_engine import MarketContext
+
+START = datetime(2024, 1, 1)
+EPOCH_START = int((START - datetime(1970, 1, 1)).total_seconds())
+
+
+def _series(bars):
+    return CandleSeries.from_candles(
+        Candle(START + timedelta(minutes=5 * i), o, h, l, c, 1.0) for i, (o, h, l, c) in enumerate(bars)
+    )
+
+
+def _simulator(bars, **kwargs):
+    return FillSimulator(CandleBook({"ETH": _series(bars)}), **kwargs)
+
+
+def test_long_hits_target_before_stop():
+    sim = _simulator([(100, 101, 99, 100), (100, 106, 99, 105), (105, 105, 90, 91)])
+    fill = sim.resolve("ETH", 1, 2.0, EPOCH_START, 100.0, stop=95.0, target=105.0)
+    assert fill.exit_reason == EXIT_TARGET
+    assert fill.exit_price == 105.0
+    assert fill.exit_time == EPOCH_START + 600  # the exit bar's close
+    assert fill.pnl == pytest.approx(10.0)
+
+
+def test_bar_spanning_both_levels_resolves_to_stop():
+    sim = _simulator([(100, 110, 90, 100)])
+    fill = sim.resolve("ETH", 1, 1.0, EPOCH_START, 100.0, stop=95.0, target=105.0)
+    assert fill.exit_reason == EXIT_STOP
+    assert fill.pnl == pytest.approx(-5.0)
+
+
+def test_short_gap_through_stop_fills_at_open_with_slippage_and_fees():
+    sim = _simulator([(100, 101, 99, 100), (110, 112, 108, 111)], slippage_bps=10, fee_bps=5)
+    fill = sim.resolve("ETH", -1, 1.0, EPOCH_START, 100.0, stop=105.0, target=90.0)
+    assert fill.exit_reason == EXIT_STOP
+    assert fill.entry_price == pytest.approx(99.9)
+    assert fill.exit_price == pytest.approx(110.11)
+    assert fill.fees == pytest.approx(0.0005 * (99.9 + 110.11))
+    assert fill.pnl == pytest.approx(99.9 - 110.11 - fill.fees)
+
+
+def test_entry_uses_first_bar_at_or_after_entry_time():
+    sim = _simulator([(100, 100, 80, 90), (100, 106, 99, 105)])
+    fill = sim.resolve("ETH", 1, 1.0, EPOCH_START + 60, 100.0, stop=95.0, target=105.0)
+    assert fill.exit_reason == EXIT_TARGET
+
+
+def test_unresolved_trades_time_out_or_close_at_end_of_data():
+    bars = [(100, 101, 99, 100 + i) for i in range(200)]
+    fill = _simulator(bars, max_holding_bars=10).resolve("ETH", 1, 1.0, EPOCH_START, 100.0, 50.0, 500.0)
+    assert (fill.exit_reason, fill.exit_price) == (EXIT_TIMEOUT, 109.0)
+
+    fill = _simulator(bars, initial_chunk=4).resolve("ETH", 1, 1.0, EPOCH_START, 100.0, 50.0, 500.0)
+    assert (fill.exit_reason, fill.exit_price) == (EXIT_END_OF_DATA, 299.0)
+
+
+def test_candle_book_reads_multi_symbol_csv(tmp_path):
+    path = tmp_path / "candles.csv"
+    path.write_text(
+        "symbol,timestamp,open,high,low,close,volume\n"
+        "ETH,2024-01-01T00:05:00,2,3,1,2,1\n"
+        "ETH,2024-01-01T00:00:00,1,2,0.5,1.5,1\n"
+        "SOL,2024-01-01T00:00:00,9,9,9,9,1\n"
+    )
+    book = CandleBook.from_csv(path)
+    assert list(book["ETH"].open) == [1.0, 2.0]
+    assert book["ETH"].first_bar_at_or_after(EPOCH_START + 1) == 1
+    assert "SOL" in book and "BTC" not in book
+
+
+def test_backtester_holds_positions_until_simulated_exit():
+    # Exposure limit allows one open position; the second alert arrives while the first is open
+    settings = Settings(account_equity=10_000.0, max_symbol_exposure=0.005, max_risk_per_trade=0.01)
+    bars = [(100, 100.5, 99.5, 100)] * 3 + [(100, 120, 99.5, 119)] + [(119, 119.5, 118.5, 119)] * 4
+    sim = FillSimulator(CandleBook({"ETH": _series(bars)}))
+    context = MarketContext(ema_fast=110.0, ema_slow=100.0, vwap=101.0, atr_baseline=1.0)
+    backtester = Backtester(context, settings=settings, fill_simulator=sim)
+
+    def alert(minutes):
+        return AlertPayload(
+            symbol="ETH",
+            price=100.0,
+            signal="buy",
+            timeframe="5m",
+            indicators=IndicatorPayload(RSI=25.0, MACD=0.1, EMA20=99.0, ATR=1.0),
+            timestamp=START + timedelta(minutes=minutes),
+        )
+
+    result = backtester.run([alert(0), alert(5), alert(20)])
+    actions = [trade.action.value for trade in result.trades]
+    assert actions == ["ENTER_LONG", "IGNORE", "ENTER_LONG"]
+    assert result.trades[1].reason == "Symbol exposure limit reached"
+    assert [fill.exit_reason for fill in result.fills] == [EXIT_TARGET, EXIT_TARGET]
+    assert result.net_pl == pytest.approx(sum(fill.pnl for fill in result.fills))
+
+    with pytest.raises(ValueError):
+        backtester.run([alert(0).model_copy(update={"timestamp": None})])
+
+
+def test_an_alert_inside_the_exit_bar_still_sees_the_position_open():
+    settings = Settings(account_equity=10_000.0, max_symbol_exposure=0.005, max_risk_per_trade=0.01)
+    bars = [(100, 100.5, 99.5, 100)] + [(100, 120, 99.5, 119)] + [(119, 119.5, 118.5, 119)] * 2
+    sim = FillSimulator(CandleBook({"ETH": _series(bars)}))
+    context = MarketContext(ema_fast=110.0, ema_slow=100.0, vwap=101.0, atr_baseline=1.0)
+    backtester = Backtester(context, settings=settings, fill_simulator=sim)
+
+    def alert(minutes):
+        return AlertPayload(
+            symbol="ETH",
+            price=100.0,
+            signal="buy",
+            timeframe="5m",
+            indicators=IndicatorPayload(RSI=25.0, MACD=0.1, EMA20=99.0, ATR=1.0),
+            timestamp=START + timedelta(minutes=minutes),
+        )
+
+    # The target is hit in the bar opening at minute 5; at minute 7 that bar has not closed yet
+    result = backtester.run([alert(0), alert(7), alert(10)])
+    assert result.fills[0].exit_time == EPOCH_START + 600
+    assert [trade.action.value for trade in result.trades] == ["ENTER_LONG", "IGNORE", "ENTER_LONG"]
+    assert result.trades[1].reason == "Symbol exposure limit reached"
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload, ParsedAlert, ParsedIndicators
+from trading_agent.schemas.pipeline import ExecutionResult
+from trading_agent.services.idempotency import IdempotencyCache, alert_fingerprint, idempotency_key
+
+
+def _result(order_id: str) -> ExecutionResult:
+    return ExecutionResult(success=True, order_id=order_id, status="filled", executed_size=1.0)
+
+
+def test_fingerprint_ignores_representation_but_not_content():
+    parsed = ParsedAlert("ETH", 1725.5, "buy", "5m", ParsedIndicators(28.4, 0.002, 1701.3, 18.2))
+    payload = AlertPayload(
+        symbol="ETH", price=1725.5, signal="buy", timeframe="5m",
+        indicators=IndicatorPayload(RSI=28.4, MACD=0.002, EMA20=1701.3, ATR=18.2),
+    )
+    assert alert_fingerprint(parsed) == alert_fingerprint(payload)
+    assert alert_fingerprint(parsed._replace(price=1725.6)) != alert_fingerprint(parsed)
+    assert idempotency_key(parsed, "abc") == "id:abc"
+    assert idempotency_key(parsed, None) == alert_fingerprint(parsed)
+
+
+def test_cache_shares_in_flight_results_and_expires():
+    now = [0.0]
+
+    async def scenario():
+        cache = IdempotencyCache(max_entries=2, ttl=10.0, clock=lambda: now[0])
+        first, owner = cache.claim("a")
+        waiter, waiter_owner = cache.claim("a")
+        assert owner and not waiter_owner and waiter is first
+        cache.complete(first, _result("1"))
+        assert (await waiter).order_id == "1"
+
+        now[0] = 11.0
+        assert cache.claim("a")[1] is True
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    asyncio.run(scenario())
+
+
+def test_cache_evicts_least_recently_used_and_forgets_failures():
+    async def scenario():
+        cache = IdempotencyCache(max_entries=2, ttl=60.0)
+        a, _ = cache.claim("a")
+        cache.claim("b")
+        cache.claim("a")  # touch "a" so "b" is the oldest
+        cache.claim("c")
+        assert cache.claim("a")[1] is False
+        assert cache.claim("b")[1] is True
+
+        cache.fail("a", a, RuntimeError("boom"))
+        with pytest.raises(RuntimeError):
+            await a
+        assert cache.claim("a")[1] is True
+
+    asyncio.run(scenario())
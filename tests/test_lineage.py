@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from trading_agent.api.main import app
+from trading_agent.db.database import get_engine, session_scope
+from trading_agent.models.entities import Decision
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema
+from trading_agent.services.lineage import get_alert_lineage, list_alert_lineage, list_decisions
+from trading_agent.services.persistence import persist_pipeline
+
+
+def _persist(symbol: str = "ETH"):
+    alert = AlertPayload(
+        symbol=symbol, price=100.0, signal="buy", timeframe="5m", indicators=IndicatorPayload(RSI=25.0, MACD=0.1, EMA20=99.0, ATR=1.0)
+    )
+    decision = TradeDecision(
+        action=Action.ENTER_LONG, symbol=symbol, order_type="market", size=1.0, stop_loss=98.0, take_profit=104.0, confidence=70
+    )
+    execution = ExecutionResult(success=True, order_id=None, status="filled", executed_size=1.0)
+    return persist_pipeline(alert, ValidationResultSchema(valid=True, confidence=70, reasons=["x"]), decision, execution)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def test_alert_lineage_loads_full_chain(db_tables):
+    ids = _persist()
+
+    with session_scope() as session:
+        alert = get_alert_lineage(session, ids.alert_id)
+        assert alert.validations[0].id == ids.validation_id
+        assert alert.decisions[0].id == ids.decision_id
+        assert alert.decisions[0].orders[0].id == ids.order_id
+
+
+def test_list_lineage_query_count_is_constant(db_tables):
+    for _ in range(20):
+        _persist("SOL")
+    counter = _QueryCounter()
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        with session_scope() as session:
+            alerts = list_alert_lineage(session, symbol="SOL", start=datetime.utcnow() - timedelta(hours=1))
+            assert len(alerts) == 20
+            assert all(alert.decisions[0].orders for alert in alerts)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+    # alerts, validations, decisions and orders: one query per level regardless of row count
+    assert counter.count == 4
+    with session_scope() as session:
+        assert len(list_decisions(session, "SOL")) == 20
+
+
+def test_foreign_keys_are_enforced(db_tables):
+    with pytest.raises(IntegrityError):
+        with session_scope() as session:
+            session.add(Decision(alert_id=999999, action=Action.IGNORE, symbol="ETH", order_type="market", size=0.0))
+
+
+def test_lineage_endpoint(db_tables):
+    ids = _persist()
+
+    with TestClient(app) as client:
+        found = client.get(f"/alerts/{ids.alert_id}/lineage")
+        missing = client.get("/alerts/999999/lineage")
+
+    assert found.status_code == 200
+    assert found.json()["decisions"][0]["orders"][0]["id"] == ids.order_id
+    assert missing.status_code == 404
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.services.market_context import Candle, MarketContextProvider, RingBuffer, read_candle_file
+
+
+def _alert(price: float, atr: float = 10.0) -> AlertPayload:
+    return AlertPayload(
+        symbol="ETH",
+        price=price,
+        signal="buy",
+        timeframe="5m",
+        indicators=IndicatorPayload(RSI=25.0, MACD=0.01, EMA20=price, ATR=atr),
+    )
+
+
+def test_ring_buffer_keeps_running_mean_of_window():
+    ring = RingBuffer(3)
+    for value in [1.0, 2.0, 3.0, 4.0]:
+        ring.push(value)
+
+    assert len(ring) == 3
+    assert ring.mean == pytest.approx(3.0)
+
+
+def test_provider_tracks_series_independently():
+    provider = MarketContextProvider(ema_fast_period=3, ema_slow_period=5, vwap_window=2, atr_baseline_window=2)
+    provider.observe(_alert(100.0, atr=4.0))
+    context = provider.observe(_alert(110.0, atr=6.0))
+
+    assert context.ema_fast == pytest.approx(105.0)
+    assert context.ema_slow == pytest.approx(100.0 + (10.0 / 3))
+    assert context.vwap == pytest.approx(105.0)
+    assert context.atr_baseline == pytest.approx(5.0)
+    assert provider.snapshot("ETH", "5m") is context
+    assert provider.snapshot("ETH", "1h") is None
+
+
+def test_provider_seeds_from_candle_file(tmp_path):
+    path = tmp_path / "eth_5m.csv"
+    start = datetime(2024, 1, 1)
+    lines = ["timestamp,open,high,low,close,volume"]
+    for i in range(20):
+        lines.append(f"{(start + timedelta(minutes=5 * i)).isoformat()},{100 + i},{102 + i},{99 + i},{101 + i},10")
+    path.write_text("\n".join(lines))
+
+    provider = MarketContextProvider(atr_period=14)
+    assert provider.seed_from_candles("ETH", "5m", read_candle_file(path)) == 20
+
+    context = provider.snapshot("ETH", "5m")
+    assert context.ema_slow < context.ema_fast < 120.0
+    assert context.atr_baseline > 0
+    first = provider.update_candle("SOL", "5m", Candle(start, 10.0, 12.0, 9.0, 11.0, 5.0))
+    assert first.vwap == pytest.approx((12.0 + 9.0 + 11.0) / 3)
+
+
+def test_backtester_uses_incremental_context():
+    alerts = [_alert(1700.0 + i) for i in range(10)]
+    provider = MarketContextProvider()
+
+    result = Backtester(context_provider=provider).run(alerts)
+
+    assert result.total_alerts == 10
+    assert provider.snapshot("ETH", "5m").ema_fast > 1700.0
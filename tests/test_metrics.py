@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from trading_agent.api.main import app
+from trading_agent.services.metrics import Counter, Histogram, MetricsRegistry
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1.0)))
+    counter = registry.register(Counter("events", "Events", ["kind"]))
+    child = histogram.labels("decide")
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+    counter.labels('say "hi"').inc()
+
+    text = registry.render()
+
+    assert 'stage_seconds_bucket{stage="decide",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="decide",le="1.0"} 2' in text
+    assert 'stage_seconds_bucket{stage="decide",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="decide"} 3' in text
+    assert 'events_total{kind="say \\"hi\\""} 1.0' in text
+
+
+def test_metrics_endpoint_reports_pipeline_stages(db_tables):
+    payload = json.loads((EXAMPLES / "webhook_sell.json").read_text())
+
+    with TestClient(app) as client:
+        assert client.post("/webhook", json=payload).status_code == 200
+        assert client.post("/webhook", json={"symbol": "ETH"}).status_code == 422
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for stage in ("parse", "validation_engine.evaluate", "decision_engine.decide", "execution_engine.execute", "persist_alerts"):
+        assert f'trading_agent_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'trading_agent_executions_total{status=' in body
+    assert 'trading_agent_decisions_total{action="IGNORE"}' in body
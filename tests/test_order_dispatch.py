@@ -0,0 +1,214 @@
+import asyncio
+import socket
+import threading
+import time
+from collections import Counter
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import trading_agent.api.main as api
+from trading_agent.config.settings import reload_settings
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Order, Position
+from trading_agent.schemas.pipeline import Action, TradeDecision
+from trading_agent.services.execution_engine import ExecutionContext, ExecutionEngine
+from trading_agent.services.order_dispatch import HttpExchangeClient, OrderDispatcher, OrderRequest, new_client_order_id
+
+
+class MockExchange:
+    """Local exchange that fails the first attempts of each order and tracks concurrency."""
+
+    def __init__(self, failures_per_order: int = 0):
+        self.failures_per_order = failures_per_order
+        self.attempts: Counter = Counter()
+        self.orders: dict = {}
+        self.sequence: list = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/orders")(self.create_order)
+
+    async def create_order(self, request: Request):
+        body = await request.json()
+        client_id = body["client_order_id"]
+        self.attempts[client_id] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.attempts[client_id] <= self.failures_per_order:
+                return Response(status_code=503)
+            if client_id not in self.orders:
+                self.orders[client_id] = f"ex-{len(self.orders) + 1}"
+                self.sequence.append((body["symbol"], body["size"]))
+            return {"order_id": self.orders[client_id], "status": "filled", "filled_size": body["size"]}
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def exchange_server():
+    servers = []
+
+    def start(exchange: MockExchange) -> str:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(exchange.app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.time() + 5
+        while not server.started and time.time() < deadline:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def _decision(symbol: str, size: float) -> TradeDecision:
+    return TradeDecision(
+        action=Action.ENTER_LONG, symbol=symbol, order_type="market", size=size, stop_loss=1.0, take_profit=2.0, confidence=70
+    )
+
+
+def _order(symbol: str, size: float) -> OrderRequest:
+    return OrderRequest.from_decision(_decision(symbol, size), new_client_order_id(symbol))
+
+
+def test_dispatcher_retries_with_same_client_order_id(exchange_server):
+    exchange = MockExchange(failures_per_order=2)
+    base_url = exchange_server(exchange)
+    updates = []
+
+    async def on_status(update):
+        updates.append(update)
+
+    async def scenario():
+        dispatcher = OrderDispatcher(HttpExchangeClient(base_url), on_status=on_status, backoff=0.01, max_retries=3)
+        engine = ExecutionEngine(ExecutionContext(paper_trading=False), dispatcher=dispatcher)
+        decision = _decision("ETH", 1.5)
+        result = engine.execute(decision)
+        assert not exchange.attempts  # nothing is sent before dispatch
+        assert engine.dispatch(decision, result) is None
+        await dispatcher.close()
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result.status == "pending" and result.client_order_id
+    assert exchange.attempts[result.client_order_id] == 3
+    assert [(u.client_order_id, u.status, u.exchange_order_id) for u in updates] == [(result.client_order_id, "filled", "ex-1")]
+
+
+def test_dispatcher_respects_concurrency_and_per_symbol_order(exchange_server):
+    exchange = MockExchange()
+    base_url = exchange_server(exchange)
+
+    async def scenario():
+        dispatcher = OrderDispatcher(HttpExchangeClient(base_url), concurrency=2, rate_limit=1000.0)
+        for i in range(6):
+            for symbol in ("ETH", "SOL", "BTC-USD"):
+                dispatcher.dispatch(_order(symbol, float(i + 1)))
+        await dispatcher.close()
+
+    asyncio.run(scenario())
+
+    assert len(exchange.orders) == 18
+    assert exchange.max_in_flight <= 2
+    eth_sizes = [size for symbol, size in exchange.sequence if symbol == "ETH"]
+    assert eth_sizes == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+
+def test_dispatcher_reports_failure_after_retries(exchange_server):
+    exchange = MockExchange(failures_per_order=10)
+    base_url = exchange_server(exchange)
+    updates = []
+
+    async def on_status(update):
+        updates.append(update)
+
+    async def scenario():
+        dispatcher = OrderDispatcher(HttpExchangeClient(base_url), on_status=on_status, backoff=0.001, max_retries=2)
+        dispatcher.dispatch(_order("SOL", 1.0))
+        await dispatcher.close()
+
+    asyncio.run(scenario())
+
+    assert updates[0].status == "failed" and "503" in updates[0].error
+
+
+def test_paper_orders_get_unique_ids():
+    engine = ExecutionEngine(ExecutionContext(paper_trading=True))
+    first = engine.execute(_decision("ETH", 1.0))
+    second = engine.execute(_decision("ETH", 1.0))
+
+    assert first.order_id != second.order_id
+    assert first.order_id.startswith("paper-ETH-")
+
+
+class RowCheckingExchange(MockExchange):
+    """Records the stored status of each order's row at the moment the order arrives."""
+
+    def __init__(self):
+        super().__init__()
+        self.row_status: dict = {}
+
+    async def create_order(self, request: Request):
+        client_id = (await request.json())["client_order_id"]
+        with session_scope() as session:
+            self.row_status[client_id] = session.scalar(select(Order.status).where(Order.client_order_id == client_id))
+        return await super().create_order(request)
+
+
+@pytest.fixture
+def live_app(exchange_server, monkeypatch):
+    exchange = RowCheckingExchange()
+    monkeypatch.setenv("PAPER_TRADING", "false")
+    monkeypatch.setenv("EXCHANGE_BASE_URL", exchange_server(exchange))
+    monkeypatch.setenv("AUDIT_WRITE_BEHIND", "false")
+    reload_settings()
+    yield exchange
+    for name in ("PAPER_TRADING", "EXCHANGE_BASE_URL", "AUDIT_WRITE_BEHIND"):
+        monkeypatch.delenv(name)
+    reload_settings()
+
+
+def _buy_alert() -> dict:
+    return {
+        "symbol": "ETH", "price": 1725.5, "signal": "buy", "timeframe": "5m",
+        "indicators": {"RSI": 28.4, "MACD": 0.002, "EMA20": 1701.3, "ATR": 18.2},
+    }
+
+
+def test_live_orders_are_sent_only_after_their_rows_commit(db_tables, live_app):
+    with TestClient(api.app) as client:
+        result = client.post("/webhook", json=_buy_alert()).json()
+
+    assert result["status"] == "pending"
+    assert live_app.row_status == {result["client_order_id"]: "pending"}
+    with session_scope() as session:
+        assert session.scalar(select(Order.status)) == "filled"
+        assert session.scalar(select(Position.size)) == pytest.approx(live_app.sequence[0][1])
+
+
+def test_live_orders_are_not_sent_when_persistence_fails(db_tables, live_app, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    with TestClient(api.app) as client:
+        with monkeypatch.context() as patch:
+            patch.setattr(api, "persist_pipeline_batch_async", fail)
+            response = client.post("/webhook", json=_buy_alert(), headers={"X-Alert-ID": "lost"})
+        exposure = api.app.state.pipeline.risk_book.snapshot().open_positions
+
+    assert response.status_code == 500
+    assert not live_app.attempts
+    assert exposure == {}
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Decision, Order, ValidationResult
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.persistence import (
+    persist_pipeline,
+    persist_pipeline_async,
+    persist_pipeline_batch,
+    update_order_status,
+)
+from trading_agent.services.pipeline import PipelineOutcome
+
+
+def _pipeline():
+    alert = AlertPayload(
+        symbol="ETH",
+        price=1700.0,
+        signal="buy",
+        timeframe="5m",
+        indicators=IndicatorPayload(RSI=25.0, MACD=0.01, EMA20=1695.0, ATR=10.0),
+    )
+    validation = ValidationResultSchema(valid=True, confidence=75, reasons=["RSI oversold"])
+    decision = TradeDecision(
+        action=Action.ENTER_LONG,
+        symbol="ETH",
+        order_type="market",
+        size=0.5,
+        stop_loss=1680.0,
+        take_profit=1740.0,
+        confidence=75,
+    )
+    execution = ExecutionResult(success=True, order_id="paper-ETH-1", status="filled", executed_size=0.5)
+    return alert, validation, decision, execution
+
+
+def test_persist_pipeline_links_all_rows(db_tables):
+    ids = persist_pipeline(*_pipeline())
+
+    with session_scope() as session:
+        assert session.get(ValidationResult, ids.validation_id).alert_id == ids.alert_id
+        assert session.get(Decision, ids.decision_id).alert_id == ids.alert_id
+        assert session.get(Order, ids.order_id).decision_id == ids.decision_id
+
+
+def test_persist_pipeline_rolls_back_on_failure(db_tables):
+    alert, validation, decision, _ = _pipeline()
+
+    with pytest.raises(AttributeError):
+        persist_pipeline(alert, validation, decision, object())
+
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 0
+        assert session.scalar(select(func.count()).select_from(Decision)) == 0
+
+
+def test_persist_pipeline_async_runs_off_loop(db_tables):
+    ids = asyncio.run(persist_pipeline_async(*_pipeline()))
+
+    with session_scope() as session:
+        assert session.get(Alert, ids.alert_id).symbol == "ETH"
+
+
+def test_persist_pipeline_batch_bulk_inserts_linked_rows(db_tables):
+    alert, validation, decision, execution = _pipeline()
+    ignored = decision.model_copy(update={"action": Action.IGNORE, "size": 0.0})
+    outcomes = [
+        PipelineOutcome(alert, validation, decision, execution),
+        PipelineOutcome(alert, validation, ignored, execution.model_copy(update={"status": "ignored", "executed_size": 0.0})),
+    ]
+
+    ids = persist_pipeline_batch(outcomes)
+
+    assert ids[0].position_id is not None and ids[1].position_id is None
+    with session_scope() as session:
+        for record in ids:
+            assert session.get(Decision, record.decision_id).alert_id == record.alert_id
+            assert session.get(Order, record.order_id).decision_id == record.decision_id
+        assert session.get(Decision, ids[1].decision_id).action == Action.IGNORE
+
+
+def test_update_order_status_by_client_order_id(db_tables):
+    alert, validation, decision, _ = _pipeline()
+    pending = ExecutionResult(success=True, order_id=None, client_order_id="ta-ETH-1", status="pending", executed_size=0.0)
+    ids = persist_pipeline(alert, validation, decision, pending)
+
+    assert update_order_status(OrderStatusUpdate("ta-ETH-1", "ex-9", "filled", 0.5))
+    assert not update_order_status(OrderStatusUpdate("unknown", None, "failed", 0.0))
+    with session_scope() as session:
+        order = session.get(Order, ids.order_id)
+        assert (order.status, order.exchange_order_id, order.filled_size) == ("filled", "ex-9", 0.5)
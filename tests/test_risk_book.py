@@ -0,0 +1,118 @@
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from trading_agent.api.main import app
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert, Decision, Order, Position
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema
+from trading_agent.services.decision_engine import DecisionEngine
+from trading_agent.services.persistence import close_position
+from trading_agent.services.risk_book import RiskBook
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _decision(symbol: str = "ETH", size: float = 1.0) -> TradeDecision:
+    return TradeDecision(
+        action=Action.ENTER_LONG, symbol=symbol, order_type="market", size=size, stop_loss=90.0, take_profit=120.0, confidence=70
+    )
+
+
+def test_hydrate_counts_open_positions_pending_orders_and_todays_losses(db_tables):
+    with session_scope() as session:
+        session.add(Position(symbol="ETH", size=-2.0, entry_price=500.0, open=True))
+        session.add(Position(symbol="ETH", size=1.0, entry_price=500.0, open=False, realized_pnl=-300.0, closed_at=datetime.utcnow()))
+        alert = Alert(symbol="SOL", price=100.0, signal="buy", timeframe="5m", indicators={})
+        session.add(alert)
+        session.flush()
+        decision = Decision(alert_id=alert.id, action=Action.ENTER_LONG, symbol="SOL", order_type="market", size=5.0)
+        session.add(decision)
+        session.flush()
+        session.add(Order(decision_id=decision.id, status="submitted"))
+
+    book = RiskBook(account_equity=10000.0)
+    with session_scope() as session:
+        book.hydrate(session)
+    state = book.snapshot()
+
+    assert state.open_positions == {"ETH": pytest.approx(0.1), "SOL": pytest.approx(0.05)}
+    assert state.daily_loss_fraction == pytest.approx(0.03)
+
+
+def test_book_enforces_exposure_limit_in_decisions():
+    book = RiskBook(account_equity=10000.0)
+    execution = ExecutionResult(success=True, order_id="paper-1", status="filled", executed_size=12.0)
+    book.apply_execution(_decision(size=12.0), execution, price=200.0)
+
+    alert = AlertPayload(
+        symbol="ETH", price=200.0, signal="buy", timeframe="5m", indicators=IndicatorPayload(RSI=25.0, MACD=0.1, EMA20=199.0, ATR=2.0)
+    )
+    validation = ValidationResultSchema(valid=True, confidence=80, reasons=[])
+    decision = DecisionEngine().decide(alert, validation, book.snapshot())
+
+    assert decision.action == Action.IGNORE
+
+
+def test_realized_pl_resets_on_new_day():
+    days = iter([date(2024, 1, 1), date(2024, 1, 1), date(2024, 1, 1), date(2024, 1, 2)])
+    book = RiskBook(account_equity=1000.0, today=lambda: next(days))
+    book.close_position("ETH", size=1.0, entry_price=100.0, realized_pl=-50.0)
+
+    assert book.snapshot().daily_loss_fraction == pytest.approx(0.05)
+    assert book.snapshot().daily_loss_fraction == 0.0
+
+
+def test_final_order_status_releases_the_unfilled_reservation(db_tables):
+    book = RiskBook(account_equity=10000.0)
+    for client_order_id in ("a", "b"):
+        pending = ExecutionResult(
+            success=True, order_id=None, client_order_id=client_order_id, status="pending", executed_size=0.0
+        )
+        book.apply_execution(_decision(size=5.0), pending, price=100.0)
+    assert book.snapshot().open_positions == {"ETH": pytest.approx(0.1)}
+
+    book.settle_order("a", "submitted", 0.0)
+    book.settle_order("a", "cancelled", 0.0)
+    book.settle_order("b", "filled", 2.0)
+    book.settle_order("b", "filled", 2.0)  # repeated answers release nothing more
+    assert book.snapshot().open_positions == {"ETH": pytest.approx(0.02)}
+
+    # Reservations rebuilt from pending orders settle the same way after a restart
+    with session_scope() as session:
+        alert = Alert(symbol="SOL", price=100.0, signal="buy", timeframe="5m", indicators={})
+        session.add(alert)
+        session.flush()
+        decision = Decision(alert_id=alert.id, action=Action.ENTER_LONG, symbol="SOL", order_type="market", size=5.0)
+        session.add(decision)
+        session.flush()
+        session.add(Order(decision_id=decision.id, client_order_id="c", status="submitted"))
+    with session_scope() as session:
+        book.hydrate(session)
+    book.settle_order("c", "rejected", 0.0)
+    assert book.snapshot().open_positions == {}
+
+
+def test_closing_a_position_frees_the_apps_book_for_the_symbol(db_tables):
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+
+    with TestClient(app) as client:
+        opened = client.post("/webhook", json=payload, headers={"X-Alert-ID": "open"}).json()
+        blocked = client.post("/webhook", json=payload, headers={"X-Alert-ID": "blocked"}).json()
+
+    # Restarted so the audit writer has committed the position and the book is hydrated with it
+    with TestClient(app) as client:
+        still_blocked = client.post("/webhook", json=payload, headers={"X-Alert-ID": "still-blocked"}).json()
+        with session_scope() as session:
+            position_id = session.scalar(select(Position.id).where(Position.open.is_(True)))
+        assert close_position(position_id, payload["price"] + 10, risk_book=app.state.pipeline.risk_book) > 0
+        reopened = client.post("/webhook", json=payload, headers={"X-Alert-ID": "reopened"}).json()
+
+    assert opened["status"] == "filled"
+    assert blocked["status"] == still_blocked["status"] == "ignored"
+    assert reopened["status"] == "filled" and reopened["executed_size"] == opened["executed_size"]
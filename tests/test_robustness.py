@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.robustness import (
+    BLOCK,
+    BOOTSTRAP,
+    SHUFFLE,
+    monte_carlo,
+    resample_indices,
+    rolling_windows,
+    time_windows,
+    walk_forward,
+)
+from trading_agent.backtesting.robustness import main as robustness_main
+from trading_agent.backtesting.sweep import SweepParams, evaluate_params, grid
+from trading_agent.backtesting.vectorized import BUY, SELL, AlertColumns
+from trading_agent.config.settings import get_settings
+from trading_agent.services.validation_engine import MarketContext
+
+
+def _columns(count: int = 600) -> AlertColumns:
+    rng = np.random.default_rng(5)
+    price = rng.uniform(100.0, 2000.0, count)
+    return AlertColumns(
+        symbol=rng.choice(np.array(["ETH", "SOL"]), count),
+        price=price,
+        rsi=rng.uniform(0.0, 100.0, count),
+        macd=rng.uniform(-0.01, 0.01, count),
+        ema20=price * rng.uniform(0.98, 1.02, count),
+        atr=price * rng.uniform(0.001, 0.02, count),
+        signal=rng.choice(np.array([BUY, SELL], dtype=np.int8), count),
+    )
+
+
+def test_resampling_methods():
+    rng = np.random.default_rng(0)
+    shuffled = resample_indices(rng, 50, 20, SHUFFLE)
+    assert (np.sort(shuffled, axis=1) == np.arange(50)).all()
+
+    drawn = resample_indices(rng, 50, 20, BOOTSTRAP)
+    assert drawn.shape == (20, 50) and drawn.min() >= 0 and drawn.max() < 50
+
+    blocks = resample_indices(rng, 50, 20, BLOCK, block_size=7)
+    assert blocks.shape == (20, 50)
+    steps = np.diff(blocks, axis=1)[:, :48]  # within a block each index follows the previous one, wrapping at 50
+    within = np.arange(1, 49) % 7 != 0
+    assert ((steps[:, within] == 1) | (steps[:, within] == -49)).all()
+
+    rotations = resample_indices(rng, 50, 20, BLOCK, block_size=50)
+    assert (np.sort(rotations, axis=1) == np.arange(50)).all()
+    with pytest.raises(ValueError):
+        resample_indices(rng, 50, 1, "jackknife")
+
+
+def test_shuffled_paths_keep_the_total_and_results_ignore_the_worker_count():
+    pnl = np.random.default_rng(1).normal(5.0, 100.0, 2_000)
+    serial = monte_carlo(pnl, resamples=300, method=SHUFFLE, equity=10_000.0, seed=7, workers=1, chunk_size=64)
+    parallel = monte_carlo(pnl, resamples=300, method=SHUFFLE, equity=10_000.0, seed=7, workers=3, chunk_size=64)
+
+    assert serial.resamples == 300
+    np.testing.assert_allclose(serial.net_pl, pnl.sum())
+    np.testing.assert_array_equal(serial.max_drawdown, parallel.max_drawdown)
+    assert serial.observed_net_pl == pytest.approx(pnl.sum())
+
+    equity = 10_000.0 + np.cumsum(pnl)
+    peak = np.maximum(np.maximum.accumulate(equity), 10_000.0)
+    assert serial.observed_max_drawdown == pytest.approx((1 - equity / peak).max())
+    assert serial.max_drawdown.min() >= 0.0
+    assert set(serial.percentiles()["net_pl"]) == {5, 25, 50, 75, 95}
+
+
+def test_risk_of_ruin_bounds():
+    losses = monte_carlo(np.full(100, -100.0), resamples=50, equity=10_000.0, workers=1)
+    assert losses.risk_of_ruin == 1.0 and losses.probability_of_loss == 1.0
+    np.testing.assert_allclose(losses.max_drawdown, 1.0)
+
+    wins = monte_carlo(np.full(100, 100.0), resamples=50, method=BLOCK, equity=10_000.0, workers=1)
+    assert wins.risk_of_ruin == 0.0
+    np.testing.assert_array_equal(wins.max_drawdown, 0.0)
+
+    ruin_at_a_tenth = monte_carlo([-600.0, -500.0, 2_000.0], resamples=200, method=SHUFFLE, equity=10_000.0,
+                                  ruin_level=0.1, workers=1)
+    assert ruin_at_a_tenth.risk_of_ruin == pytest.approx(1 / 3, abs=0.1)  # both losses first, in either order
+
+    with pytest.raises(ValueError):
+        monte_carlo(Backtester(MarketContext(1.0, 1.0, None, 1.0)).run([]))
+
+
+def test_windows():
+    assert [(w.train_start, w.train_stop, w.test_stop) for w in rolling_windows(100, 40, 20)] == [
+        (0, 40, 60), (20, 60, 80), (40, 80, 100)
+    ]
+    assert [w.train_start for w in rolling_windows(100, 40, 20, step=30, anchored=True)] == [0, 0]
+
+    start = datetime(2024, 1, 1)
+    stamps = np.array([start + timedelta(hours=6 * i) for i in range(41)], dtype="datetime64[us]")  # 10 days
+    windows = time_windows(stamps, timedelta(days=4), timedelta(days=2))
+    assert [(w.train_start, w.train_stop, w.test_stop) for w in windows] == [(0, 16, 24), (8, 24, 32), (16, 32, 40)]
+
+
+def test_walk_forward_trades_the_best_training_params_out_of_sample():
+    columns = _columns()
+    settings = get_settings()
+    base = SweepParams.from_base(settings, MarketContext(ema_fast=900.0, ema_slow=900.0, vwap=1000.0, atr_baseline=20.0))
+    candidates = grid(base, {"confidence_cutoff": [30, 50, 70], "max_risk_per_trade": [0.005, 0.02]})
+    windows = rolling_windows(len(columns), 200, 100)
+
+    serial = walk_forward(columns, candidates, windows, workers=1, settings=settings)
+    parallel = walk_forward(columns, candidates, windows, workers=2, settings=settings)
+
+    assert len(serial.steps) == 4
+    for step, other in zip(serial.steps, parallel.steps):
+        train = columns.slice(step.window.train_start, step.window.train_stop)
+        scored = [evaluate_params(train, settings, params) for params in candidates]
+        assert step.train.net_pl == max(result.net_pl for result in scored)
+
+        test = evaluate_params(columns.slice(step.window.test_start, step.window.test_stop), settings, step.train.params)
+        assert step.test == test == other.test
+        assert len(step.test_pnl) == test.trades
+    assert serial.net_pl == pytest.approx(serial.trade_pnl.sum())
+
+
+def test_cli_rejects_unknown_grid_parameters(capsys):
+    with pytest.raises(SystemExit):
+        robustness_main(["walkforward", "alerts.jsonl", "--train", "10", "--test", "5", "--grid", "nope=1,2"])
+    assert "unknown sweep parameter: nope" in capsys.readouterr().err
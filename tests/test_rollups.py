@@ -0,0 +1,161 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select
+
+from trading_agent.api.main import app
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import PerformanceRollup, Position
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.schemas.pipeline import Action, ExecutionResult, TradeDecision, ValidationResultSchema
+from trading_agent.services.order_dispatch import OrderStatusUpdate
+from trading_agent.services.persistence import (
+    audit_record,
+    close_position,
+    order_status_record,
+    persist_alerts,
+    persist_pipeline,
+    persist_pipeline_batch,
+    update_order_status,
+    write_audit_records,
+)
+from trading_agent.services.pipeline import PipelineOutcome
+from trading_agent.services.rollups import COUNTERS, UNKNOWN_TIMEFRAME, backfill, compute_rollups
+
+
+def _outcome(symbol="ETH", price=1700.0, action=Action.ENTER_LONG, timeframe="5m", status="filled", size=0.5,
+             client_order_id=None, confidence=75):
+    alert = AlertPayload(
+        symbol=symbol,
+        price=price,
+        signal="sell" if action == Action.ENTER_SHORT else "buy",
+        timeframe=timeframe,
+        indicators=IndicatorPayload(RSI=25.0, MACD=0.01, EMA20=price, ATR=10.0),
+    )
+    decision = TradeDecision(
+        action=action, symbol=symbol, order_type="market", size=size,
+        stop_loss=price - 20, take_profit=price + 40, confidence=confidence,
+    )
+    execution = ExecutionResult(
+        success=True, order_id=None, client_order_id=client_order_id, status=status,
+        executed_size=size if status == "filled" else 0.0,
+    )
+    return PipelineOutcome(alert, ValidationResultSchema(valid=True, confidence=confidence, reasons=[]), decision, execution)
+
+
+def _stored_rollups():
+    with session_scope() as session:
+        return {
+            (row.symbol, row.day, row.timeframe): {name: getattr(row, name) for name in COUNTERS}
+            for row in session.scalars(select(PerformanceRollup))
+        }
+
+
+def _recomputed(start=None, end=None):
+    with session_scope() as session:
+        return compute_rollups(session, start, end)
+
+
+def _assert_same(stored, expected):
+    assert stored.keys() == expected.keys()
+    for key, values in expected.items():
+        assert stored[key] == pytest.approx(values), key
+
+
+def _write_history():
+    """Rows through every write path: single and batch webhooks, the audit log, status updates and closes."""
+    today = datetime.utcnow()
+    yesterday = today - timedelta(days=1)
+
+    single = _outcome()
+    first = persist_pipeline(single.alert, single.validation, single.decision, single.execution)
+    batch = persist_pipeline_batch(
+        [
+            _outcome(action=Action.ENTER_SHORT, price=1710.0, size=0.25),
+            _outcome(action=Action.IGNORE, status="ignored", size=0.0, confidence=20),
+            _outcome(symbol="BTC-USD", price=30_000.0, timeframe="1h", status="submitted", client_order_id="btc-1"),
+        ]
+    )
+
+    late = [_outcome(symbol="SOL", price=20.0, timeframe="1h", status="submitted", size=10.0, client_order_id="sol-1"),
+            _outcome(symbol="SOL", price=21.0, timeframe="1h", size=5.0)]
+    alert_ids = persist_alerts([outcome.alert for outcome in late])
+    records = [audit_record(alert_id, outcome, yesterday) for alert_id, outcome in zip(alert_ids, late)]
+    records.append(order_status_record(OrderStatusUpdate("sol-1", "ex-1", "filled", 10.0)))
+    write_audit_records(json.loads(json.dumps(records, default=str)))
+
+    assert update_order_status(OrderStatusUpdate("btc-1", "ex-2", "filled", 0.5))
+    assert update_order_status(OrderStatusUpdate("btc-1", "ex-2", "cancelled", 0.2))
+    assert not update_order_status(OrderStatusUpdate("missing", None, "filled", 1.0))
+
+    # A position from before positions were linked to decisions
+    with session_scope() as session:
+        legacy = session.scalar(
+            insert(Position).values(symbol="ETH", size=1.0, entry_price=1600.0, open=True).returning(Position.id)
+        )
+
+    assert close_position(first.position_id, 1750.0) == pytest.approx(25.0)
+    assert close_position(batch[0].position_id, 1720.0, closed_at=yesterday) == pytest.approx(-2.5)
+    assert close_position(legacy, 1650.0) == pytest.approx(50.0)
+    assert close_position(first.position_id, 1800.0) is None
+    return today.date(), yesterday.date()
+
+
+def test_incremental_rollups_match_a_full_recompute(db_tables):
+    today, yesterday = _write_history()
+    stored = _stored_rollups()
+    _assert_same(stored, _recomputed())
+
+    eth = stored[("ETH", today, "5m")]
+    assert (eth["decisions"], eth["entries"], eth["long_entries"]) == (3, 2, 1)
+    assert eth["net_notional"] == pytest.approx(0.5 * 1700.0 - 0.25 * 1710.0)
+    assert (eth["closed_positions"], eth["winning_positions"], eth["realized_pnl"]) == (1, 1, pytest.approx(25.0))
+    assert stored[("ETH", yesterday, "5m")]["realized_pnl"] == pytest.approx(-2.5)
+    assert stored[("ETH", today, UNKNOWN_TIMEFRAME)]["realized_pnl"] == pytest.approx(50.0)
+
+    btc = stored[("BTC-USD", today, "1h")]
+    assert (btc["orders"], btc["filled_orders"], btc["filled_size"]) == (1, 0, pytest.approx(0.2))
+    sol = stored[("SOL", yesterday, "1h")]
+    assert (sol["filled_orders"], sol["gross_notional"]) == (2, pytest.approx(10 * 20.0 + 5 * 21.0))
+
+
+def test_backfill_rebuilds_all_days_or_a_range(db_tables):
+    today, yesterday = _write_history()
+    expected = _stored_rollups()
+
+    with session_scope() as session:
+        session.execute(delete(PerformanceRollup))
+    assert backfill() == len(expected)
+    _assert_same(_stored_rollups(), expected)
+
+    with session_scope() as session:
+        session.execute(delete(PerformanceRollup).where(PerformanceRollup.day == yesterday))
+        session.execute(PerformanceRollup.__table__.update().values(decisions=0))
+    backfill(yesterday, yesterday)
+    rebuilt = _stored_rollups()
+    _assert_same({k: v for k, v in rebuilt.items() if k[1] == yesterday}, _recomputed(yesterday, yesterday))
+    assert all(values["decisions"] == 0 for key, values in rebuilt.items() if key[1] == today)
+
+
+def test_report_endpoints_read_the_rollups(db_tables):
+    today, yesterday = _write_history()
+
+    with TestClient(app) as client:
+        daily = client.get("/reports/daily", params={"symbol": "ETH", "start": today.isoformat(), "end": today.isoformat()})
+        symbols = client.get("/reports/symbols", params={"timeframe": "1h"})
+        empty = client.get("/reports/daily", params={"start": (today + timedelta(days=1)).isoformat()})
+
+    assert daily.status_code == 200
+    rows = {row["timeframe"]: row for row in daily.json()}
+    assert set(rows) == {UNKNOWN_TIMEFRAME, "5m"}
+    assert rows["5m"]["average_confidence"] == pytest.approx((75 + 75 + 20) / 3)
+    assert rows["5m"]["win_rate"] == 1.0
+    assert rows[UNKNOWN_TIMEFRAME]["decisions"] == 0 and rows[UNKNOWN_TIMEFRAME]["average_confidence"] is None
+
+    totals = {row["symbol"]: row for row in symbols.json()}
+    assert set(totals) == {"BTC-USD", "SOL"}
+    assert totals["SOL"]["orders"] == 2 and totals["SOL"]["win_rate"] is None
+    assert empty.json() == []
+    assert date.fromisoformat(daily.json()[0]["day"]) == today
@@ -0,0 +1,118 @@
+import random
+
+import numpy as np
+import pytest
+
+from trading_agent.backtesting.vectorized import AlertColumns, evaluate_batch
+from trading_agent.schemas.alert import ParsedAlert, ParsedIndicators
+from trading_agent.services.rules import DEFAULT_RULES, Outcome, Rule, RuleTable
+from trading_agent.services.validation_engine import MarketContext, ValidationEngine
+
+
+def _reference(alert, context, threshold=40):
+    """The hardcoded scoring the default rule table replaced."""
+    i, reasons, confidence = alert.indicators, [], 0
+    if i.EMA20 >= context.ema_slow and i.EMA20 >= i.RSI:
+        reasons.append("EMA trend aligned")
+        confidence += 20
+    else:
+        reasons.append("EMA trend misaligned")
+    if context.vwap is not None:
+        if alert.price >= context.vwap:
+            reasons.append("Price above VWAP")
+            confidence += 10
+        else:
+            reasons.append("Price below VWAP")
+    if i.RSI < 30 and alert.signal == "buy":
+        reasons.append("RSI oversold")
+        confidence += 25
+    elif i.RSI > 70 and alert.signal == "sell":
+        reasons.append("RSI overbought")
+        confidence += 25
+    else:
+        reasons.append("RSI neutral")
+    if i.MACD > 0 and alert.signal == "buy":
+        reasons.append("MACD bullish")
+        confidence += 15
+    elif i.MACD < 0 and alert.signal == "sell":
+        reasons.append("MACD bearish")
+        confidence += 15
+    else:
+        reasons.append("MACD unconfirmed")
+    if i.ATR <= 1.5 * context.atr_baseline:
+        reasons.append("ATR normal")
+        confidence += 10
+    else:
+        reasons.append("ATR elevated")
+        confidence = max(confidence - 10, 0)
+    return confidence >= threshold, min(confidence, 100), reasons
+
+
+def _alerts(count, seed=3):
+    rng = random.Random(seed)
+    return [
+        ParsedAlert(
+            symbol=rng.choice(["ETH", "SOL"]),
+            price=rng.uniform(1500.0, 1700.0),
+            signal=rng.choice(["buy", "sell"]),
+            timeframe=rng.choice(["5m", "1h"]),
+            indicators=ParsedIndicators(
+                RSI=rng.uniform(0.0, 100.0),
+                MACD=rng.uniform(-0.01, 0.01),
+                EMA20=rng.uniform(1500.0, 1700.0),
+                ATR=rng.uniform(5.0, 40.0),
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("vwap", [1600.0, None])
+def test_default_table_matches_hardcoded_scoring_scalar_and_vectorized(vwap):
+    context = MarketContext(ema_fast=1610.0, ema_slow=1600.0, vwap=vwap, atr_baseline=15.0)
+    alerts = _alerts(1000)
+    engine = ValidationEngine(context)
+
+    verdicts = [engine.evaluate(alert) for alert in alerts]
+    assert [(v.valid, v.confidence, v.reasons) for v in verdicts] == [_reference(a, context) for a in alerts]
+
+    batch = evaluate_batch(AlertColumns.from_payloads(alerts), context)
+    assert batch.valid.tolist() == [v.valid for v in verdicts]
+    assert batch.confidence.tolist() == [v.confidence for v in verdicts]
+    assert batch.reason_mask.tolist() == [v.reason_mask for v in verdicts]
+    assert engine.rules.expand(batch.reason_mask[0]) == verdicts[0].reasons
+    assert verdicts[0].to_schema().reasons == verdicts[0].reasons
+
+
+def test_rules_scoped_by_symbol_and_timeframe_run_side_by_side():
+    strict_rsi = Rule(
+        "rsi_strict",
+        (Outcome("RSI deeply oversold", 25, lambda a, c: (a.rsi < 20) & a.buy), Outcome("RSI neutral")),
+        symbols=frozenset({"SOL"}),
+        timeframes=frozenset({"1h"}),
+    )
+    default_rsi = Rule(
+        "rsi",
+        DEFAULT_RULES[2].outcomes,
+        applies=DEFAULT_RULES[2].applies,
+    )
+    rules = [rule for rule in DEFAULT_RULES if rule.name != "rsi"]
+    table = RuleTable(rules + [strict_rsi])
+    context = MarketContext(ema_fast=1610.0, ema_slow=1600.0, vwap=None, atr_baseline=15.0)
+    engine = ValidationEngine(context, rules=table)
+
+    indicators = ParsedIndicators(RSI=25.0, MACD=0.002, EMA20=1650.0, ATR=10.0)
+    sol_1h = ParsedAlert("SOL", 1650.0, "buy", "1h", indicators)
+    sol_5m = ParsedAlert("SOL", 1650.0, "buy", "5m", indicators)
+    assert "RSI neutral" in engine.evaluate(sol_1h).reasons
+    assert not any("RSI" in reason for reason in engine.evaluate(sol_5m).reasons)
+
+    alerts = _alerts(500, seed=9)
+    columns = AlertColumns.from_payloads(alerts)
+    timeframe = np.asarray([alert.timeframe for alert in alerts])
+    batch = evaluate_batch(columns, context, rules=table, timeframe=timeframe)
+    assert batch.reason_mask.tolist() == [engine.evaluate(alert).reason_mask for alert in alerts]
+    with pytest.raises(ValueError):
+        evaluate_batch(columns, context, rules=table)
+    with pytest.raises(ValueError):
+        RuleTable([default_rsi, default_rsi])
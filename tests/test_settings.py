@@ -0,0 +1,25 @@
+from sqlalchemy import text
+
+from trading_agent.config.settings import get_settings, reload_settings
+from trading_agent.db.database import get_engine
+
+
+def test_get_settings_is_cached_until_reload(monkeypatch):
+    first = get_settings()
+    assert get_settings() is first
+
+    monkeypatch.setenv("MAX_RISK_PER_TRADE", "0.02")
+    reloaded = reload_settings()
+    monkeypatch.delenv("MAX_RISK_PER_TRADE")
+
+    assert reloaded is not first
+    assert reloaded.max_risk_per_trade == 0.02
+    reload_settings()
+
+
+def test_engine_is_shared_and_uses_wal():
+    engine = get_engine()
+    assert get_engine() is engine
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from trading_agent.api.main import app
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert
+from trading_agent.services.sharding import FORWARDED_HEADER, HashRing, ShardRouter, WorkerUnavailable
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def test_hash_ring_is_stable_and_moves_few_keys_on_resize():
+    keys = [f"SYM{i}" for i in range(2000)]
+    four, five = HashRing(range(4)), HashRing(range(5))
+
+    assert [HashRing(range(4)).owner(key) for key in keys] == [four.owner(key) for key in keys]
+    counts = [sum(four.owner(key) == node for key in keys) for node in range(4)]
+    assert min(counts) > 300
+    moved = sum(four.owner(key) != five.owner(key) for key in keys)
+    assert moved < len(keys) * 0.35
+
+
+def _router(forwarded: list) -> ShardRouter:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        forwarded.append((request.url.path, request.headers[FORWARDED_HEADER], request.headers.get("X-Alert-ID"), body))
+        result = {"success": True, "order_id": "remote", "status": "filled", "executed_size": 1.0}
+        return httpx.Response(200, json=[result] * len(body) if isinstance(body, list) else result)
+
+    return ShardRouter(0, 2, "/nonexistent", transport_factory=lambda _: httpx.MockTransport(handler))
+
+
+def test_alerts_for_symbols_owned_elsewhere_are_forwarded(db_tables):
+    router = _router(forwarded := [])
+    remote = next(symbol for symbol in ("ETH", "BTC-USD", "SOL") if not router.is_local(symbol))
+    local = next(symbol for symbol in ("ETH", "BTC-USD", "SOL") if router.is_local(symbol))
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+
+    with TestClient(app) as client:
+        app.state.router = router
+        single = client.post("/webhook", json={**payload, "symbol": remote}, headers={"X-Alert-ID": "a1"})
+        batch = client.post("/webhook/batch", json=[{**payload, "symbol": s} for s in (remote, local, remote)])
+        # A request that was already forwarded is handled where it lands
+        pinned = client.post("/webhook", json={**payload, "symbol": remote}, headers={FORWARDED_HEADER: "1"})
+
+    assert single.json()["order_id"] == "remote"
+    assert [r["order_id"] for r in batch.json()][::2] == ["remote", "remote"]
+    assert batch.json()[1]["order_id"].startswith("paper-")
+    assert pinned.json()["order_id"].startswith("paper-")
+    assert forwarded[0][:3] == ("/webhook", "0", "a1")
+    assert forwarded[1][0] == "/webhook/batch" and [a["symbol"] for a in forwarded[1][3]] == [remote, remote]
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 2
+
+
+def test_unreachable_owner_returns_503(db_tables):
+    router = ShardRouter(0, 2, "/nonexistent-trading-agent-sockets")
+    remote = next(symbol for symbol in ("ETH", "BTC-USD", "SOL") if not router.is_local(symbol))
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+
+    with TestClient(app) as client:
+        app.state.router = router
+        response = client.post("/webhook", json={**payload, "symbol": remote})
+
+    assert response.status_code == 503
+
+
+def test_batch_answers_per_alert_when_one_owner_fails(db_tables):
+    router = ShardRouter(0, 2, "/nonexistent-trading-agent-sockets")
+    remote = next(symbol for symbol in ("ETH", "BTC-USD", "SOL") if not router.is_local(symbol))
+    local = next(symbol for symbol in ("ETH", "BTC-USD", "SOL") if router.is_local(symbol))
+    payload = json.loads((EXAMPLES / "webhook_buy.json").read_text())
+    batch = [{**payload, "symbol": s} for s in (remote, local)]
+
+    with TestClient(app) as client:
+        app.state.router = router
+        first = client.post("/webhook/batch", json=batch)
+        # Resending the whole batch runs nothing twice
+        second = client.post("/webhook/batch", json=batch)
+
+    assert first.status_code == second.status_code == 200
+    failed, committed = first.json()
+    assert failed["success"] is False and failed["status"] == "failed" and "Worker 1" in failed["error"]
+    assert committed["order_id"].startswith("paper-")
+    assert second.json()[1]["order_id"] == committed["order_id"]
+    with session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(Alert)) == 1
+
+
+def test_router_reports_transport_errors_as_worker_unavailable():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    router = ShardRouter(0, 2, "/nonexistent", transport_factory=lambda _: httpx.MockTransport(handler))
+
+    async def run() -> None:
+        try:
+            await router.forward(1, "/webhook", b"{}", {})
+        finally:
+            await router.aclose()
+
+    with pytest.raises(WorkerUnavailable) as raised:
+        asyncio.run(run())
+    assert raised.value.worker == 1
+
+
+def test_metrics_scrape_merges_every_worker_under_a_worker_label(db_tables):
+    peer = (
+        "# HELP trading_agent_decisions Trade decisions by action\n"
+        "# TYPE trading_agent_decisions counter\n"
+        'trading_agent_decisions_total{action="IGNORE",worker="1"} 7.0\n'
+    )
+    fetched = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fetched.append((request.url.path, request.headers[FORWARDED_HEADER]))
+        return httpx.Response(200, text=peer)
+
+    router = ShardRouter(0, 2, "/nonexistent", transport_factory=lambda _: httpx.MockTransport(handler))
+    with TestClient(app) as client:
+        app.state.router = router
+        merged = client.get("/metrics").text
+        own_share = client.get("/metrics", headers={FORWARDED_HEADER: "1"}).text
+
+    assert fetched == [("/metrics", "0")]
+    decisions = merged.split("# HELP trading_agent_decisions ", 1)[1].split("# HELP", 1)[0]
+    assert 'worker="1"} 7.0' in decisions and decisions.count("# TYPE") == 1
+    assert merged.count("# HELP trading_agent_decisions ") == 1
+    assert 'worker="0"' in own_share and 'worker="1"' not in own_share
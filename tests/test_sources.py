@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, timedelta
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.sources import stream_stored_alerts
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert
+from trading_agent.services.validation_engine import MarketContext
+
+START = datetime(2024, 1, 1)
+
+
+def _seed(count: int) -> None:
+    with session_scope() as session:
+        for i in range(count):
+            session.add(
+                Alert(
+                    symbol="ETH" if i % 2 == 0 else "SOL",
+                    price=1700.0 + i,
+                    signal="buy" if i % 3 else "sell",
+                    timeframe="5m",
+                    indicators={"RSI": 25.0 + i % 60, "MACD": 0.01, "EMA20": 1690.0 + i, "ATR": 10.0},
+                    created_at=START + timedelta(minutes=5 * i),
+                )
+            )
+
+
+def test_stream_filters_by_symbol_and_time_range_in_order(db_tables):
+    _seed(40)
+
+    streamed = list(
+        stream_stored_alerts(symbol="ETH", start=START + timedelta(minutes=50), end=START + timedelta(minutes=150), chunk_size=3)
+    )
+
+    assert [alert.symbol for alert in streamed] == ["ETH"] * 10
+    assert [alert.timestamp for alert in streamed] == sorted(alert.timestamp for alert in streamed)
+    assert streamed[0].timestamp == START + timedelta(minutes=50)
+
+
+def test_streaming_backtest_spills_trades_to_disk(db_tables, tmp_path):
+    _seed(25)
+    backtester = Backtester(MarketContext(ema_fast=1700.0, ema_slow=1690.0, vwap=1700.0, atr_baseline=10.0))
+    in_memory = backtester.run(list(stream_stored_alerts()))
+
+    log_path = tmp_path / "trades.jsonl"
+    streamed = backtester.run(stream_stored_alerts(chunk_size=4), keep_trades=False, trade_log=log_path)
+
+    assert streamed.trades is None
+    assert streamed.total_alerts == 25
+    assert streamed.net_pl == in_memory.net_pl
+    assert streamed.win_rate == in_memory.win_rate
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [entry["size"] for entry in logged] == [trade.size for trade in in_memory.trades]
@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+import trading_agent.models.entities  # noqa: F401 - register tables
+from trading_agent.db.database import Base
+
+LAZY_MODULES = ("numpy", "httpx", "talib", "xgboost")
+
+
+def _run(code: str, tmp_path) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'fresh.db'}", "AUDIT_LOG_PATH": str(tmp_path / "audit.log")}
+    return subprocess.run([sys.executable, "-c", code], env=env, cwd=tmp_path, capture_output=True, text=True, check=True)
+
+
+def test_importing_the_app_opens_nothing_and_skips_heavy_modules(tmp_path):
+    result = _run(
+        "import json, sys\n"
+        "import trading_agent.api.main as main\n"
+        "from trading_agent.db import database\n"
+        f"print(json.dumps([[m for m in {LAZY_MODULES!r} if m in sys.modules], database._engine is None]))",
+        tmp_path,
+    )
+    loaded, no_engine = json.loads(result.stdout)
+    assert loaded == []
+    assert no_engine
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_migrate_creates_missing_tables_once(tmp_path):
+    code = "from trading_agent.migrate import migrate; print(','.join(migrate()))"
+    created = _run(code, tmp_path).stdout.strip().split(",")
+    assert sorted(created) == sorted(Base.metadata.tables)
+    assert _run(code, tmp_path).stdout.strip() == ""
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert set(inspect(engine).get_table_names()) == set(Base.metadata.tables)
+    engine.dispose()
+
+
+def test_migrate_adds_missing_nullable_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE positions (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, size FLOAT NOT NULL, "
+            "entry_price FLOAT NOT NULL, stop_loss FLOAT, take_profit FLOAT, open BOOLEAN, realized_pnl FLOAT, "
+            "created_at DATETIME NOT NULL, closed_at DATETIME)"
+        )
+        connection.exec_driver_sql("INSERT INTO positions (symbol, size, entry_price, created_at) VALUES ('ETH', 1, 1, '2024-01-01')")
+
+    created = _run("from trading_agent.migrate import migrate; print(','.join(migrate()))", tmp_path).stdout.strip()
+    assert "positions.decision_id" in created.split(",") and "positions" not in created.split(",")
+    columns = {column["name"] for column in inspect(engine).get_columns("positions")}
+    assert "decision_id" in columns
+    engine.dispose()
+
+
+BASELINE_SCHEMA = (
+    "CREATE TABLE alerts (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, price FLOAT NOT NULL, signal VARCHAR NOT NULL, "
+    "timeframe VARCHAR NOT NULL, indicators JSON NOT NULL, created_at DATETIME NOT NULL)",
+    "CREATE TABLE validation_results (id INTEGER PRIMARY KEY, alert_id INTEGER NOT NULL, valid BOOLEAN, confidence INTEGER, "
+    "reasons JSON, created_at DATETIME NOT NULL)",
+    "CREATE TABLE decisions (id INTEGER PRIMARY KEY, alert_id INTEGER NOT NULL, action VARCHAR(11) NOT NULL, "
+    "symbol VARCHAR NOT NULL, order_type VARCHAR NOT NULL, size FLOAT NOT NULL, stop_loss FLOAT, take_profit FLOAT, "
+    "confidence INTEGER, created_at DATETIME NOT NULL)",
+    "CREATE TABLE orders (id INTEGER PRIMARY KEY, decision_id INTEGER NOT NULL, exchange_order_id VARCHAR, status VARCHAR, "
+    "filled_size FLOAT, created_at DATETIME NOT NULL)",
+    "CREATE TABLE positions (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, size FLOAT NOT NULL, entry_price FLOAT NOT NULL, "
+    "stop_loss FLOAT, take_profit FLOAT, open BOOLEAN, created_at DATETIME NOT NULL, closed_at DATETIME)",
+    "INSERT INTO alerts VALUES (1, 'ETH', 1700, 'buy', '5m', '{}', '2024-01-01')",
+    "INSERT INTO validation_results VALUES (1, 1, 1, 80, '[]', '2024-01-01')",
+    "INSERT INTO decisions VALUES (1, 1, 'ENTER_LONG', 'ETH', 'market', 0.5, NULL, NULL, 80, '2024-01-01')",
+    "INSERT INTO orders VALUES (1, 1, 'ex-1', 'filled', 0.5, '2024-01-01')",
+    "INSERT INTO positions VALUES (1, 'ETH', 0.5, 1700, NULL, NULL, 1, '2024-01-01', NULL)",
+)
+
+
+def test_migrate_brings_a_baseline_schema_up_to_the_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.exec_driver_sql(statement)
+
+    code = "from trading_agent.migrate import migrate; print(','.join(migrate()))"
+    created = _run(code, tmp_path).stdout.strip().split(",")
+    assert "performance_rollups" in created
+    assert {"alerts.idempotency_key", "orders.client_order_id", "positions.decision_id"} <= set(created)
+    assert _run(code, tmp_path).stdout.strip() == ""
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        indexes = {index["name"]: index for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= set(indexes), table.name
+        foreign_keys = {(tuple(fk["constrained_columns"]), fk["referred_table"]) for fk in inspector.get_foreign_keys(table.name)}
+        assert foreign_keys == {
+            (tuple(fk.column_keys), fk.referred_table.name) for fk in table.foreign_key_constraints
+        }, table.name
+    # Rebuilt tables carry inline UNIQUE constraints, the others get unique indexes
+    unique = {
+        table: [index["column_names"] for index in inspector.get_indexes(table) if index["unique"]]
+        + [constraint["column_names"] for constraint in inspector.get_unique_constraints(table)]
+        for table in ("alerts", "orders")
+    }
+    assert unique == {"alerts": [["idempotency_key"]], "orders": [["client_order_id"]]}
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM orders WHERE decision_id = 1").scalar() == 1
+        assert connection.exec_driver_sql("SELECT count(*) FROM positions").scalar() == 1
+    engine.dispose()
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy.orm import make_transient
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.sources import stream_stored_alerts
+from trading_agent.backtesting.store import ColumnarStore, sync_alerts
+from trading_agent.db.database import session_scope
+from trading_agent.models.entities import Alert
+from trading_agent.services.market_context import Candle
+from trading_agent.services.validation_engine import MarketContext
+
+START = datetime(2024, 1, 1, 22)
+
+
+def _seed(count: int, offset: int = 0) -> None:
+    with session_scope() as session:
+        for i in range(offset, offset + count):
+            session.add(
+                Alert(
+                    symbol="BTC-USD" if i % 2 == 0 else "SOL",
+                    price=1700.0 + i,
+                    signal="buy" if i % 3 else "sell",
+                    timeframe="5m",
+                    indicators={"RSI": 25.0 + i % 60, "MACD": 0.01, "EMA20": 1690.0 + i, "ATR": 10.0},
+                    created_at=START + timedelta(minutes=5 * i),
+                )
+            )
+
+
+def test_sync_is_incremental_and_matches_database(db_tables, tmp_path):
+    store = ColumnarStore(tmp_path / "store")
+    _seed(30)
+    assert sync_alerts(store, chunk_size=7) == 30
+    assert sync_alerts(store) == 0
+    _seed(30, offset=30)
+    assert sync_alerts(store, chunk_size=7) == 30
+    assert store.manifest()["synced_through"] == (START + timedelta(minutes=5 * 59)).isoformat()
+    assert store.symbols() == ["BTC-USD", "SOL"]
+
+    # Spans the midnight partition boundary; end is exclusive
+    start, end = START + timedelta(minutes=50), START + timedelta(minutes=250)
+    loaded = store.load_alerts(start=start, end=end)
+    expected = list(stream_stored_alerts(start=start, end=end))
+    assert list(loaded.payloads()) == expected
+
+    context = MarketContext(ema_fast=1800.0, ema_slow=1700.0, vwap=1750.0, atr_baseline=8.0)
+    backtester = Backtester(context)
+    assert backtester.run_batch(loaded.columns).net_pl == backtester.run(expected).net_pl
+
+
+def test_sync_picks_up_an_alert_that_commits_after_higher_ids(db_tables, tmp_path):
+    store = ColumnarStore(tmp_path / "store")
+    _seed(30)
+    with session_scope() as session:
+        late = session.get(Alert, 29)
+        session.delete(late)  # its transaction has not committed when the sync runs
+    assert sync_alerts(store) == 29
+
+    make_transient(late)
+    with session_scope() as session:
+        session.add(late)
+    assert sync_alerts(store) == 1
+    assert sync_alerts(store) == 0
+    assert sorted(store.load_alerts().alert_id.tolist()) == list(range(1, 31))
+
+
+def test_partitions_are_memory_mapped_views_trimmed_to_range(db_tables, tmp_path):
+    store = ColumnarStore(tmp_path / "store")
+    _seed(40)
+    sync_alerts(store)
+
+    parts = list(store.iter_alert_partitions(symbol="SOL", start=START + timedelta(hours=2, minutes=1)))
+    assert [str(part.timestamp[0].astype("datetime64[D]")) for part in parts] == ["2024-01-02"]
+    assert isinstance(parts[0].columns.price, np.memmap)
+    assert parts[0].timestamp[0] == np.datetime64(START + timedelta(hours=2, minutes=5))
+    assert len(store.load_alerts(symbol="ETH")) == 0
+
+
+def test_candle_appends_replace_bars_and_load_ranges(tmp_path):
+    store = ColumnarStore(tmp_path / "store")
+    bars = [Candle(START + timedelta(hours=i), 1.0, 2.0, 0.5, 1.5, 10.0) for i in range(6)]
+    assert store.append_candles("ETH", "1h", bars) == 6
+    store.append_candles("ETH", "1h", [Candle(START + timedelta(hours=3), 9.0, 9.0, 9.0, 9.0, 1.0)])
+
+    series = store.load_candles("ETH", "1h", start=START + timedelta(hours=1), end=START + timedelta(hours=5))
+    assert len(series) == 4
+    assert list(series.open) == [1.0, 1.0, 9.0, 1.0]
+    assert np.all(np.diff(series.timestamp) == 3600)
@@ -0,0 +1,83 @@
+import argparse
+
+import numpy as np
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.sweep import (
+    SweepParams,
+    add_context_arguments,
+    context_from_args,
+    format_table,
+    grid,
+    random_sample,
+    run_sweep,
+)
+from trading_agent.backtesting.vectorized import BUY, SELL, AlertColumns, decide_batch, evaluate_batch
+from trading_agent.config.settings import get_settings
+from trading_agent.services.decision_engine import RiskState
+from trading_agent.services.validation_engine import MarketContext
+
+
+def _columns(count: int = 500) -> AlertColumns:
+    rng = np.random.default_rng(3)
+    price = rng.uniform(100.0, 2000.0, count)
+    return AlertColumns(
+        symbol=rng.choice(np.array(["ETH", "SOL"]), count),
+        price=price,
+        rsi=rng.uniform(0.0, 100.0, count),
+        macd=rng.uniform(-0.01, 0.01, count),
+        ema20=price * rng.uniform(0.98, 1.02, count),
+        atr=price * rng.uniform(0.001, 0.02, count),
+        signal=rng.choice(np.array([BUY, SELL], dtype=np.int8), count),
+    )
+
+
+def test_sweep_matches_individual_backtests_and_is_ranked():
+    columns = _columns()
+    settings = get_settings()
+    context = MarketContext(ema_fast=900.0, ema_slow=900.0, vwap=1000.0, atr_baseline=20.0)
+    base = SweepParams.from_base(settings, context)
+    candidates = grid(base, {"max_risk_per_trade": [0.005, 0.02], "confidence_cutoff": [40, 60]})
+
+    results = run_sweep(columns, candidates, workers=2, settings=settings)
+
+    assert len(results) == 4
+    assert [r.net_pl for r in results] == sorted((r.net_pl for r in results), reverse=True)
+    for result in results:
+        params = result.params
+        expected = Backtester(
+            params.context(),
+            settings=settings.model_copy(update={"max_risk_per_trade": params.max_risk_per_trade}),
+            confidence_cutoff=params.confidence_cutoff,
+        ).run_batch(columns)
+        assert result.net_pl == expected.net_pl
+    assert "net_pl" in format_table(results, limit=2)
+
+
+def test_random_sample_is_reproducible():
+    base = SweepParams(max_risk_per_trade=0.01, max_symbol_exposure=0.2)
+    space = {"validity_threshold": [30, 40, 50], "max_symbol_exposure": [0.1, 0.2]}
+
+    assert random_sample(base, space, 5, seed=1) == random_sample(base, space, 5, seed=1)
+
+
+def test_loaded_columns_keep_symbol_codes_and_decide_like_strings(tmp_path):
+    columns = _columns(200)
+    loaded = AlertColumns.load(columns.save(tmp_path / "dataset"))
+    assert loaded.symbol.dtype == np.int32 and list(loaded.symbol_names) == ["ETH", "SOL"]
+    np.testing.assert_array_equal(loaded.symbols(), columns.symbol)
+    np.testing.assert_array_equal(loaded.symbol_mask(["SOL"]), columns.symbol == "SOL")
+    np.testing.assert_array_equal(loaded.slice(10, 20).symbols(), columns.symbol[10:20])
+
+    settings = get_settings()
+    context = MarketContext(ema_fast=900.0, ema_slow=900.0, vwap=1000.0, atr_baseline=20.0)
+    risk = RiskState(open_positions={"ETH": 1.0}, daily_loss_fraction=0.0)
+    expected = decide_batch(columns, evaluate_batch(columns, context), risk, settings).to_trades()
+    assert decide_batch(loaded, evaluate_batch(loaded, context), risk, settings).to_trades() == expected
+
+
+def test_cli_context_keeps_fast_and_slow_emas_apart():
+    parser = argparse.ArgumentParser()
+    add_context_arguments(parser)
+    context = context_from_args(parser.parse_args(["--ema-fast", "1710", "--ema-slow", "1700"]))
+    assert (context.ema_fast, context.ema_slow) == (1710.0, 1700.0)
@@ -0,0 +1,54 @@
+import math
+import random
+
+from trading_agent.backtesting.replay import Backtester
+from trading_agent.backtesting.vectorized import AlertColumns
+from trading_agent.schemas.alert import AlertPayload, IndicatorPayload
+from trading_agent.services.validation_engine import MarketContext
+
+
+def _random_alerts(count: int, seed: int = 7) -> list[AlertPayload]:
+    rng = random.Random(seed)
+    alerts = []
+    for _ in range(count):
+        price = rng.uniform(20.0, 40000.0)
+        alerts.append(
+            AlertPayload(
+                symbol=rng.choice(["ETH", "BTC-USD", "SOL"]),
+                price=price,
+                signal=rng.choice(["buy", "sell"]),
+                timeframe="5m",
+                indicators=IndicatorPayload(
+                    RSI=rng.uniform(0.0, 100.0),
+                    MACD=rng.uniform(-0.01, 0.01),
+                    EMA20=price * rng.uniform(0.97, 1.03),
+                    ATR=price * rng.uniform(0.001, 0.03),
+                ),
+            )
+        )
+    return alerts
+
+
+def test_batch_backtest_matches_scalar_loop_exactly():
+    alerts = _random_alerts(2000)
+    context = MarketContext(ema_fast=1500.0, ema_slow=1400.0, vwap=1600.0, atr_baseline=150.0)
+    backtester = Backtester(context)
+
+    scalar = backtester.run(alerts)
+    batch = backtester.run_batch(AlertColumns.from_payloads(alerts))
+
+    assert batch.net_pl == scalar.net_pl
+    assert batch.win_rate == scalar.win_rate
+    assert batch.expectancy == scalar.expectancy
+    assert batch.decisions.to_trades() == scalar.trades
+    assert any(trade.size > 0 for trade in scalar.trades)
+
+
+def test_batch_backtest_handles_missing_vwap_and_empty_input():
+    context = MarketContext(ema_fast=1500.0, ema_slow=1400.0, vwap=None, atr_baseline=150.0)
+    backtester = Backtester(context)
+    alerts = _random_alerts(200, seed=11)
+
+    assert backtester.run_batch(alerts).net_pl == backtester.run(alerts).net_pl
+    empty = backtester.run_batch([])
+    assert empty.net_pl == 0.0 and not math.isnan(empty.win_rate)